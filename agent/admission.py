@@ -0,0 +1,194 @@
+import math
+import os
+import time
+from collections import OrderedDict
+
+from config.settings import settings
+from monitoring.metrics import track_admission_rejected, track_tool_in_flight, track_tool_tokens
+
+class RateLimited(Exception):
+    """
+    A request or tool call was not admitted.
+    `status_code` is 429 when the caller is over its own rate and 503
+    when a tool is saturated; `retry_after` is in seconds.
+    `reason` is one of: rate, in_flight.
+    """
+    def __init__(self, message: str, status_code: int, retry_after: float, limit: str, reason: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.limit = limit
+        self.reason = reason
+    
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+class TokenBucket:
+    """
+    `burst` tokens, refilled continuously at `rate` per second.
+    """
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    def wait(self, cost: float, now: float) -> float:
+        """
+        Refill, then return the seconds until `cost` tokens are available (0 = now).
+        """
+        if now > self.updated:  # a bucket created after `now` was read has nothing to refill
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+    
+    def take(self, cost: float = 1.0, now: float = None) -> float:
+        """
+        Take `cost` tokens if available. Returns 0 when taken, otherwise
+        the seconds to wait (nothing is taken).
+        """
+        wait = self.wait(cost, time.monotonic() if now is None else now)
+        if wait == 0.0:
+            self.tokens -= cost
+        return wait
+
+class UserRateLimiter:
+    """
+    Token bucket per user: the request's user_id, or the client address
+    when none was given. Only the `max_tracked` most recently seen users
+    keep a bucket; a forgotten user starts again with a full one, which
+    is what an idle bucket would have refilled to anyway.
+    """
+    def __init__(self, rate_per_second: float, burst: float, max_tracked: int = 100000):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.max_tracked = max_tracked
+        self.buckets = OrderedDict()  # user_id -> TokenBucket, least recently seen first
+    
+    def admit(self, counts: dict):
+        """
+        Admit queries for several users at once, all or nothing.
+        counts: user_id -> number of queries, each costing one token.
+        A batch larger than the burst is admitted once the user's bucket
+        is full and leaves it in debt, so the user waits for the whole
+        batch to be paid back before sending more. Raises RateLimited (429).
+        """
+        now = time.monotonic()
+        charges = []
+        wait = 0.0
+        for user_id, count in counts.items():
+            bucket = self._bucket(user_id)
+            wait = max(wait, bucket.wait(min(count, self.burst), now))
+            charges.append((bucket, count))
+        
+        if wait > 0.0:
+            track_admission_rejected("user", "rate")
+            raise RateLimited(f"Rate limit exceeded; retry in {wait:.1f}s", 429, wait, "user", "rate")
+        for bucket, cost in charges:
+            bucket.tokens -= cost
+    
+    def _bucket(self, user_id: str) -> TokenBucket:
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            bucket = self.buckets[user_id] = TokenBucket(self.rate, self.burst)
+            if len(self.buckets) > self.max_tracked:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(user_id)
+        return bucket
+
+class ToolLimiter:
+    """
+    Admission for upstream calls of one tool, shared by every user of
+    this worker: at most `max_in_flight` concurrent calls and, if `rate`
+    is set, a token bucket (e.g. to stay inside an API quota). Calls over
+    either limit are shed with RateLimited (503) instead of queueing.
+    """
+    def __init__(self, tool_name: str, rate_per_second: float = None, burst: float = None,
+                 max_in_flight: int = None, retry_after_seconds: float = 1.0):
+        self.tool_name = tool_name
+        self.bucket = TokenBucket(rate_per_second, burst or max(1.0, rate_per_second)) if rate_per_second else None
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after_seconds
+        self.in_flight = 0
+    
+    def acquire(self):
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            self._shed("in_flight", self.retry_after,
+                       f"{self.tool_name} is at capacity ({self.max_in_flight} calls in flight)")
+        if self.bucket is not None:
+            wait = self.bucket.take()
+            track_tool_tokens(self.tool_name, self.bucket.tokens)
+            if wait > 0.0:
+                self._shed("rate", wait, f"{self.tool_name} rate limit reached")
+        self.in_flight += 1
+        track_tool_in_flight(self.tool_name, 1)
+    
+    def release(self):
+        self.in_flight -= 1
+        track_tool_in_flight(self.tool_name, -1)
+    
+    async def call(self, compute) -> dict:
+        """
+        Run `compute()` (an async tool call) in an admitted slot.
+        """
+        self.acquire()
+        try:
+            return await compute()
+        finally:
+            self.release()
+    
+    def _shed(self, reason: str, retry_after: float, message: str):
+        track_admission_rejected(self.tool_name, reason)
+        raise RateLimited(f"{message}; retry in {retry_after:.1f}s", 503, retry_after, self.tool_name, reason)
+
+def admission_enabled(admission: dict) -> bool:
+    """
+    `admission.enabled`, overridden by ADMISSION_ENABLED (0/1) if set.
+    """
+    override = os.environ.get('ADMISSION_ENABLED')
+    if override is not None:
+        return override.lower() not in ('0', 'false', 'no', '')
+    return admission.get('enabled', True)
+
+def build_user_limiter(performance: dict):
+    """
+    Create the per-user limiter from `admission.users` in the
+    `performance` settings, or None when disabled.
+    """
+    admission = performance.get('admission') or {}
+    users = admission.get('users') or {}
+    if not admission_enabled(admission) or not users.get('rate_per_second'):
+        return None
+    return UserRateLimiter(
+        users['rate_per_second'],
+        burst=users.get('burst', users['rate_per_second']),
+        max_tracked=users.get('max_tracked', 100000)
+    )
+
+def build_tool_limiters(performance: dict) -> dict:
+    """
+    Create a ToolLimiter per tool listed under `admission.tools` in the
+    `performance` settings.
+    """
+    admission = performance.get('admission') or {}
+    if not admission_enabled(admission):
+        return {}
+    
+    limiters = {}
+    for tool_name, options in (admission.get('tools') or {}).items():
+        options = options or {}
+        limiters[tool_name] = ToolLimiter(
+            tool_name,
+            rate_per_second=options.get('rate_per_second'),
+            burst=options.get('burst'),
+            max_in_flight=options.get('max_in_flight'),
+            retry_after_seconds=options.get('retry_after_seconds', admission.get('retry_after_seconds', 1))
+        )
+    return limiters
+
+# Global limiters (None / empty when admission control is disabled)
+user_limiter = build_user_limiter(settings.get('performance', {}))
+tool_limiters = build_tool_limiters(settings.get('performance', {}))
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+from agent.registry import registry
+from config.settings import settings
+from monitoring.metrics import track_cache_lookup, track_cache_eviction
+
+# Params whose value is case- and punctuation-insensitive ("Paris?" is "paris");
+# everything else ("5+1" vs ".5+1", ".NET" vs "net") is keyed exactly
+INSENSITIVE_PARAMS = {('weather', 'city')}
+
+def make_key(tool_name: str, params: dict) -> tuple:
+    """
+    Build a cache key from the tool name and params.
+    Only INSENSITIVE_PARAMS are normalized: "Paris?" and " paris " map
+    to the same weather entry.
+    """
+    normalized = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, str) and (tool_name, name) in INSENSITIVE_PARAMS:
+            value = " ".join(value.lower().strip(" ?!.,").split())
+        normalized.append((name, value))
+    return (tool_name, tuple(normalized))
+
+class ResultCache:
+    """
+    Bounded TTL + LRU cache for tool results.
+    Entries are evicted by age, entry count and total byte size.
+    Concurrent misses for the same key share a single upstream call.
+    Expired entries linger for `stale_seconds` so they can stand in for
+    a failing upstream (see get_stale).
+    """
+    def __init__(self, ttl_seconds: dict, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024,
+                 stale_seconds: float = 0):
+        self.ttl_seconds = dict(ttl_seconds)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.entries = OrderedDict()  # key -> (expires_at, size, result)
+        self.total_bytes = 0
+        self.in_flight = {}  # key -> asyncio.Future of the leading call
+    
+    def caches(self, tool_name: str) -> bool:
+        """
+        Only tools with a positive TTL are cached.
+        """
+        return self.ttl_seconds.get(tool_name, 0) > 0
+    
+    def get(self, key: tuple):
+        """
+        Return a live cached result, or None.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, _, result = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self.stale_seconds <= now:
+                self._evict(key, "expired")
+            return None
+        
+        self.entries.move_to_end(key)
+        return result
+    
+    def get_stale(self, tool_name: str, params: dict):
+        """
+        Return a cached result even if expired (within `stale_seconds`), or None.
+        """
+        key = make_key(tool_name, params)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] + self.stale_seconds <= time.monotonic():
+            return None
+        return entry[2]
+    
+    def put(self, key: tuple, result: dict):
+        """
+        Store a result, evicting least recently used entries to stay in bounds.
+        """
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        
+        if key in self.entries:
+            self._remove(key)
+        
+        self.entries[key] = (time.monotonic() + self.ttl_seconds[key[0]], size, result)
+        self.total_bytes += size
+        
+        while len(self.entries) > self.max_entries:
+            self._evict(next(iter(self.entries)), "lru")
+        while self.total_bytes > self.max_bytes:
+            self._evict(next(iter(self.entries)), "size")
+    
+    async def get_or_compute(self, tool_name: str, params: dict, compute) -> dict:
+        """
+        Serve from cache, join an in-flight call, or run `compute()` once.
+        Only successful results are stored. If the leading call is
+        cancelled (its client went away), one of the callers waiting on
+        it takes over instead of failing with it.
+        """
+        key = make_key(tool_name, params)
+        
+        result = self.get(key)
+        if result is not None:
+            track_cache_lookup(tool_name, hit=True)
+            return result
+        
+        pending = self.in_flight.get(key)
+        track_cache_lookup(tool_name, hit=False, coalesced=pending is not None)
+        while pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise  # this caller was cancelled, not the leader
+            pending = self.in_flight.get(key)
+        
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            result = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        except BaseException:
+            future.cancel()  # followers see a cancelled leader and retry
+            raise
+        finally:
+            self.in_flight.pop(key, None)
+        
+        if result.get('success', False):
+            self.put(key, result)
+        future.set_result(result)
+        return result
+    
+    def clear(self):
+        """
+        Drop every cached entry.
+        """
+        self.entries.clear()
+        self.total_bytes = 0
+    
+    def _remove(self, key: tuple):
+        _, size, _ = self.entries.pop(key)
+        self.total_bytes -= size
+    
+    def _evict(self, key: tuple, reason: str):
+        self._remove(key)
+        track_cache_eviction(key[0], reason)
+
+def build_result_cache(performance: dict):
+    """
+    Create the result cache from the `performance` settings section.
+    Returns None when caching is disabled.
+    """
+    if not performance.get('cache_enabled', False):
+        return None
+    
+    cache_config = performance.get('cache') or {}
+    return ResultCache(
+        ttl_seconds=registry.cache_ttls(cache_config.get('ttl_seconds')),
+        max_entries=cache_config.get('max_entries', 1024),
+        max_bytes=cache_config.get('max_bytes', 8 * 1024 * 1024),
+        stale_seconds=cache_config.get('stale_seconds', 0)
+    )
+
+# Global result cache (None when disabled in settings)
+result_cache = build_result_cache(settings.get('performance', {}))
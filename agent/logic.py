@@ -1,116 +1,119 @@
 import sys
+import time
+import asyncio
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from tools.calculator import calculate
-from tools.weather import get_weather
-from tools.wiki import search_wikipedia
-from tools.datetime_tool import get_current_datetime, calculate_date_difference
+from agent.cache import result_cache
+from agent.registry import registry
+from agent.router import router, remove_spans
+from agent.resilience import tool_guards, ToolUnavailable
+from agent.admission import tool_limiters, RateLimited
+from monitoring.metrics import track_stale_result
+from monitoring.tracing import stage
 
 def decide_tool(query: str) -> str:
     """
     Decide which tool to use based on keywords in the query.
     Returns: tool name
     """
-    query_lower = query.lower()
-    
-    # Calculator keywords
-    if any(keyword in query_lower for keyword in ['calculate', 'compute', 'math', '+', '-', '*', '/', 'sum', 'multiply', 'divide']):
-        return 'calculator'
-    
-    # Weather keywords
-    elif any(keyword in query_lower for keyword in ['weather', 'temperature', 'forecast', 'rain', 'sunny', 'climate']):
-        return 'weather'
-    
-    # Wikipedia keywords
-    elif any(keyword in query_lower for keyword in ['wiki', 'wikipedia', 'who is', 'what is', 'tell me about', 'information about']):
-        return 'wikipedia'
-    
-    # DateTime keywords
-    elif any(keyword in query_lower for keyword in ['date', 'time', 'today', 'current time', 'what day', 'difference between']):
-        return 'datetime'
-    
-    else:
-        return 'unknown'
+    tool, _ = router.route(query)
+    return tool
 
-def extract_params(query: str, tool: str) -> dict:
+def extract_params(query: str, tool: str, spans: list = None) -> dict:
     """
-    Extract parameters from the query based on the tool.
+    Extract parameters from the query with the tool's extractor.
+    `spans` are the strip spans from router.route(); computed if omitted.
     """
-    query_clean = query.strip()
-    
-    if tool == 'calculator':
-        # Extract math expression (remove words like "calculate", "what is", etc.)
-        for word in ['calculate', 'compute', 'what is', 'solve', 'math']:
-            query_clean = query_clean.lower().replace(word, '').strip()
-        return {'expression': query_clean}
-    
-    elif tool == 'weather':
-        # Extract city name
-        for word in ['weather in', 'weather', 'temperature in', 'forecast for']:
-            query_clean = query_clean.lower().replace(word, '').strip()
-        return {'city': query_clean}
-    
-    elif tool == 'wikipedia':
-        # Extract topic
-        for word in ['wiki', 'wikipedia', 'who is', 'what is', 'tell me about', 'information about']:
-            query_clean = query_clean.lower().replace(word, '').strip()
-        return {'query': query_clean}
-    
-    elif tool == 'datetime':
-        # For now, just return current datetime
+    spec = registry.get(tool)
+    if spec is None:
         return {}
     
-    return {}
+    query_clean = query.strip().lower()
+    if spans is None:
+        spans = router.spans_for(query_clean, tool)
+    return spec.extract(query_clean, remove_spans(query_clean, spans))
 
-def run_tool(tool_name: str, params: dict) -> dict:
+async def run_tool(tool_name: str, params: dict) -> dict:
     """
-    Execute the selected tool with parameters.
+    Execute the selected tool with parameters, going through the
+    result cache for tools that have a TTL configured.
+    Guarded tools get a deadline, retries and a circuit breaker; when
+    they fail, an expired cached result is served if one is available.
+    Limited tools shed upstream calls over their rate or in-flight cap:
+    a stale cached result is served if there is one, otherwise
+    RateLimited propagates to the caller.
     """
+    guard = tool_guards.get(tool_name)
+    if guard is not None:
+        call = lambda: guard.call(lambda: _execute_tool(tool_name, params))
+    else:
+        call = lambda: _execute_tool(tool_name, params)
+    limiter = tool_limiters.get(tool_name)
+    compute = (lambda: limiter.call(call)) if limiter is not None else call
+    
     try:
-        if tool_name == 'calculator':
-            return calculate(params.get('expression', ''))
-        
-        elif tool_name == 'weather':
-            return get_weather(params.get('city', 'London'))
-        
-        elif tool_name == 'wikipedia':
-            return search_wikipedia(params.get('query', ''))
-        
-        elif tool_name == 'datetime':
-            return get_current_datetime()
-        
-        elif tool_name == 'unknown':
+        if result_cache is not None and result_cache.caches(tool_name):
+            return await result_cache.get_or_compute(tool_name, params, compute)
+        return await compute()
+    except RateLimited:
+        stale = result_cache.get_stale(tool_name, params) if result_cache is not None else None
+        if stale is None:
+            raise
+        track_stale_result(tool_name)
+        return {**stale, 'stale': True}
+    except ToolUnavailable as e:
+        stale = result_cache.get_stale(tool_name, params) if result_cache is not None else None
+        if stale is not None:
+            track_stale_result(tool_name)
+            return {**stale, 'stale': True}
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+async def _execute_tool(tool_name: str, params: dict) -> dict:
+    """
+    Run the tool itself (its module is imported on first use).
+    CPU-only tools run inline; network tools await the shared HTTP client.
+    """
+    spec = registry.get(tool_name)
+    if spec is None:
+        if tool_name == 'unknown':
             return {
                 'success': False,
                 'error': 'Could not determine which tool to use. Try asking about weather, calculations, Wikipedia, or date/time.'
             }
-        
-        else:
-            return {
-                'success': False,
-                'error': f'Unknown tool: {tool_name}'
-            }
+        return {
+            'success': False,
+            'error': f'Unknown tool: {tool_name}'
+        }
+    
+    try:
+        return await spec.execute(params)
     except Exception as e:
         return {
             'success': False,
             'error': str(e)
         }
 
-def process_query(query: str) -> dict:
+async def process_query(query: str) -> dict:
     """
     Main function: decide tool, extract params, run tool, return result.
     """
-    # Step 1: Decide which tool to use
-    tool = decide_tool(query)
+    # Step 1: Decide which tool to use (single pass, also finds strip spans)
+    with stage("route"):
+        tool, spans = router.route(query.strip())
     
     # Step 2: Extract parameters
-    params = extract_params(query, tool)
+    with stage("extract_params"):
+        params = extract_params(query, tool, spans)
     
-    # Step 3: Run the tool
-    result = run_tool(tool, params)
+    # Step 3: Run the tool (cache, retries and upstream calls included)
+    with stage("tool"):
+        result = await run_tool(tool, params)
     
     # Step 4: Return structured response
     return {
@@ -120,6 +123,86 @@ def process_query(query: str) -> dict:
         'result': result
     }
 
+async def stream_batch(queries: list, concurrency: int = 8):
+    """
+    Process many queries, yielding events as work progresses:
+    a 'routed' event per query as soon as its tool is chosen, then a
+    'result' event per query in completion order.
+    Identical (tool, params) pairs run once; network tools run
+    concurrently, at most `concurrency` at a time. Pending tool calls
+    are cancelled if the consumer stops early.
+    """
+    # Step 1: Route every query and group identical tool calls
+    routed = []
+    waiting = {}  # exact (tool, params) -> indices of queries sharing the call
+    for index, query in enumerate(queries):
+        with stage("route"):
+            tool, spans = router.route(query.strip())
+        with stage("extract_params"):
+            params = extract_params(query, tool, spans)
+        routed.append((query, tool, params))
+        waiting.setdefault((tool, tuple(sorted(params.items()))), []).append(index)
+        yield {
+            'event': 'routed',
+            'index': index,
+            'data': {'query': query, 'tool_used': tool, 'params': params}
+        }
+    
+    # Step 2: Run the distinct calls, bounding concurrent upstream requests
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def execute(key: tuple, tool: str, params: dict):
+        start_time = time.perf_counter()
+        try:
+            if registry.is_io(tool):
+                async with semaphore:
+                    with stage("tool"):
+                        result = await run_tool(tool, params)
+            else:
+                with stage("tool"):
+                    result = await run_tool(tool, params)
+        except RateLimited as e:
+            # A shed call fails only its own items, not the whole batch
+            result = {'success': False, 'error': str(e), 'retry_after': round(e.retry_after, 3)}
+        return key, result, time.perf_counter() - start_time
+    
+    tasks = [
+        asyncio.create_task(execute(key, routed[indices[0]][1], routed[indices[0]][2]))
+        for key, indices in waiting.items()
+    ]
+    
+    # Step 3: Fan each result out to every query that asked for it
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, result, elapsed = await next_done
+            for index in waiting[key]:
+                query, tool, params = routed[index]
+                yield {
+                    'event': 'result',
+                    'index': index,
+                    'data': {
+                        'query': query,
+                        'tool_used': tool,
+                        'params': params,
+                        'result': result,
+                        'processing_time': elapsed
+                    }
+                }
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def process_batch(queries: list, concurrency: int = 8) -> list:
+    """
+    Process many queries at once (see stream_batch).
+    Returns one result per query, in order, each with its own timing.
+    """
+    responses = [None] * len(queries)
+    async for event in stream_batch(queries, concurrency):
+        if event['event'] == 'result':
+            responses[event['index']] = event['data']
+    return responses
+
 # Test it
 if __name__ == "__main__":
     # Test different queries
@@ -131,9 +214,14 @@ if __name__ == "__main__":
         "Hello, how are you?"  # Should return unknown
     ]
     
-    for q in test_queries:
-        print(f"\nQuery: {q}")
-        response = process_query(q)
-        print(f"Tool: {response['tool_used']}")
-        print(f"Result: {response['result']}")
-        print("-" * 50)
\ No newline at end of file
+    async def main():
+        for q in test_queries:
+            print(f"\nQuery: {q}")
+            response = await process_query(q)
+            print(f"Tool: {response['tool_used']}")
+            print(f"Result: {response['result']}")
+            print("-" * 50)
+        from tools.http_client import close_client
+        await close_client()
+    
+    asyncio.run(main())
\ No newline at end of file
@@ -1,39 +1,524 @@
-from collections import deque
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque, OrderedDict
 from datetime import datetime
+from pathlib import Path
 
-class ConversationMemory:
+from agent.serialization import ENCODERS
+from config.settings import settings
+from monitoring.metrics import track_memory_eviction
+
+class Interaction:
     """
-    Simple conversation memory - stores last N interactions per user.
+    One stored conversation turn, kept compact: a float epoch timestamp,
+    the query stored once, and the tool result optionally held as
+    zlib-compressed JSON. Converted to the /history shape on read.
     """
-    def __init__(self, max_history: int = 3):
-        self.conversations = {}  # user_id -> deque of messages
-        self.max_history = max_history
+    __slots__ = ('timestamp', 'query', 'tool_used', 'params', 'result')
     
+    def __init__(self, timestamp: float, query: str, tool_used: str, params: dict, result):
+        self.timestamp = timestamp
+        self.query = query
+        self.tool_used = tool_used
+        self.params = params
+        self.result = result
+    
+    @classmethod
+    def from_response(cls, timestamp: float, query: str, response: dict, compress_min_bytes: int = None):
+        """
+        Build a record from a process_query result, compressing the tool
+        result when its JSON is at least `compress_min_bytes` long.
+        """
+        result = response.get('result')
+        if compress_min_bytes is not None:
+            encoded = json.dumps(result, default=str).encode()
+            if len(encoded) >= compress_min_bytes:
+                result = zlib.compress(encoded)
+        return cls(timestamp, query, response.get('tool_used'), response.get('params'), result)
+    
+    def to_dict(self) -> dict:
+        result = self.result
+        if isinstance(result, bytes):
+            result = json.loads(zlib.decompress(result))
+        return {
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat(),
+            'query': self.query,
+            'response': {
+                'query': self.query,
+                'tool_used': self.tool_used,
+                'params': self.params,
+                'result': result
+            }
+        }
+
+class MemoryStore:
+    """
+    Interface for conversation memory backends.
+    Every backend keeps the last `max_history` interactions per user.
+    """
     def add_interaction(self, user_id: str, query: str, response: dict):
         """
         Store a user interaction.
         """
-        if user_id not in self.conversations:
-            self.conversations[user_id] = deque(maxlen=self.max_history)
+        self.add_interactions([(user_id, query, response)])
+    
+    def add_interactions(self, interactions: list):
+        """
+        Store many interactions at once.
+        interactions: list of (user_id, query, response)
+        """
+        raise NotImplementedError
+    
+    def get_history(self, user_id: str) -> list:
+        """
+        Get conversation history for a user.
+        """
+        raise NotImplementedError
+    
+    def get_history_encoded(self, user_id: str, kind: str = "json") -> tuple:
+        """
+        History encoded as a list in `kind` (see agent.serialization.ENCODERS).
+        Returns (interaction count, bytes).
+        """
+        history = self.get_history(user_id)
+        return len(history), ENCODERS[kind](history)
+    
+    def clear_history(self, user_id: str):
+        """
+        Clear history for a user.
+        """
+        raise NotImplementedError
+    
+    def user_count(self) -> int:
+        """
+        Number of users currently remembered.
+        """
+        raise NotImplementedError
+    
+    def flush(self):
+        """
+        Wait until every stored interaction is visible to readers.
+        """
+    
+    def close(self):
+        """
+        Flush and release background resources.
+        """
+
+class _MemoryShard:
+    """
+    One lock stripe of ConversationMemory: its own LRU order, activity
+    times, encoded-history cache and lock.
+    """
+    __slots__ = ('lock', 'conversations', 'last_active', 'encoded')
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conversations = OrderedDict()  # user_id -> deque of Interaction, least recently active first
+        self.last_active = {}  # user_id -> monotonic time of last interaction
+        self.encoded = OrderedDict()  # (user_id, kind) -> (Interaction tuple, bytes), least recently read first
+
+class ConversationMemory(MemoryStore):
+    """
+    In-process conversation memory - stores last N interactions per user.
+    Bounded by a global user cap (least recently active users are evicted
+    first) and an optional idle TTL.
+    Users are spread over `shards` lock stripes by user_id, so writers
+    from the threadpool and the event loop only contend on the same
+    stripe. Each stripe keeps its own LRU order; `max_users` applies to
+    all stripes together. Once it is exceeded, the least recently active
+    of the stripes' oldest users is evicted, one stripe lock at a time.
+    That is global LRU, except that a user who becomes active between
+    the scan and the eviction can still be the one evicted.
+    Encoded histories of the last `history_cache_size` users read are
+    kept and served while their interactions are unchanged.
+    """
+    def __init__(self, max_history: int = 3, max_users: int = 100000, idle_ttl_seconds: float = None,
+                 compress_min_bytes: int = None, shards: int = 16, history_cache_size: int = 4096):
+        self.shards = [_MemoryShard() for _ in range(max(1, shards))]
+        self._lru_lock = threading.Lock()  # one cross-stripe eviction at a time
+        self.max_history = max_history
+        self.max_users = max_users
+        self.history_cache_per_shard = -(-history_cache_size // len(self.shards))
+        self.idle_ttl = idle_ttl_seconds
+        self.compress_min_bytes = compress_min_bytes
+    
+    def _shard(self, user_id: str) -> _MemoryShard:
+        return self.shards[hash(user_id) % len(self.shards)]
+    
+    def add_interactions(self, interactions: list):
+        """
+        Store many interactions at once, taking each stripe's lock once.
+        interactions: list of (user_id, query, response)
+        """
+        timestamp = time.time()
+        # Compression happens outside the locks
+        by_shard = {}
+        for user_id, query, response in interactions:
+            record = Interaction.from_response(timestamp, query, response, self.compress_min_bytes)
+            by_shard.setdefault(self._shard(user_id), []).append((user_id, record))
+        
+        added = False
+        for shard, records in by_shard.items():
+            with shard.lock:
+                now = time.monotonic()
+                for user_id, record in records:
+                    history = shard.conversations.get(user_id)
+                    if history is None:
+                        history = shard.conversations[user_id] = deque(maxlen=self.max_history)
+                        added = True
+                    else:
+                        shard.conversations.move_to_end(user_id)
+                    shard.last_active[user_id] = now
+                    history.append(record)
+                
+                self._evict(shard, now)
         
-        self.conversations[user_id].append({
-            'timestamp': datetime.now().isoformat(),
-            'query': query,
-            'response': response
-        })
+        if added:
+            self._evict_lru()
     
     def get_history(self, user_id: str) -> list:
         """
         Get conversation history for a user.
         """
-        return list(self.conversations.get(user_id, []))
+        shard = self._shard(user_id)
+        with shard.lock:
+            if self._expired(shard, user_id, time.monotonic()):
+                self._remove(shard, user_id, "idle")
+            interactions = list(shard.conversations.get(user_id, ()))
+        return [interaction.to_dict() for interaction in interactions]
+    
+    def get_history_encoded(self, user_id: str, kind: str = "json") -> tuple:
+        """
+        History encoded as a list in `kind`, reused until the user's
+        interactions change. Returns (interaction count, bytes).
+        """
+        shard = self._shard(user_id)
+        key = (user_id, kind)
+        with shard.lock:
+            if self._expired(shard, user_id, time.monotonic()):
+                self._remove(shard, user_id, "idle")
+            interactions = tuple(shard.conversations.get(user_id, ()))
+            # Interactions are never modified, so the same objects mean the same bytes
+            cached = shard.encoded.get(key)
+            if cached is not None and cached[0] == interactions:
+                shard.encoded.move_to_end(key)
+                return len(interactions), cached[1]
+        
+        encoded = ENCODERS[kind]([interaction.to_dict() for interaction in interactions])
+        if self.history_cache_per_shard > 0:
+            with shard.lock:
+                shard.encoded[key] = (interactions, encoded)
+                shard.encoded.move_to_end(key)
+                while len(shard.encoded) > self.history_cache_per_shard:
+                    shard.encoded.popitem(last=False)
+        return len(interactions), encoded
     
     def clear_history(self, user_id: str):
         """
         Clear history for a user.
         """
-        if user_id in self.conversations:
-            del self.conversations[user_id]
+        shard = self._shard(user_id)
+        with shard.lock:
+            if shard.conversations.pop(user_id, None) is not None:
+                del shard.last_active[user_id]
+            self._drop_encoded(shard, user_id)
+    
+    def user_count(self) -> int:
+        return sum(len(shard.conversations) for shard in self.shards)
+    
+    def _expired(self, shard: _MemoryShard, user_id: str, now: float) -> bool:
+        return (self.idle_ttl is not None and user_id in shard.last_active
+                and now - shard.last_active[user_id] > self.idle_ttl)
+    
+    def _evict(self, shard: _MemoryShard, now: float):
+        # Idle users sit at the front, so stop at the first live one
+        while shard.conversations:
+            oldest = next(iter(shard.conversations))
+            if not self._expired(shard, oldest, now):
+                break
+            self._remove(shard, oldest, "idle")
+    
+    def _evict_lru(self):
+        """
+        Evict least recently active users until at most max_users remain.
+        Called without any stripe lock held.
+        """
+        with self._lru_lock:
+            while self.user_count() > self.max_users:
+                victim, oldest = None, None
+                for shard in self.shards:
+                    with shard.lock:
+                        if shard.conversations:
+                            active = shard.last_active[next(iter(shard.conversations))]
+                            if oldest is None or active < oldest:
+                                victim, oldest = shard, active
+                if victim is None:
+                    return
+                with victim.lock:
+                    if victim.conversations:
+                        self._remove(victim, next(iter(victim.conversations)), "lru")
+    
+    def _remove(self, shard: _MemoryShard, user_id: str, reason: str):
+        del shard.conversations[user_id]
+        del shard.last_active[user_id]
+        self._drop_encoded(shard, user_id)
+        track_memory_eviction(reason)
+    
+    def _drop_encoded(self, shard: _MemoryShard, user_id: str):
+        if shard.encoded:
+            for kind in ENCODERS:
+                shard.encoded.pop((user_id, kind), None)
+
+class SQLiteMemory(MemoryStore):
+    """
+    Conversation memory shared by every worker process through a SQLite
+    database in WAL mode. Applies the same history, user-cap and idle-TTL
+    bounds as ConversationMemory; eviction sweeps run every
+    `sweep_interval_seconds`.
+    Writes (and sweeps) run on a writer thread, since a busy database can
+    hold a write for up to the 10 s busy timeout: add_interactions only
+    queues, so the event loop never waits on SQLite. Turns show up in
+    get_history once written, normally within milliseconds. When
+    `write_queue_size` writes are pending, new ones are dropped and
+    counted.
+    """
+    def __init__(self, path: str, max_history: int = 3, max_users: int = 100000,
+                 idle_ttl_seconds: float = None, sweep_interval_seconds: float = 5.0,
+                 write_queue_size: int = 10000):
+        self.path = str(path)
+        self.max_history = max_history
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl_seconds
+        self.sweep_interval = sweep_interval_seconds
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        self._user_count = 0
+        self._writes = queue.Queue(maxsize=write_queue_size)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS interactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    query TEXT NOT NULL,
+                    response TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_interactions_user ON interactions (user_id, id);
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    last_active REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_users_last_active ON users (last_active);
+            """)
+        self._sweep(time.time())
+    
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run alongside a writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def add_interactions(self, interactions: list):
+        """
+        Queue many interactions for the writer thread; never blocks.
+        interactions: list of (user_id, query, response)
+        """
+        self._start_writer()
+        try:
+            self._writes.put_nowait(('add', time.time(), interactions))
+        except queue.Full:
+            track_memory_eviction("dropped", len(interactions))
+    
+    def flush(self):
+        """
+        Wait until every write queued so far is committed.
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._writes.put(('flush', done))
+        done.wait()
+    
+    def close(self, timeout: float = 10.0):
+        """
+        Commit what is queued and stop the writer thread.
+        """
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is None or not writer.is_alive():
+            return
+        self._writes.put(None)
+        writer.join(timeout)
+    
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run_writer, name="memory-sqlite-writer", daemon=True)
+                self._writer.start()
+                atexit.unregister(self.close)
+                atexit.register(self.close)
+    
+    def _run_writer(self):
+        while True:
+            # Take everything already queued, so busy periods commit in batches
+            items = [self._writes.get()]
+            while len(items) < 1000:
+                try:
+                    items.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            
+            adds = []
+            for item in items:
+                if item is not None and item[0] == 'add':
+                    adds.append(item)
+                    continue
+                self._write(adds)
+                adds = []
+                if item is None:
+                    return
+                item[1].set()  # flush marker: everything before it is written
+            self._write(adds)
+    
+    def _write(self, adds: list):
+        """
+        Commit queued ('add', timestamp, interactions) items in one
+        transaction, then sweep if one is due. Runs on the writer thread.
+        """
+        if not adds:
+            return
+        try:
+            self._add(adds)
+            now = time.time()
+            if now >= self._next_sweep:
+                self._sweep(now)
+        except sqlite3.Error as e:
+            print(f"⚠️ Conversation memory write failed: {e}")
+    
+    def _add(self, adds: list):
+        rows = []
+        users = {}  # user_id -> last activity
+        for _, now, interactions in adds:
+            for user_id, query, response in interactions:
+                rows.append((user_id, now, query, json.dumps({
+                    'tool_used': response.get('tool_used'),
+                    'params': response.get('params'),
+                    'result': response.get('result')
+                }, default=str)))
+                users[user_id] = now
+        
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO interactions (user_id, timestamp, query, response) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(
+                "INSERT INTO users (user_id, last_active) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET last_active = excluded.last_active",
+                list(users.items())
+            )
+            # Keep only the last max_history turns per user
+            conn.executemany(
+                "DELETE FROM interactions WHERE user_id = ? AND id NOT IN "
+                "(SELECT id FROM interactions WHERE user_id = ? ORDER BY id DESC LIMIT ?)",
+                [(user_id, user_id, self.max_history) for user_id in users]
+            )
+    
+    def get_history(self, user_id: str) -> list:
+        """
+        Get conversation history for a user.
+        """
+        conn = self._connection()
+        if self.idle_ttl is not None:
+            row = conn.execute("SELECT last_active FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None or time.time() - row[0] > self.idle_ttl:
+                return []
+        
+        rows = conn.execute(
+            "SELECT timestamp, query, response FROM interactions WHERE user_id = ? ORDER BY id",
+            (user_id,)
+        ).fetchall()
+        history = []
+        for timestamp, query, response in rows:
+            stored = json.loads(response)
+            history.append(Interaction(timestamp, query, stored['tool_used'], stored['params'], stored['result']).to_dict())
+        return history
+    
+    def clear_history(self, user_id: str):
+        """
+        Clear history for a user (after any of their queued turns are written).
+        """
+        self.flush()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM interactions WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+    
+    def user_count(self) -> int:
+        # Refreshed by the periodic sweep; COUNT(*) per request is too slow
+        return self._user_count
+    
+    def _sweep(self, now: float):
+        """
+        Evict idle users and the least recently active beyond max_users.
+        """
+        self._next_sweep = now + self.sweep_interval
+        with self._connection() as conn:
+            if self.idle_ttl is not None:
+                cutoff = now - self.idle_ttl
+                conn.execute(
+                    "DELETE FROM interactions WHERE user_id IN (SELECT user_id FROM users WHERE last_active < ?)",
+                    (cutoff,)
+                )
+                idle = conn.execute("DELETE FROM users WHERE last_active < ?", (cutoff,)).rowcount
+                if idle:
+                    track_memory_eviction("idle", idle)
+            
+            count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            if count > self.max_users:
+                excess = count - self.max_users
+                oldest = "SELECT user_id FROM users ORDER BY last_active LIMIT ?"
+                conn.execute(f"DELETE FROM interactions WHERE user_id IN ({oldest})", (excess,))
+                conn.execute(f"DELETE FROM users WHERE user_id IN ({oldest})", (excess,))
+                track_memory_eviction("lru", excess)
+                count = self.max_users
+        self._user_count = count
+
+def create_memory(config: dict) -> MemoryStore:
+    """
+    Build the memory store selected by the `memory` settings section.
+    """
+    memory_config = config.get('memory') or {}
+    options = {
+        'max_history': config.get('agent', {}).get('max_history', 3),
+        'max_users': memory_config.get('max_users', 100000),
+        'idle_ttl_seconds': memory_config.get('idle_ttl_seconds')
+    }
+    
+    backend = memory_config.get('backend', 'memory')
+    if backend == 'sqlite':
+        # Relative paths are resolved against the project root
+        path = Path(__file__).parent.parent / memory_config.get('sqlite_path', 'data/memory.db')
+        return SQLiteMemory(path, sweep_interval_seconds=memory_config.get('sweep_interval_seconds', 5),
+                            write_queue_size=memory_config.get('write_queue_size', 10000), **options)
+    if backend == 'memory':
+        return ConversationMemory(compress_min_bytes=memory_config.get('compress_min_bytes'),
+                                  shards=memory_config.get('shards', 16),
+                                  history_cache_size=memory_config.get('history_cache_size', 4096), **options)
+    raise ValueError(f"Unknown memory backend: {backend}")
 
 # Global memory instance
-memory = ConversationMemory(max_history=3)
\ No newline at end of file
+memory = create_memory(settings)
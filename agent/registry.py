@@ -0,0 +1,149 @@
+import importlib
+import inspect
+
+from config.settings import settings
+
+# Entry point group for tools shipped in other packages:
+#   [project.entry-points."agent.tools"]
+#   currency = "agent_currency.spec:CURRENCY"   # a ToolSpec
+ENTRY_POINT_GROUP = 'agent.tools'
+
+COST_CLASSES = ('cpu', 'io')
+
+def _resolve(target):
+    """
+    Return `target` itself, or import "module:attribute" and return the attribute.
+    """
+    if not isinstance(target, str):
+        return target
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+class ToolSpec:
+    """
+    Everything the agent needs to know about one tool.
+    `executor(params)` returns the result dict (awaitable for io tools);
+    `extractor(query_lower, stripped)` turns a routed query into params,
+    `stripped` being the query with the route's strip phrases removed.
+    Both may be given as "module:function" strings so that the tool's
+    module is imported only when the tool is first used.
+    `routes` ({'keywords': [...], 'strip': [...]}) are used when
+    agent.router.routes in the settings has none for the tool;
+    `cache_ttl_seconds` is used when performance.cache.ttl_seconds has none.
+    """
+    def __init__(self, name: str, executor, extractor=None, routes: list = (), cost: str = 'cpu',
+                 cache_ttl_seconds: float = None):
+        if cost not in COST_CLASSES:
+            raise ValueError(f"Tool {name}: cost must be one of {COST_CLASSES}, not {cost!r}")
+        self.name = name
+        self.executor = executor
+        self.extractor = extractor
+        self.routes = [{**route, 'tool': name} for route in routes]
+        self.cost = cost
+        self.cache_ttl_seconds = cache_ttl_seconds
+    
+    def extract(self, query_lower: str, stripped: str) -> dict:
+        if self.extractor is None:
+            return {}
+        self.extractor = _resolve(self.extractor)
+        return self.extractor(query_lower, stripped)
+    
+    async def execute(self, params: dict) -> dict:
+        self.executor = _resolve(self.executor)
+        result = self.executor(params)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+# Tools bundled with the agent (routing keywords and cache TTLs are in setting.yaml)
+BUILTIN_TOOLS = {
+    'calculator': ToolSpec('calculator', 'tools.calculator:run', 'tools.calculator:extract_params'),
+    'weather': ToolSpec('weather', 'tools.weather:run', 'tools.weather:extract_params', cost='io'),
+    'wikipedia': ToolSpec('wikipedia', 'tools.wiki:run', 'tools.wiki:extract_params', cost='io'),
+    'datetime': ToolSpec('datetime', 'tools.datetime_tool:run', 'tools.datetime_tool:extract_params'),
+}
+
+class ToolRegistry:
+    """
+    The enabled tools by name. Nothing is imported from a tool's module
+    until the tool is first used.
+    """
+    def __init__(self, specs: list = ()):
+        self.tools = {}
+        for spec in specs:
+            self.register(spec)
+    
+    def register(self, spec: ToolSpec):
+        self.tools[spec.name] = spec
+    
+    def get(self, name: str):
+        return self.tools.get(name)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.tools
+    
+    def is_io(self, name: str) -> bool:
+        spec = self.tools.get(name)
+        return spec is not None and spec.cost == 'io'
+    
+    def routes(self, configured: list) -> list:
+        """
+        Router routes: the configured ones for enabled tools, in order,
+        followed by the declared routes of tools the configuration
+        does not route.
+        """
+        routes = [route for route in configured if route['tool'] in self.tools]
+        routed = {route['tool'] for route in routes}
+        for spec in self.tools.values():
+            if spec.name not in routed:
+                routes.extend(spec.routes)
+        return routes
+    
+    def cache_ttls(self, configured: dict) -> dict:
+        """
+        Cache TTL per tool: configured values over the tools' declared ones.
+        """
+        ttls = {spec.name: spec.cache_ttl_seconds for spec in self.tools.values() if spec.cache_ttl_seconds}
+        ttls.update(configured or {})
+        return ttls
+
+def _plugin_specs() -> dict:
+    """
+    ToolSpecs published by installed packages under ENTRY_POINT_GROUP.
+    A broken plugin is reported and skipped.
+    """
+    from importlib.metadata import entry_points  # scanning installed packages costs ~25 ms
+    
+    specs = {}
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            spec = entry_point.load()
+        except Exception as e:
+            print(f"⚠️ Could not load tool plugin {entry_point.name} ({entry_point.value}): {e}")
+            continue
+        specs[spec.name] = spec
+    return specs
+
+def build_registry(agent: dict) -> ToolRegistry:
+    """
+    Create the registry from the `agent` settings section.
+    `agent.tools` lists the enabled tools: a bundled tool's name, or a
+    "module:attribute" path to a ToolSpec. Tools installed through the
+    entry point group are enabled as well unless `agent.tool_plugins`
+    is false.
+    """
+    registry = ToolRegistry()
+    for entry in agent.get('tools') or BUILTIN_TOOLS:
+        if entry in BUILTIN_TOOLS:
+            registry.register(BUILTIN_TOOLS[entry])
+        elif ':' in entry:
+            registry.register(_resolve(entry))
+        else:
+            print(f"⚠️ Unknown tool in agent.tools: {entry}")
+    if agent.get('tool_plugins', True):
+        for spec in _plugin_specs().values():
+            registry.register(spec)
+    return registry
+
+# Global tool registry
+registry = build_registry(settings.get('agent', {}))
@@ -0,0 +1,198 @@
+import asyncio
+import random
+import time
+
+from config.settings import settings
+from monitoring.metrics import track_circuit_state, track_tool_retry, track_fast_failure
+
+class ToolUnavailable(Exception):
+    """
+    A guarded tool call failed fast or ran out of attempts.
+    `reason` is one of: circuit_open, deadline, budget, exhausted.
+    """
+    def __init__(self, tool_name: str, reason: str, message: str):
+        super().__init__(message)
+        self.tool_name = tool_name
+        self.reason = reason
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed -> open after `failure_threshold` failures in a row; after
+    `reset_seconds` one probe call is let through (half_open) and its
+    outcome closes or re-opens the circuit.
+    """
+    def __init__(self, tool_name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.tool_name = tool_name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        track_circuit_state(tool_name, "closed")
+    
+    def allow(self) -> bool:
+        """
+        Whether a call may go upstream right now.
+        """
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self._set_state("half_open")
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+    
+    def abandon(self):
+        """
+        Release the half-open probe slot of a call that was cancelled.
+        """
+        self.probing = False
+    
+    def retry_after(self) -> float:
+        """
+        Seconds until the next probe is allowed.
+        """
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+    
+    def record_success(self):
+        self.failures = 0
+        self.probing = False
+        if self.state != "closed":
+            self._set_state("closed")
+    
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != "open":
+                self._set_state("open")
+    
+    def _set_state(self, state: str):
+        self.state = state
+        track_circuit_state(self.tool_name, state)
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of first attempts, so retries cannot
+    multiply load on a struggling upstream. Every call deposits `ratio`
+    tokens, every retry spends one; up to `max_tokens` can be saved.
+    """
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+    
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+class ToolGuard:
+    """
+    Deadline, retry and circuit-breaker policy for one network tool.
+    The whole call, retries and backoff included, must finish within
+    `timeout_seconds`. Results flagged `retryable` (and timeouts) are
+    retried with full-jitter exponential backoff while the retry budget
+    allows, and count as breaker failures.
+    """
+    def __init__(self, tool_name: str, timeout_seconds: float = 10.0, max_retries: int = 3,
+                 backoff_seconds: float = 0.1, breaker: CircuitBreaker = None, budget: RetryBudget = None):
+        self.tool_name = tool_name
+        self.timeout = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff = backoff_seconds
+        self.breaker = breaker or CircuitBreaker(tool_name)
+        self.budget = budget or RetryBudget()
+    
+    async def call(self, compute) -> dict:
+        """
+        Run `compute()` (an async tool call) under this policy.
+        Raises ToolUnavailable instead of returning a transient failure.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        self.budget.deposit()
+        
+        attempt, error = 0, None
+        while True:
+            if not self.breaker.allow():
+                self._fail("circuit_open", error)
+            
+            try:
+                result = await asyncio.wait_for(compute(), deadline - loop.time())
+                error = result.get('error') if result.get('retryable') else None
+            except asyncio.TimeoutError:
+                result, error = None, f"no response within {self.timeout:g}s"
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            
+            if error is None:
+                self.breaker.record_success()
+                return result
+            self.breaker.record_failure()
+            
+            # Step 1: Give up when out of attempts, time or retry budget
+            if loop.time() >= deadline:
+                self._fail("deadline", error)
+            if attempt >= self.max_retries:
+                self._fail("exhausted", error)
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            if loop.time() + delay >= deadline:
+                self._fail("deadline", error)
+            if not self.budget.withdraw():
+                self._fail("budget", error)
+            
+            # Step 2: Back off, then retry
+            attempt += 1
+            track_tool_retry(self.tool_name)
+            await asyncio.sleep(delay)
+    
+    def _fail(self, reason: str, error: str = None):
+        track_fast_failure(self.tool_name, reason)
+        if error is None:
+            message = (f"{self.tool_name} is temporarily unavailable; "
+                       f"retry in {self.breaker.retry_after():.0f}s")
+        else:
+            message = f"{self.tool_name} failed: {error}"
+        raise ToolUnavailable(self.tool_name, reason, message)
+
+def build_tool_guards(performance: dict) -> dict:
+    """
+    Create a ToolGuard per tool listed under `resilience.tools` in the
+    `performance` settings; per-tool entries override the defaults.
+    """
+    resilience = performance.get('resilience') or {}
+    if not resilience.get('enabled', True):
+        return {}
+    
+    guards = {}
+    for tool_name, overrides in (resilience.get('tools') or {}).items():
+        options = {**resilience, **(overrides or {})}
+        guards[tool_name] = ToolGuard(
+            tool_name,
+            timeout_seconds=options.get('timeout_seconds', performance.get('timeout_seconds', 10)),
+            max_retries=options.get('max_retries', performance.get('max_retries', 3)),
+            backoff_seconds=options.get('backoff_seconds', 0.1),
+            breaker=CircuitBreaker(
+                tool_name,
+                failure_threshold=options.get('failure_threshold', 5),
+                reset_seconds=options.get('reset_seconds', 30)
+            ),
+            budget=RetryBudget(
+                ratio=options.get('retry_budget_ratio', 0.2),
+                max_tokens=options.get('retry_budget_max', 10)
+            )
+        )
+    return guards
+
+# Global per-tool guards (empty when resilience is disabled in settings)
+tool_guards = build_tool_guards(settings.get('performance', {}))
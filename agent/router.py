@@ -0,0 +1,127 @@
+import re
+
+from agent.registry import registry
+from config.settings import settings
+
+def _trie_pattern(phrases) -> str:
+    """
+    Build a prefix-sharing regex from literal phrases.
+    Greedy optional suffixes make it prefer the longest phrase at a position.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+    
+    def render(node) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if terminal else body
+    
+    return render(trie)
+
+class IntentRouter:
+    """
+    Keyword router compiled once into regexes.
+    One scan over the lowercased query finds the routing keywords and
+    picks the tool (stopping early once the top-priority route matched);
+    routes may also give regex `patterns`, tried only when they rank above
+    the keyword winner;
+    a per-tool regex then finds the spans to remove when extracting its
+    parameters.
+    """
+    def __init__(self, routes: list):
+        # A tool may have several routes, e.g. specific phrases ranked
+        # ahead of another tool's broad keywords
+        self.tools = [route['tool'] for route in routes]
+        
+        keywords = {}  # phrase -> best route priority
+        strips = {}    # tool -> phrases stripped for it
+        for rank, route in enumerate(routes):
+            for phrase in route.get('keywords', []):
+                keywords[phrase] = min(keywords.get(phrase, len(self.tools)), rank)
+            if route.get('strip'):
+                strips.setdefault(route['tool'], set()).update(route['strip'])
+        
+        # Every keyword matching at a position is a prefix of the longest
+        # one matching there, so precompute the best rank each match implies.
+        self.phrases = {
+            phrase: min(keywords[p] for p in keywords if phrase.startswith(p))
+            for phrase in keywords
+        }
+        self.pattern = re.compile(_trie_pattern(self.phrases)) if self.phrases else None
+        self.strip_patterns = {tool: re.compile(_trie_pattern(phrases)) for tool, phrases in strips.items()}
+        
+        # Regexes for phrases a bare keyword would over-match
+        # ("time in" also hits "best player of all time in tennis"), by rank
+        self.pattern_routes = [(rank, re.compile('|'.join(f'(?:{pattern})' for pattern in route['patterns'])))
+                               for rank, route in enumerate(routes) if route.get('patterns')]
+    
+    @classmethod
+    def from_settings(cls, config: dict):
+        """
+        Build the router from the `agent.router.routes` settings section,
+        keeping routes of enabled tools and adding the declared routes
+        of tools that have none there.
+        """
+        return cls(registry.routes(config.get('agent', {}).get('router', {}).get('routes', [])))
+    
+    def spans_for(self, query_lower: str, tool: str) -> list:
+        """
+        Leftmost-longest, non-overlapping spans to strip for a tool.
+        """
+        pattern = self.strip_patterns.get(tool)
+        if pattern is None:
+            return []
+        return [match.span() for match in pattern.finditer(query_lower)]
+    
+    def route(self, query: str):
+        """
+        Return (tool, spans) for a query.
+        Spans index into query.lower().
+        """
+        query_lower = query.lower()
+        phrases = self.phrases
+        unknown = rank = len(self.tools)
+        
+        # Resuming one character after each match keeps overlapping keywords
+        if self.pattern is not None:
+            search = self.pattern.search
+            match = search(query_lower)
+            while match is not None and rank:
+                if phrases[match.group()] < rank:
+                    rank = phrases[match.group()]
+                match = search(query_lower, match.start() + 1)
+        
+        # Only patterns of routes ranked above the keyword winner can change it
+        for pattern_rank, pattern in self.pattern_routes:
+            if pattern_rank >= rank:
+                break
+            if pattern.search(query_lower):
+                rank = pattern_rank
+                break
+        
+        if rank == unknown:
+            return 'unknown', []
+        tool = self.tools[rank]
+        return tool, self.spans_for(query_lower, tool)
+
+def remove_spans(text: str, spans: list) -> str:
+    """
+    Cut the given spans out of text, tidying whitespace at the cuts.
+    """
+    pieces = []
+    last_end = 0
+    for start, end in spans:
+        pieces.append(text[last_end:start].strip())
+        last_end = end
+    pieces.append(text[last_end:].strip())
+    return ' '.join(piece for piece in pieces if piece)
+
+# Global router, compiled at import
+router = IntentRouter.from_settings(settings)
@@ -0,0 +1,108 @@
+import json
+
+from fastapi.responses import JSONResponse, Response
+
+from config.settings import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_api_settings = settings.get('api') or {}
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# MessagePack responses for internal clients that send Accept: application/msgpack
+MSGPACK_ENABLED = bool(_api_settings.get('msgpack', False))
+if MSGPACK_ENABLED and msgpack is None:
+    print("⚠️ MessagePack responses disabled; install msgpack to enable them")
+    MSGPACK_ENABLED = False
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson is not None else 0
+
+def json_dumps(content) -> bytes:
+    """
+    Encode to compact JSON bytes with orjson, falling back to the json
+    module for what orjson rejects (integers beyond 64 bits, no orjson).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=str, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
+def _big_ints_to_str(content):
+    if isinstance(content, int) and not isinstance(content, bool) and not -2 ** 63 <= content < 2 ** 64:
+        return str(content)
+    if isinstance(content, dict):
+        return {key: _big_ints_to_str(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_big_ints_to_str(value) for value in content]
+    return content
+
+def msgpack_dumps(content) -> bytes:
+    """
+    Encode to MessagePack; integers beyond 64 bits become strings.
+    """
+    try:
+        return msgpack.packb(content, default=str, use_bin_type=True)
+    except OverflowError:
+        return msgpack.packb(_big_ints_to_str(content), default=str, use_bin_type=True)
+
+ENCODERS = {"json": json_dumps, "msgpack": msgpack_dumps}
+MEDIA_TYPES = {"json": JSON_MEDIA_TYPE, "msgpack": MSGPACK_MEDIA_TYPE}
+
+def response_format(accept: str) -> str:
+    """
+    "msgpack" when enabled and the client asks for it, otherwise "json".
+    """
+    if MSGPACK_ENABLED and accept and MSGPACK_MEDIA_TYPE in accept:
+        return "msgpack"
+    return "json"
+
+def encode_with_raw(kind: str, fields: dict, raw_key: str, raw_value: bytes) -> bytes:
+    """
+    Encode `fields` plus one more key whose value is already encoded in
+    `kind` (e.g. a cached history list), without decoding it again.
+    """
+    if kind == "msgpack":
+        parts = [msgpack.Packer().pack_map_header(len(fields) + 1)]
+        for key, value in fields.items():
+            parts.append(msgpack_dumps(key) + msgpack_dumps(value))
+        parts.append(msgpack_dumps(raw_key) + raw_value)
+        return b"".join(parts)
+    
+    head = json_dumps(fields)
+    separator = b"," if fields else b""
+    return head[:-1] + separator + json_dumps(raw_key) + b":" + raw_value + b"}"
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson (see json_dumps).
+    """
+    def render(self, content) -> bytes:
+        return json_dumps(content)
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+    
+    def render(self, content) -> bytes:
+        return msgpack_dumps(content)
+
+def negotiated_response(content, accept: str = None, status_code: int = 200) -> Response:
+    """
+    Encode an already-built response body as JSON, or MessagePack when
+    the client asks for it. Skips response-model validation: callers
+    pass plain dicts built from trusted tool results.
+    """
+    if response_format(accept) == "msgpack":
+        return MsgPackResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
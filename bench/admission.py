@@ -0,0 +1,165 @@
+"""
+Admission control under a weather flood: calculator latency and shed load.
+
+Runs a steady closed-loop calculator load against the in-process app
+(stub upstreams) three times: alone, next to an open-loop flood of
+uncached weather queries with admission control off, and with it on
+(per-tool in-flight cap and rate from config/setting.yaml, or the
+flags below). Reports calculator p50/p99 per phase and how the weather
+requests were answered (200 / 429 / 503).
+
+Usage: python bench/admission.py [--seconds 5] [--flood-rps 400] [--delay 0.5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.report import make_report, write_report, load_report, print_comparison, percentiles
+from bench.stubs import StubServer, point_tools_at
+
+
+async def calculator_load(client, clients: int, stop: asyncio.Event) -> list:
+    """
+    Closed loop: `clients` workers each send their next calculator query
+    as soon as the previous one returns. Returns latencies in seconds.
+    """
+    latencies = []
+    
+    async def worker(worker_id: int):
+        i = 0
+        while not stop.is_set():
+            i += 1
+            start = time.perf_counter()
+            await client.post("/ask", json={"query": f"Calculate {i} * {worker_id} + 7", "user_id": f"calc_{worker_id}"})
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0)  # an all-CPU request over ASGITransport never yields
+    
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(clients)))
+    return latencies
+
+
+async def weather_flood(client, rps: float, stop: asyncio.Event) -> dict:
+    """
+    Open loop: weather queries for distinct cities (no cache hits) at
+    `rps`, from many users, regardless of how fast they are answered.
+    Returns response counts by status code.
+    """
+    statuses = {}
+    tasks = []
+    
+    async def send(i: int):
+        try:
+            response = await client.post("/ask", json={"query": f"weather in flood city {i}", "user_id": f"flood_{i % 1000}"})
+            status = response.status_code
+        except Exception:
+            status = "error"
+        statuses[status] = statuses.get(status, 0) + 1
+    
+    start = time.perf_counter()
+    i = 0
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, i / rps - (time.perf_counter() - start)))
+        tasks.append(asyncio.create_task(send(i)))
+        i += 1
+    await asyncio.gather(*tasks)
+    return statuses
+
+
+async def phase(client, args, flood: bool) -> dict:
+    stop = asyncio.Event()
+    calculator = asyncio.create_task(calculator_load(client, args.clients, stop))
+    weather = asyncio.create_task(weather_flood(client, args.flood_rps, stop)) if flood else None
+    await asyncio.sleep(args.seconds)
+    stop.set()
+    latencies = await calculator
+    statuses = await weather if weather is not None else {}
+    
+    latency = percentiles(latencies, scale=1000)
+    return {
+        "calculator_requests": len(latencies),
+        "calculator_per_s": round(len(latencies) / args.seconds, 1),
+        "calculator_p50_ms": round(latency["p50"], 2),
+        "calculator_p99_ms": round(latency["p99"], 2),
+        "weather_statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)}
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    import main as api
+    from agent import admission, logic
+    from config.settings import settings
+    
+    api.request_log = None
+    logic.result_cache = None  # every flood query must go upstream
+    configured = dict(admission.tool_limiters)
+    # ADMISSION_ENABLED=0 left the globals empty; read the limits themselves
+    weather = ((settings.get("performance", {}).get("admission") or {}).get("tools") or {}).get("weather") or {}
+    limiter = admission.ToolLimiter(
+        "weather",
+        rate_per_second=args.weather_rate if args.weather_rate is not None else weather.get("rate_per_second"),
+        burst=None if args.weather_rate is not None else weather.get("burst"),
+        max_in_flight=args.max_in_flight if args.max_in_flight is not None else weather.get("max_in_flight", 32)
+    )
+    print(f"weather limit when on: max_in_flight={limiter.max_in_flight} "
+          f"rate={limiter.bucket.rate if limiter.bucket else None}/s; upstream delay {args.delay * 1000:.0f} ms")
+    
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as client:
+        await client.post("/ask", json={"query": "Calculate 1 + 1"})  # warm-up
+        admission.tool_limiters.clear()
+        results["calculator_only"] = await phase(client, args, flood=False)
+        results["flood_admission_off"] = await phase(client, args, flood=True)
+        admission.tool_limiters["weather"] = limiter
+        results["flood_admission_on"] = await phase(client, args, flood=True)
+        admission.tool_limiters.clear()
+        admission.tool_limiters.update(configured)
+    
+    from tools.http_client import close_client
+    await close_client()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each phase")
+    parser.add_argument("--clients", type=int, default=8, help="closed-loop calculator clients")
+    parser.add_argument("--flood-rps", type=float, default=400, help="weather queries per second")
+    parser.add_argument("--delay", type=float, default=0.5, help="stub upstream latency in seconds")
+    parser.add_argument("--max-in-flight", type=int, help="weather in-flight cap (default: settings)")
+    parser.add_argument("--weather-rate", type=float, help="weather calls per second (default: settings)")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    
+    os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+    os.environ["ADMISSION_ENABLED"] = "0"  # per-user limits off; the weather limiter is switched per phase
+    with StubServer(delay=args.delay) as stub:
+        point_tools_at(stub)
+        results = asyncio.run(run(args))
+    
+    for name, numbers in results.items():
+        print(f"{name:<22} calculator n={numbers['calculator_requests']:<6} p50={numbers['calculator_p50_ms']:>8} ms  "
+              f"p99={numbers['calculator_p99_ms']:>8} ms   weather {numbers['weather_statuses'] or '-'}")
+    
+    settings = {"seconds": args.seconds, "clients": args.clients, "flood_rps": args.flood_rps, "delay": args.delay,
+                "max_in_flight": args.max_in_flight, "weather_rate": args.weather_rate}
+    report = make_report("admission", settings, {name: {key: value for key, value in numbers.items() if key != "weather_statuses"}
+                                                 for name, numbers in results.items()})
+    if args.json:
+        write_report(args.json, report)
+    if args.compare and not print_comparison(load_report(args.compare), report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+List aggregation benchmark: "sum of ..." / "average of ..." queries over
+long number lists, NumPy path vs a pure-Python parse-and-reduce loop.
+
+Times the full query path (route + extract_params + calculate) against
+parsing with Python floats or ast.literal_eval, and the reductions on
+their own for each aggregate function.
+
+Usage: python bench/aggregate_bench.py [--sizes 1000 100000 1000000]
+"""
+import argparse
+import ast
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.logic import extract_params
+from agent.router import router
+from tools.calculator import calculate, _numpy_reduce
+
+PHRASES = {"sum": "sum of", "mean": "average of", "min": "min of", "max": "max of", "std": "standard deviation of"}
+
+
+def python_reduce(name: str, values: list):
+    if name == "sum":
+        return sum(values)
+    if name == "min":
+        return min(values)
+    if name == "max":
+        return max(values)
+    mean = sum(values) / len(values)
+    if name == "mean":
+        return mean
+    return math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+
+
+def python_query(query: str, name: str):
+    # Baseline: split the list in Python and reduce with a Python loop
+    numbers = query.split(" of ", 1)[1]
+    return python_reduce(name, [float(item) for item in numbers.split(",")])
+
+
+def ast_query(query: str, name: str):
+    # Baseline: parse the list as a Python literal, as the ast-based calculator would
+    numbers = query.split(" of ", 1)[1]
+    return python_reduce(name, ast.literal_eval(f"[{numbers}]"))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+    
+    import numpy as np
+    calculate("sum(1)")  # warm-up: NumPy is imported lazily
+    
+    rng = random.Random(3)
+    for size in args.sizes:
+        numbers = [round(rng.uniform(-1000, 1000), 3) for _ in range(size)]
+        array = np.asarray(numbers)
+        listing = ", ".join(map(str, numbers))
+        print(f"n={size}")
+        for name, phrase in PHRASES.items():
+            query = f"What is the {phrase} {listing}?"
+            
+            def agent_path():
+                tool, spans = router.route(query)
+                return calculate(extract_params(query, tool, spans)["expression"])
+            
+            result, agent_ms = timed(agent_path)
+            expected, python_ms = timed(python_query, query.rstrip("?"), name)
+            _, ast_ms = timed(ast_query, query.rstrip("?"), name)
+            assert result["success"] and math.isclose(result["result"], expected, rel_tol=1e-9, abs_tol=1e-6), (name, result)
+            
+            _, array_reduce_ms = timed(_numpy_reduce, name, array)
+            _, python_reduce_ms = timed(python_reduce, name, numbers)
+            print(f"    {name:<5} query: agent={agent_ms:8.2f}  python floats={python_ms:8.2f}  ast={ast_ms:8.2f} ms   "
+                  f"reduce: numpy array={array_reduce_ms:7.2f}  "
+                  f"python={python_reduce_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Concurrent /ask throughput against local stub upstreams.
+
+Runs a calculator/Wikipedia/weather mix through the ASGI app in-process
+at several concurrency levels and reports throughput plus per-tool latency.
+Slow upstream calls should not delay calculator requests.
+
+Usage: python bench/async_throughput.py [--delay 0.2] [--requests 400]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.stubs import StubServer, point_tools_at
+
+QUERY_MIX = [
+    "Calculate 25 + 17",
+    "Tell me about Machine Learning",
+    "What is the weather in Paris?",
+    "Calculate 2 ** 10",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(client, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {}
+    
+    async def one(i):
+        query = QUERY_MIX[i % len(QUERY_MIX)]
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/ask", json={"query": query, "user_id": f"bench_{i % 50}"})
+            elapsed = time.perf_counter() - start
+        tool = response.json().get("tool_used", "error")
+        latencies.setdefault(tool, []).append(elapsed)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    wall = time.perf_counter() - start
+    
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": round(total / wall, 1),
+        "tools": {
+            tool: {
+                "p50_ms": round(statistics.median(values) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2)
+            }
+            for tool, values in sorted(latencies.items())
+        }
+    }
+
+
+async def main(args):
+    import httpx
+    import main as api
+    
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for concurrency in args.concurrency:
+            result = await run_level(client, args.requests, concurrency)
+            print(f"concurrency={result['concurrency']:>4}  throughput={result['throughput_rps']:>8} req/s")
+            for tool, numbers in result["tools"].items():
+                print(f"    {tool:<12} p50={numbers['p50_ms']:>8} ms  p99={numbers['p99_ms']:>8} ms")
+    
+    from tools.http_client import close_client
+    await close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.2, help="stub upstream latency in seconds")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    args = parser.parse_args()
+    
+    os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+    
+    with StubServer(delay=args.delay) as stub:
+        point_tools_at(stub)
+        asyncio.run(main(args))
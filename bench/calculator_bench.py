@@ -0,0 +1,103 @@
+"""
+Calculator microbenchmark: compiled, cached engine vs the legacy
+per-call ast interpreter, plus NumPy evaluation of one expression over
+arrays of variable values.
+
+Usage: python bench/calculator_bench.py [--calls 100000] [--sizes 1000 100000 1000000]
+"""
+import argparse
+import ast
+import operator
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools.calculator import calculate, compile_expression
+
+EXPRESSIONS = ["25 + 17", "2 ** 10", "10 / 4", "2*(3+4)", "(1 + 2) * 3 - 4 / 5", "-7 + 3 * (2 ** 3)"]
+
+
+def legacy_calculate(expression: str) -> dict:
+    try:
+        operators = {
+            ast.Add: operator.add,
+            ast.Sub: operator.sub,
+            ast.Mult: operator.mul,
+            ast.Div: operator.truediv,
+            ast.Pow: operator.pow,
+            ast.USub: operator.neg,
+        }
+        
+        def eval_expr(node):
+            if isinstance(node, ast.Constant):
+                return node.value
+            elif isinstance(node, ast.BinOp):
+                return operators[type(node.op)](eval_expr(node.left), eval_expr(node.right))
+            elif isinstance(node, ast.UnaryOp):
+                return operators[type(node.op)](eval_expr(node.operand))
+            raise ValueError("Unsupported operation")
+        
+        return {"success": True, "result": eval_expr(ast.parse(expression, mode='eval').body), "expression": expression}
+    except Exception as e:
+        return {"success": False, "error": str(e), "expression": expression}
+
+
+def per_call_us(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+    
+    rng = random.Random(7)
+    repeated = [rng.choice(EXPRESSIONS) for _ in range(args.calls)]
+    distinct = [f"{rng.randint(1, 999)} * ({rng.randint(1, 999)} + {rng.randint(1, 999)}) - {i}"
+                for i in range(args.calls // 10)]
+    
+    # Single expressions: hot (repeated) and cold (every expression new)
+    for expression in EXPRESSIONS:
+        assert calculate(expression)["result"] == legacy_calculate(expression)["result"], expression
+    print("single expression (us/call)")
+    print(f"    repeated  legacy={per_call_us(legacy_calculate, repeated):7.2f}  "
+          f"compiled={per_call_us(calculate, repeated):7.2f}  (cache {compile_expression.cache_info().hits} hits)")
+    compile_expression.cache_clear()
+    print(f"    distinct  legacy={per_call_us(legacy_calculate, distinct):7.2f}  "
+          f"compiled={per_call_us(calculate, distinct):7.2f}")
+    
+    # Safety limit: a runaway exponent is rejected instead of pinning a core
+    start = time.perf_counter()
+    result = calculate("9 ** 9 ** 9")
+    print(f"    9 ** 9 ** 9 rejected in {(time.perf_counter() - start) * 1e6:.1f} us: {result['error']}")
+    
+    # One expression over many variable bindings
+    import numpy as np
+    compiled = compile_expression("(x * 1.5 + y) ** 2 / (y + 1) - x")
+    print("batch: (x * 1.5 + y) ** 2 / (y + 1) - x")
+    for size in args.sizes:
+        x = np.random.default_rng(1).random(size)
+        y = np.random.default_rng(2).random(size)
+        start = time.perf_counter()
+        vectorized = compiled.evaluate_array({"x": x, "y": y})
+        vector_time = time.perf_counter() - start
+        
+        loop_size = min(size, 100000)
+        xs, ys = x[:loop_size].tolist(), y[:loop_size].tolist()
+        start = time.perf_counter()
+        looped = [compiled.evaluate({"x": a, "y": b}) for a, b in zip(xs, ys)]
+        loop_time = (time.perf_counter() - start) * size / loop_size
+        assert np.allclose(vectorized[:loop_size], looped)
+        print(f"    n={size:>8}  numpy={vector_time * 1000:9.2f} ms  python loop={loop_time * 1000:9.2f} ms"
+              f"{' (extrapolated)' if loop_size < size else ''}  speedup={loop_time / vector_time:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Shared-state stress test and lock contention benchmark.
+
+Stress: many threads (as Starlette's threadpool would) and event-loop
+tasks hammer one ConversationMemory and one ExperimentTracker at once,
+with /history readers running alongside, then checks that every
+interaction and every counted request is there exactly. Exits with
+status 1 on any lost update or reader error.
+
+Benchmark: add_interaction and log_request throughput per thread count,
+for one lock (shards=1) against striped memory.
+
+Usage: python bench/contention.py [--threads 1 4 16 64] [--ops 20000] [--shards 1 16]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+
+from agent.memory import ConversationMemory
+from monitoring.experiment import ExperimentTracker
+
+RESPONSE = {
+    "query": "Calculate 25 + 17",
+    "tool_used": "calculator",
+    "params": {"expression": "25 + 17"},
+    "result": {"success": True, "result": 42, "expression": "25 + 17"}
+}
+TOOLS = ["calculator", "weather", "wikipedia", "datetime"]
+
+
+def new_tracker() -> ExperimentTracker:
+    tracker = ExperimentTracker()
+    tracker.state = "disabled"  # count only, nothing buffered for MLflow
+    return tracker
+
+
+def worker(memory, tracker, worker_id: int, ops: int, users: int):
+    for i in range(ops):
+        memory.add_interaction(f"user_{(worker_id + i) % users}", f"q{worker_id}-{i}", RESPONSE)
+        tracker.log_request(TOOLS[i % len(TOOLS)], i % 5 != 0, 0.001)
+
+
+async def stress(threads: int, tasks: int, ops: int, users: int, shards: int) -> list:
+    """
+    Run the mixed load and return the list of problems found.
+    """
+    # Caps well above the load, so nothing is evicted and every write must be found
+    memory = ConversationMemory(max_history=(threads + tasks) * ops, max_users=2 * users, shards=shards)
+    tracker = new_tracker()
+    errors = []
+    done = threading.Event()
+    
+    def reader():
+        while not done.is_set():
+            for user in range(0, users, 7):
+                try:
+                    memory.get_history(f"user_{user}")
+                    memory.user_count()
+                except Exception as e:
+                    errors.append(f"reader: {e!r}")
+                    return
+    
+    async def task(task_id: int):
+        for i in range(ops):
+            memory.add_interaction(f"user_{(task_id + i) % users}", f"t{task_id}-{i}", RESPONSE)
+            tracker.log_request(TOOLS[i % len(TOOLS)], i % 5 != 0, 0.001)
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+    
+    loop = asyncio.get_running_loop()
+    reader_thread = threading.Thread(target=reader, daemon=True)
+    reader_thread.start()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [loop.run_in_executor(pool, worker, memory, tracker, worker_id, ops, users)
+                   for worker_id in range(threads)]
+        await asyncio.gather(*futures, *(task(threads + task_id) for task_id in range(tasks)))
+    done.set()
+    reader_thread.join()
+    
+    writers = threads + tasks
+    expected = writers * ops
+    stored = sum(len(memory.get_history(f"user_{user}")) for user in range(users))
+    problems = list(errors)
+    if stored != expected:
+        problems.append(f"memory: {stored} interactions stored, expected {expected}")
+    # Writer w touches users w .. w + ops - 1 (mod users)
+    touched = len({(writer + i) % users for writer in range(writers) for i in range(ops)})
+    if memory.user_count() != touched:
+        problems.append(f"memory: {memory.user_count()} users, expected {touched}")
+    
+    counts = tracker.run_metrics
+    expected_success = writers * sum(1 for i in range(ops) if i % 5 != 0)
+    expected_tools = {tool: writers * len(range(index, ops, len(TOOLS))) for index, tool in enumerate(TOOLS)}
+    if counts["total_requests"] != expected:
+        problems.append(f"tracker: total_requests {counts['total_requests']}, expected {expected}")
+    if counts["successful_requests"] != expected_success:
+        problems.append(f"tracker: successful_requests {counts['successful_requests']}, expected {expected_success}")
+    if counts["failed_requests"] != expected - expected_success:
+        problems.append(f"tracker: failed_requests {counts['failed_requests']}, expected {expected - expected_success}")
+    if counts["tool_usage"] != expected_tools:
+        problems.append(f"tracker: tool_usage {counts['tool_usage']}, expected {expected_tools}")
+    return problems
+
+
+def throughput(fn, threads: int, ops: int) -> float:
+    """
+    Total calls per second with `threads` threads each making `ops` calls.
+    """
+    barrier = threading.Barrier(threads + 1)
+    
+    def run(worker_id: int):
+        barrier.wait()
+        for i in range(ops):
+            fn(worker_id, i)
+    
+    pool = [threading.Thread(target=run, args=(worker_id,)) for worker_id in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def bench(args):
+    print(f"{'operation':<34} " + " ".join(f"{f'{n} thr':>12}" for n in args.threads) + "   (ops/s)")
+    for shards in args.shards:
+        rates = []
+        for threads in args.threads:
+            memory = ConversationMemory(max_history=3, max_users=2 * args.users, shards=shards)
+            rates.append(throughput(
+                lambda worker_id, i: memory.add_interaction(f"user_{(worker_id * 7919 + i) % args.users}", "q", RESPONSE),
+                threads, args.ops))
+        print(f"{f'memory.add_interaction shards={shards}':<34} " + " ".join(f"{rate:12,.0f}" for rate in rates))
+    
+    rates = []
+    for threads in args.threads:
+        tracker = new_tracker()
+        rates.append(throughput(lambda worker_id, i: tracker.log_request(TOOLS[i % 4], True, 0.001), threads, args.ops))
+    print(f"{'tracker.log_request':<34} " + " ".join(f"{rate:12,.0f}" for rate in rates))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--ops", type=int, default=20000, help="calls per thread")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--tasks", type=int, default=8, help="event-loop writers during the stress test")
+    parser.add_argument("--skip-stress", action="store_true")
+    parser.add_argument("--skip-bench", action="store_true")
+    args = parser.parse_args()
+    
+    failed = False
+    if not args.skip_stress:
+        # Short GIL switch interval makes lost updates far more likely
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for shards in args.shards:
+                threads = max(args.threads)
+                problems = asyncio.run(stress(threads, args.tasks, args.ops // 10, args.users, shards))
+                status = "ok" if not problems else "FAILED"
+                print(f"stress shards={shards}: {threads} threads + {args.tasks} tasks x {args.ops // 10} ops: {status}")
+                for problem in problems:
+                    print(f"    {problem}")
+                failed = failed or bool(problems)
+        finally:
+            sys.setswitchinterval(interval)
+    
+    if not args.skip_bench:
+        bench(args)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
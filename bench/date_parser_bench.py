@@ -0,0 +1,64 @@
+"""
+Date parser microbenchmark: parse_date (fromisoformat fast path +
+per-day memoization of dateutil results) vs dateutil.parser.parse
+across common formats.
+
+Usage: python bench/date_parser_bench.py [--calls 20000]
+"""
+import argparse
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dateutil import parser
+
+from tools.datetime_tool import parse_date, _parse_fuzzy
+
+FORMATS = {
+    "iso date": "2024-03-05",
+    "iso datetime": "2024-03-05T10:30:00",
+    "iso with offset": "2024-03-05T10:30:00+02:00",
+    "iso utc (Z)": "2024-03-05T10:30:00Z",
+    "iso basic": "20240305",
+    "space separated": "2024-03-05 10:30",
+    "month name": "March 5, 2024",
+    "day month year": "5 Mar 2024",
+    "us slashes": "03/05/2024",
+}
+
+
+def uncached(text: str) -> datetime:
+    # parse_date without the memo
+    text = text.strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return _parse_fuzzy.__wrapped__(text, date.today())
+
+
+def per_call_us(fn, text: str, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(text)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--calls", type=int, default=20000)
+    args = arg_parser.parse_args()
+    
+    print(f"{'format':<18}{'dateutil':>12}{'fast path':>12}{'memoized':>12}   (us/call)")
+    for name, text in FORMATS.items():
+        assert uncached(text) == parser.parse(text), name
+        dateutil_us = per_call_us(parser.parse, text, args.calls)
+        fast_us = per_call_us(uncached, text, args.calls)
+        cached_us = per_call_us(parse_date, text, args.calls)
+        print(f"{name:<18}{dateutil_us:12.2f}{fast_us:12.2f}{cached_us:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Cold-start cost: import time and peak RSS with lazily imported tools.
+
+Each case runs in a fresh interpreter. "agent.logic" and "main" are
+what a worker imports now (tools load on first use); the "+all_tools"
+cases add every bundled tool module, which is what importing
+agent.logic used to do. "first_use:<tool>" is the one-off import a
+worker pays the first time it serves that tool.
+
+Usage: python bench/import_time.py [--runs 7] [--json out.json] [--compare base.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.registry import BUILTIN_TOOLS
+from bench.report import make_report, write_report, load_report, print_comparison
+
+ROOT = Path(__file__).parent.parent
+
+ALL_TOOLS = ["tools.calculator", "tools.datetime_tool", "tools.http_client", "tools.weather", "tools.wiki"]
+
+# Child process: import `warm` untimed, then time importing `timed`
+CHILD = """
+import importlib, json, resource, sys, time
+warm, timed = json.loads(sys.argv[1])
+for name in warm:
+    importlib.import_module(name)
+start = time.perf_counter()
+for name in timed:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "tool_modules": sorted(name for name in sys.modules if name.startswith("tools."))}))
+"""
+
+
+def cases() -> dict:
+    tool_modules = {name: spec.executor.partition(":")[0] for name, spec in BUILTIN_TOOLS.items()}
+    return {
+        "interpreter": ([], []),
+        "agent.logic": ([], ["agent.logic"]),
+        "agent.logic+all_tools": ([], ["agent.logic"] + ALL_TOOLS),
+        "main": ([], ["main"]),
+        "main+all_tools": ([], ["main"] + ALL_TOOLS),
+        **{f"first_use:{name}": (["agent.logic"], [module]) for name, module in tool_modules.items()},
+    }
+
+
+def run_case(warm: list, timed: list, runs: int, env: dict) -> dict:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", CHILD, json.dumps([warm, timed])], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "import_ms": round(statistics.median(sample["import_ms"] for sample in samples), 1),
+        "rss_mb": round(statistics.median(sample["rss_mb"] for sample in samples), 1),
+        "tool_modules": samples[-1]["tool_modules"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per case; the median is kept")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    
+    env = dict(os.environ)
+    env.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+    
+    results = {}
+    print(f"{'case':<26} {'import ms':>10} {'peak RSS MB':>12}   tool modules loaded")
+    for name, (warm, timed) in cases().items():
+        numbers = run_case(warm, timed, args.runs, env)
+        print(f"{name:<26} {numbers['import_ms']:>10.1f} {numbers['rss_mb']:>12.1f}   "
+              f"{', '.join(module[len('tools.'):] for module in numbers['tool_modules']) or '-'}")
+        results[name] = {"import_ms": numbers["import_ms"], "rss_mb": numbers["rss_mb"]}
+    
+    report = make_report("import_time", {"runs": args.runs}, results)
+    if args.json:
+        write_report(args.json, report)
+    if args.compare and not print_comparison(load_report(args.compare), report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
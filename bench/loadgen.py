@@ -0,0 +1,184 @@
+"""
+Load generator for /ask with a configurable query mix and concurrency.
+
+Drives the app in-process through an ASGI client (default), a local
+uvicorn server it starts itself (--target uvicorn), or any running
+server (--url). Weather and Wikipedia calls go to local stub servers
+(except with --url, which uses whatever upstreams that server has).
+Reports throughput, p50/p95/p99 overall and per tool, errors and RSS.
+
+Usage: python bench/loadgen.py [--target asgi|uvicorn] [--mix calculator=4,wikipedia=2,weather=2,datetime=1]
+                               [--concurrency 1 16 64] [--requests 1000] [--json out.json] [--compare base.json]
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.multiworker import free_port, wait_ready, ROOT
+from bench.report import make_report, write_report, load_report, print_comparison, percentiles, rss_mb
+from bench.stubs import StubServer, point_tools_at
+
+CITIES = ["Paris", "London", "Tokyo", "New York", "Berlin", "Madrid", "Rome", "Cairo", "Lima", "Oslo"]
+TOPICS = ["Machine Learning", "Alan Turing", "Python programming", "Kubernetes", "Mercury", "Photosynthesis"]
+
+# Query templates per tool; {n}/{m} are random numbers
+TEMPLATES = {
+    "calculator": ["Calculate {n} + {m}", "what is {n} * ({m} + 3)", "compute {n} / {m}", "sum of {n}, {m} and 7"],
+    "weather": ["What is the weather in {city}?", "temperature in {city}", "weather {city}"],
+    "wikipedia": ["Tell me about {topic}", "Who is {topic}?", "wikipedia {topic}"],
+    "datetime": ["What is the current date?", "what time is it in Tokyo?", "10 days from 2024-01-01"],
+}
+
+
+def parse_mix(text: str) -> dict:
+    """
+    "calculator=4,weather=1" -> {"calculator": 4.0, "weather": 1.0}
+    """
+    mix = {}
+    for part in text.split(","):
+        tool, _, weight = part.partition("=")
+        if tool.strip() not in TEMPLATES:
+            raise SystemExit(f"unknown tool in --mix: {tool} (choose from {', '.join(TEMPLATES)})")
+        mix[tool.strip()] = float(weight or 1)
+    return mix
+
+
+def make_queries(mix: dict, count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    tools = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [rng.choice(TEMPLATES[tool]).format(n=rng.randint(1, 999), m=rng.randint(1, 999),
+                                               city=rng.choice(CITIES), topic=rng.choice(TOPICS))
+            for tool in tools]
+
+
+async def run_level(client, queries: list, concurrency: int) -> dict:
+    """
+    Closed loop: `concurrency` workers each send their next request as
+    soon as the previous one returns.
+    """
+    latencies, by_tool = [], {}
+    errors = rejected = 0
+    position = iter(range(len(queries)))
+    
+    async def worker():
+        nonlocal errors, rejected
+        for i in position:
+            start = time.perf_counter()
+            try:
+                response = await client.post("/ask", json={"query": queries[i], "user_id": f"load_{i % 100}"})
+                tool = response.json().get("tool_used", "error") if response.status_code == 200 else "error"
+                rejected += response.status_code in (429, 503)  # admission control, counted in errors too
+            except Exception:
+                tool = "error"
+            elapsed = time.perf_counter() - start
+            if tool == "error":
+                errors += 1
+            latencies.append(elapsed)
+            by_tool.setdefault(tool, []).append(elapsed)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    
+    overall = percentiles(latencies, scale=1000)
+    level = {
+        "throughput_rps": round(len(queries) / wall, 1),
+        "p50_ms": round(overall["p50"], 2),
+        "p95_ms": round(overall["p95"], 2),
+        "p99_ms": round(overall["p99"], 2),
+        "errors": errors,
+        "rejected": rejected
+    }
+    tools = {}
+    for tool, values in sorted(by_tool.items()):
+        numbers = percentiles(values, scale=1000)
+        tools[tool] = {"requests": len(values), "p50_ms": round(numbers["p50"], 2), "p99_ms": round(numbers["p99"], 2)}
+    return level, tools
+
+
+async def drive(args, queries: list, base_url: str, transport=None, server_pid: int = None) -> dict:
+    import httpx
+    
+    results = {}
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        await run_level(client, queries[:min(len(queries), 50)], 4)  # warm-up: imports, pools, caches
+        for concurrency in args.concurrency:
+            level, tools = await run_level(client, queries, concurrency)
+            level["rss_mb"] = round(rss_mb(server_pid), 1) if server_pid or transport else None
+            results[f"c{concurrency}"] = level
+            print(f"concurrency={concurrency:>4}  {level['throughput_rps']:>9} req/s  p50={level['p50_ms']:>8} ms  "
+                  f"p95={level['p95_ms']:>8} ms  p99={level['p99_ms']:>8} ms  errors={level['errors']} (rejected {level['rejected']})  rss={level['rss_mb']} MB")
+            for tool, numbers in tools.items():
+                results[f"c{concurrency}/{tool}"] = numbers
+                print(f"    {tool:<12} n={numbers['requests']:<6} p50={numbers['p50_ms']:>8} ms  p99={numbers['p99_ms']:>8} ms")
+    
+    if transport is not None:
+        from tools.http_client import close_client
+        await close_client()
+    return results
+
+
+def start_uvicorn(stub: StubServer) -> tuple:
+    port = free_port()
+    env = {**os.environ,
+           "OPENWEATHER_URL": f"{stub.url}/data/2.5/weather",
+           "WIKIPEDIA_API_URL": f"{stub.url}/w/api.php",
+           "OPENWEATHER_API_KEY": os.environ.get("OPENWEATHER_API_KEY", "bench-key")}
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_ready(port)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--url", help="load an already running server instead")
+    parser.add_argument("--mix", default="calculator=4,wikipedia=2,weather=2,datetime=1", help="tool=weight,...")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--delay", type=float, default=0.05, help="stub upstream latency in seconds")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+    
+    queries = make_queries(parse_mix(args.mix), args.requests)
+    os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+    
+    if args.url:
+        results = asyncio.run(drive(args, queries, args.url))
+    else:
+        with StubServer(delay=args.delay) as stub:
+            if args.target == "asgi":
+                import httpx
+                point_tools_at(stub)
+                import main as api
+                results = asyncio.run(drive(args, queries, "http://bench", transport=httpx.ASGITransport(app=api.app)))
+            else:
+                server, url = start_uvicorn(stub)
+                try:
+                    results = asyncio.run(drive(args, queries, url, server_pid=server.pid))
+                finally:
+                    server.terminate()
+                    server.wait()
+    
+    settings = {key: getattr(args, key) for key in ("target", "url", "mix", "requests", "concurrency", "delay")}
+    report = make_report("loadgen", settings, results)
+    if args.json:
+        write_report(args.json, report)
+    if args.compare and not print_comparison(load_report(args.compare), report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Bytes per stored interaction: legacy dict records vs compact Interaction records.
+
+Each stored turn gets freshly built response objects (as process_query
+produces them), and tracemalloc measures what the memory store retains.
+
+Usage: python bench/memory_footprint.py [--interactions 30000]
+"""
+import argparse
+import sys
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.memory import ConversationMemory
+
+SUMMARY = ("Machine learning is a field of study in artificial intelligence concerned with the development "
+           "and study of statistical algorithms that can learn from data and generalize to unseen data, and "
+           "thus perform tasks without explicit instructions. Within a subdiscipline in machine learning, "
+           "advances in the field of deep learning have allowed neural networks to surpass many previous "
+           "approaches in performance. ML finds application in many fields, including natural language "
+           "processing, computer vision, speech recognition, email filtering, agriculture, and medicine. ")
+
+
+def make_response(i: int) -> tuple:
+    kind = i % 3
+    if kind == 0:
+        query = f"Calculate {i} + 17"
+        return query, {"query": query, "tool_used": "calculator", "params": {"expression": f"{i} + 17"},
+                       "result": {"success": True, "result": i + 17, "expression": f"{i} + 17"}}
+    if kind == 1:
+        query = f"What is the weather in City{i}?"
+        return query, {"query": query, "tool_used": "weather", "params": {"city": f"city{i}"},
+                       "result": {"success": True, "city": f"City{i}", "country": "XX", "temperature": 18.5,
+                                  "description": "clear sky", "humidity": 60, "wind_speed": 3.2}}
+    query = f"Tell me about topic {i}"
+    return query, {"query": query, "tool_used": "wikipedia", "params": {"query": f"topic {i}"},
+                   "result": {"success": True, "title": f"Topic {i}", "summary": f"{i} " + SUMMARY * 2,
+                              "url": f"https://en.wikipedia.org/wiki/Topic_{i}"}}
+
+
+class LegacyMemory:
+    """
+    The previous ConversationMemory: one dict per turn with an ISO
+    timestamp string and the full response (including the query again).
+    """
+    def __init__(self, max_history: int = 3):
+        self.conversations = {}
+        self.max_history = max_history
+    
+    def add_interaction(self, user_id: str, query: str, response: dict):
+        if user_id not in self.conversations:
+            self.conversations[user_id] = deque(maxlen=self.max_history)
+        self.conversations[user_id].append({
+            'timestamp': datetime.now().isoformat(),
+            'query': query,
+            'response': response
+        })
+
+
+def measure(store, interactions: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(interactions):
+        query, response = make_response(i)
+        store.add_interaction(f"user_{i // 3}", query, response)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained / interactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interactions", type=int, default=30000)
+    args = parser.parse_args()
+    
+    stores = [
+        ("legacy dict records", LegacyMemory()),
+        ("compact records", ConversationMemory(max_users=args.interactions)),
+        ("compact + zlib >= 256B", ConversationMemory(max_users=args.interactions, compress_min_bytes=256)),
+    ]
+    baseline = None
+    for name, store in stores:
+        per_item = measure(store, args.interactions)
+        baseline = baseline or per_item
+        print(f"{name:<24} {per_item:8.0f} bytes/interaction  ({per_item / baseline * 100:5.1f}% of legacy)")
+
+
+if __name__ == "__main__":
+    main()
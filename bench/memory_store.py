@@ -0,0 +1,96 @@
+"""
+Conversation memory benchmark: footprint and ops/sec per backend.
+
+Fills each store with one interaction per user for --users distinct
+users, then measures add_interaction and get_history throughput and
+the resident-set growth (plus database size for SQLite).
+
+Usage: python bench/memory_store.py [--users 1000000] [--backends memory sqlite]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.memory import ConversationMemory, SQLiteMemory
+
+RESPONSE = {
+    "query": "Calculate 25 + 17",
+    "tool_used": "calculator",
+    "params": {"expression": "25 + 17"},
+    "result": {"success": True, "result": 42, "expression": "25 + 17"}
+}
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def build(backend: str, users: int, ops: int, directory: str):
+    if backend == "memory":
+        return ConversationMemory(max_history=3, max_users=users)
+    # Writes are queued for a writer thread; size the queue so none are dropped
+    return SQLiteMemory(Path(directory) / "memory.db", max_history=3, max_users=users, write_queue_size=users + ops)
+
+
+def run(backend: str, users: int, ops: int, directory: str) -> dict:
+    rss_before = rss_bytes()
+    store = build(backend, users, ops, directory)
+    
+    # Fill: one interaction per user, in batches like /ask/batch
+    start = time.perf_counter()
+    batch = 1000
+    for offset in range(0, users, batch):
+        store.add_interactions([(f"user_{i}", "Calculate 25 + 17", RESPONSE) for i in range(offset, min(users, offset + batch))])
+    store.flush()
+    fill = time.perf_counter() - start
+    rss_after = rss_bytes()
+    
+    rng = random.Random(1)
+    ids = [f"user_{rng.randrange(users)}" for _ in range(ops)]
+    
+    start = time.perf_counter()
+    for user_id in ids:
+        store.add_interaction(user_id, "Calculate 25 + 17", RESPONSE)
+    store.flush()
+    add_rate = ops / (time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    for user_id in ids:
+        store.get_history(user_id)
+    get_rate = ops / (time.perf_counter() - start)
+    
+    result = {
+        "backend": backend,
+        "users": store.user_count(),
+        "fill_seconds": round(fill, 2),
+        "rss_mb": round((rss_after - rss_before) / 2**20, 1),
+        "add_ops_per_sec": round(add_rate),
+        "get_ops_per_sec": round(get_rate)
+    }
+    store.close()
+    if backend == "sqlite":
+        result["db_mb"] = round(sum(f.stat().st_size for f in Path(directory).glob("memory.db*")) / 2**20, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    args = parser.parse_args()
+    
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory(prefix="bench-memory-") as directory:
+            print(run(backend, args.users, args.ops, directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Per-request Prometheus overhead: labels() lookups vs pre-bound children.
+
+Runs the metric updates one successful /ask makes (request count, tool
+usage, success, latency, outcome, active users) three ways:
+"labels" calls labels() per update and sets the active-users gauge
+every request, as /ask did before; "bound" uses the monitoring.metrics
+helpers (pre-bound children, gauge computed at collect time);
+"aggregated" is "bound" with monitoring.metrics.aggregate on, timed
+with and without the final flush.
+
+Usage: python bench/metrics_overhead.py [--requests 200000] [--json out.json] [--compare base.json]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.memory import ConversationMemory
+from bench.report import make_report, write_report, load_report, print_comparison
+from monitoring import metrics
+
+TOOLS = ["calculator", "weather", "wikipedia", "datetime"]
+
+
+def labels_request(memory, i: int):
+    tool = TOOLS[i % 4]
+    metrics.request_count.labels(endpoint="/ask", method="POST").inc()
+    metrics.tool_usage.labels(tool_name=tool).inc()
+    metrics.successful_requests.labels(tool_name=tool).inc()
+    metrics.request_latency.labels(endpoint="/ask", tool=tool).observe(0.004)
+    metrics.requests_processed.labels(outcome='success').inc()
+    metrics.update_active_users(memory.user_count())
+
+
+def bound_request(memory, i: int):
+    tool = TOOLS[i % 4]
+    metrics.count_request("/ask")
+    metrics.track_tool_usage(tool, True)
+    metrics.track_request_latency("/ask", tool, 0.004)
+    metrics.track_request_outcome(successful=1)
+    metrics.refresh_active_users()
+
+
+def per_request_us(fn, memory, requests: int, flush: bool = False) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        fn(memory, i)
+    if flush:
+        metrics.flush_metrics()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def best_of(repeat: int, *args, **kwargs) -> float:
+    return min(per_request_us(*args, **kwargs) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=10000, help="users held in memory")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is kept")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    
+    memory = ConversationMemory(max_history=3, max_users=args.users)
+    memory.add_interactions([(f"user_{i}", "q", {"tool_used": "calculator", "result": {}}) for i in range(args.users)])
+    metrics.watch_active_users(memory.user_count)
+    
+    timings = {
+        "labels": best_of(args.repeat, labels_request, memory, args.requests),
+        "bound": best_of(args.repeat, bound_request, memory, args.requests),
+    }
+    # Flushes only when asked, so the hot path is timed on its own
+    metrics.aggregator = metrics.MetricAggregator(flush_interval_seconds=3600)
+    try:
+        timings["aggregated"] = best_of(args.repeat, bound_request, memory, args.requests)
+        timings["aggregated_with_flush"] = best_of(args.repeat, bound_request, memory, args.requests, flush=True)
+    finally:
+        metrics.aggregator.stop()
+        metrics.aggregator = None
+    
+    baseline = timings["labels"]
+    print(f"{args.requests} simulated /ask requests, {len(TOOLS)} tools")
+    for name, micros in timings.items():
+        print(f"    {name:<24} {micros:7.2f} us/request  ({baseline / micros:4.1f}x)")
+    
+    results = {name: {"per_request_us": round(micros, 3)} for name, micros in timings.items()}
+    report = make_report("metrics_overhead", {"requests": args.requests, "users": args.users}, results)
+    if args.json:
+        write_report(args.json, report)
+    if args.compare and not print_comparison(load_report(args.compare), report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
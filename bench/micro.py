@@ -0,0 +1,121 @@
+"""
+Microbenchmarks for the per-request hot path.
+
+Times decide_tool, extract_params, calculate, ConversationMemory and
+the Prometheus metric helpers in-process. Latencies are per operation,
+measured over batches of --batch calls, so percentiles describe batch
+means rather than single calls. Each case runs --repeat times and the
+fastest run is kept, which filters out most scheduler noise.
+
+Usage: python bench/micro.py [--ops 20000] [--only calculate memory] [--json out.json] [--compare base.json]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.report import make_report, write_report, load_report, print_comparison, percentiles, rss_mb
+
+QUERIES = [
+    "Calculate 25 + 17",
+    "What is the weather in Paris?",
+    "Tell me about Machine Learning",
+    "What is the current date?",
+    "how many days from 2024-01-01 to 2024-03-01",
+    "what is 2 * (3 + 4)",
+    "Who is Alan Turing?",
+    "Hello, how are you?",
+]
+
+EXPRESSIONS = ["25 + 17", "2 ** 10", "(1 + 2) * 3 - 4 / 5", "sqrt(16) + sum(1, 2, 3)"]
+
+RESPONSE = {
+    "query": "Calculate 25 + 17",
+    "tool_used": "calculator",
+    "params": {"expression": "25 + 17"},
+    "result": {"success": True, "result": 42, "expression": "25 + 17"}
+}
+
+
+def cases() -> dict:
+    """
+    Case name -> function(i) running one operation.
+    """
+    from agent.logic import decide_tool, extract_params
+    from agent.memory import ConversationMemory
+    from agent.router import router
+    from tools.calculator import calculate
+    from monitoring.metrics import track_tool_usage, track_request_outcome, track_cache_lookup
+    
+    routed = [(query, *router.route(query)) for query in QUERIES]
+    memory = ConversationMemory(max_history=3, max_users=100000)
+    tools = ["calculator", "weather", "wikipedia", "datetime"]
+    
+    return {
+        "decide_tool": lambda i: decide_tool(QUERIES[i % len(QUERIES)]),
+        "extract_params": lambda i: extract_params(*routed[i % len(routed)]),
+        "calculate_cached": lambda i: calculate(EXPRESSIONS[i % len(EXPRESSIONS)]),
+        "calculate_uncached": lambda i: calculate(f"{i} * ({i % 97} + 3) - 1"),
+        "memory_add": lambda i: memory.add_interaction(f"user_{i % 5000}", "Calculate 25 + 17", RESPONSE),
+        "memory_get": lambda i: memory.get_history(f"user_{i % 5000}"),
+        "metrics_tool_usage": lambda i: track_tool_usage(tools[i % 4], i % 7 != 0),
+        "metrics_request_outcome": lambda i: track_request_outcome(successful=1),
+        "metrics_cache_lookup": lambda i: track_cache_lookup(tools[i % 4], hit=i % 2 == 0),
+    }
+
+
+def measure(fn, ops: int, batch: int) -> dict:
+    for i in range(min(ops, 1000)):  # warm-up
+        fn(i)
+    
+    samples = []
+    start = time.perf_counter()
+    for offset in range(0, ops, batch):
+        batch_start = time.perf_counter()
+        for i in range(offset, min(ops, offset + batch)):
+            fn(i)
+        samples.append((time.perf_counter() - batch_start) / (min(ops, offset + batch) - offset))
+    elapsed = time.perf_counter() - start
+    
+    latency = percentiles(samples, scale=1e6)
+    return {
+        "p50_us": round(latency["p50"], 3),
+        "p95_us": round(latency["p95"], 3),
+        "p99_us": round(latency["p99"], 3),
+        "ops_per_s": round(ops / elapsed, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=20000, help="operations per case")
+    parser.add_argument("--batch", type=int, default=100, help="operations per latency sample")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is reported")
+    parser.add_argument("--only", nargs="+", default=[], help="run cases whose name contains any of these")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+    
+    results = {}
+    for name, fn in cases().items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results[name] = max((measure(fn, args.ops, args.batch) for _ in range(args.repeat)), key=lambda run: run["ops_per_s"])
+        numbers = results[name]
+        print(f"{name:<24} p50={numbers['p50_us']:9.2f} us  p95={numbers['p95_us']:9.2f} us  "
+              f"p99={numbers['p99_us']:9.2f} us  {numbers['ops_per_s']:>12,.0f} ops/s")
+    results["process"] = {"rss_mb": round(rss_mb(), 1)}
+    print(f"rss={results['process']['rss_mb']} MB")
+    
+    report = make_report("micro", {"ops": args.ops, "batch": args.batch, "repeat": args.repeat}, results)
+    if args.json:
+        write_report(args.json, report)
+    if args.compare and not print_comparison(load_report(args.compare), report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+/ask latency with MLflow logging inline vs in the background.
+
+A local stand-in tracking server answers MLflow REST calls after an
+artificial delay. Three modes are compared on calculator queries:
+no tracking, the legacy three synchronous log_metric calls per request,
+and the background BackgroundMetricLogger queue. Every query comes from
+its own user so the per-user rate limit admits all of them, and the
+metrics the tracking server receives are checked before the comparison.
+
+Usage: python bench/mlflow_logging.py [--delay 0.05] [--requests 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.stubs import StubServer
+
+RUN_ID = "bench-run"
+METRICS_PER_REQUEST = 3  # request_latency, total_requests, success_rate
+
+
+class TrackingStub(StubServer):
+    """
+    Stand-in tracking server that counts the metrics it is sent.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = 0
+    
+    def handle_body(self, path: str, params: dict, body: bytes):
+        payload = json.loads(body)
+        with self._lock:
+            if path.endswith("/runs/log-metric"):
+                self.metrics += 1
+            elif path.endswith("/runs/log-batch"):
+                self.metrics += len(payload.get("metrics", []))
+        return 200, {}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def drive(client, total: int, mode: str) -> list:
+    latencies = []
+    for i in range(total):
+        start = time.perf_counter()
+        response = await client.post("/ask", json={"query": f"Calculate {i} + 1", "user_id": f"{mode}-user-{i}"})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, f"request {i}: HTTP {response.status_code}"
+    return latencies
+
+
+async def main(args):
+    import httpx
+    import main as api
+    from mlflow.tracking import MlflowClient
+    from monitoring.experiment import BackgroundMetricLogger, experiment_tracker
+    
+    with TrackingStub(delay=args.delay) as tracking_server:
+        mlflow_client = MlflowClient(tracking_uri=tracking_server.url)
+        original_log_request = experiment_tracker.log_request
+        
+        def legacy_log_request(tool_name, success, latency):
+            # What /ask used to do: three blocking calls per request
+            step = experiment_tracker.run_metrics["total_requests"] + 1
+            original_log_request(tool_name, success, latency)
+            mlflow_client.log_metric(RUN_ID, "request_latency", latency, step=step)
+            mlflow_client.log_metric(RUN_ID, "total_requests", step, step=step)
+            mlflow_client.log_metric(RUN_ID, "success_rate", 100.0, step=step)
+        
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            modes = [("no tracking", None), ("inline (legacy)", "legacy"), ("background queue", "background")]
+            results = []
+            for name, mode in modes:
+                experiment_tracker.log_request = original_log_request
+                experiment_tracker.metric_logger = None
+                if mode == "legacy":
+                    experiment_tracker.log_request = legacy_log_request
+                elif mode == "background":
+                    experiment_tracker.metric_logger = BackgroundMetricLogger(RUN_ID, client=mlflow_client).start()
+                
+                hits_before, metrics_before = tracking_server.hits, tracking_server.metrics
+                latencies = await drive(client, args.requests, mode or "untracked")
+                
+                if experiment_tracker.metric_logger is not None:
+                    experiment_tracker.metric_logger.stop()
+                    assert experiment_tracker.metric_logger.dropped == 0, "background logger dropped metrics"
+                
+                calls = tracking_server.hits - hits_before
+                expected = 0 if mode is None else args.requests * METRICS_PER_REQUEST
+                assert tracking_server.metrics - metrics_before == expected, \
+                    f"{name}: tracking server got {tracking_server.metrics - metrics_before} metrics, expected {expected}"
+                if mode == "legacy":
+                    assert calls == args.requests * METRICS_PER_REQUEST, f"{name}: {calls} tracking calls"
+                results.append((name, latencies, calls))
+            
+            for name, latencies, calls in results:
+                print(f"{name:<18} p50={statistics.median(latencies) * 1000:8.2f} ms  "
+                      f"p99={percentile(latencies, 99) * 1000:8.2f} ms  "
+                      f"tracking calls={calls}")
+        
+        experiment_tracker.log_request = original_log_request
+        experiment_tracker.metric_logger = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.05, help="tracking server latency in seconds")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    
+    os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+    asyncio.run(main(args))
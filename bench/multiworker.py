@@ -0,0 +1,113 @@
+"""
+Multi-worker throughput: /ask req/s as the uvicorn worker count grows.
+
+Starts `python main.py` with API_WORKERS set to each requested count,
+drives calculator queries from several client processes (so the load
+generator is not the bottleneck), then checks that /stats adds up
+across workers.
+
+Usage: python bench/multiworker.py [--workers 1 2 4] [--clients 4] [--seconds 10]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+BODY = json.dumps({"query": "Calculate 25 * 4 + 17", "user_id": "bench"})
+HEADERS = {"Content-Type": "application/json"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def client_loop(port: int, seconds: float, results):
+    # Keep-alive connection per client process
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = rejected = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        conn.request("POST", "/ask", body=BODY, headers=HEADERS)
+        response = conn.getresponse()
+        response.read()
+        if response.status == 200:
+            done += 1
+        elif response.status in (429, 503):
+            rejected += 1
+    conn.close()
+    results.put((done, rejected))
+
+
+def run(workers: int, clients: int, seconds: float) -> dict:
+    port = free_port()
+    env = {**os.environ, "API_WORKERS": str(workers), "API_PORT": str(port),
+           "MLFLOW_TRACKING_URI": os.environ.get("MLFLOW_TRACKING_URI", "http://127.0.0.1:9")}
+    server = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client_loop, args=(port, seconds, results)) for _ in range(clients)]
+        start = time.perf_counter()
+        for proc in procs:
+            proc.start()
+        counts = [results.get() for _ in procs]
+        total = sum(done for done, _ in counts)
+        for proc in procs:
+            proc.join()
+        wall = time.perf_counter() - start
+        
+        stats = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=5).read())
+        return {
+            "workers": workers,
+            "requests": total,
+            "rejected": sum(rejected for _, rejected in counts),
+            "throughput_rps": round(total / wall, 1),
+            "stats_total": stats["total_requests"],
+            "stats_consistent": stats["total_requests"] == total,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    
+    print(f"cpu cores: {os.cpu_count()}")
+    baseline = None
+    for workers in args.workers:
+        result = run(workers, args.clients, args.seconds)
+        baseline = baseline or result["throughput_rps"]
+        result["speedup"] = round(result["throughput_rps"] / baseline, 2)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Replay a captured request log against the API and diff against another build.
+
+Reads request log files (data/requests.jsonl and its rotations, in any
+order), re-sends each query to /ask at the original pace, a multiple of
+it (--speed 10) or as fast as possible (--speed 0), and records latency
+and routing (tool + params) per query. Upstreams are local stubs unless
+--url points at a running server.
+
+--compare takes an earlier replay report (--json) or the captured log
+itself, and reports routing changes and latency shifts per tool.
+
+Usage: python bench/replay.py LOG [LOG ...] [--speed 1] [--limit N] [--json out.json] [--compare base.json|LOG]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.report import make_report, write_report, print_comparison, percentiles
+from bench.stubs import StubServer, point_tools_at
+
+
+def read_log(paths: list, limit: int = None) -> list:
+    """
+    Records from one or more log files, oldest first.
+    """
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+async def replay(client, records: list, speed: float, max_inflight: int) -> list:
+    """
+    Open loop: each query is sent at its original offset / speed, however
+    slow earlier answers are (at most `max_inflight` outstanding).
+    """
+    semaphore = asyncio.Semaphore(max_inflight)
+    observed = [None] * len(records)
+    first_ts = records[0]["ts"] if records else 0
+    start = time.perf_counter()
+    
+    async def send(index: int, record: dict):
+        async with semaphore:
+            sent = time.perf_counter()
+            try:
+                response = await client.post("/ask", json={"query": record["query"], "user_id": record.get("user_id", "replay")})
+                body = response.json() if response.status_code == 200 else {}
+            except Exception:
+                body = {}
+            observed[index] = {
+                "query": record["query"],
+                "tool": body.get("tool_used", "error"),
+                "params": body.get("params"),
+                "success": body.get("result", {}).get("success", False),
+                "latency_ms": round((time.perf_counter() - sent) * 1000, 3)
+            }
+    
+    tasks = []
+    for index, record in enumerate(records):
+        if speed > 0:
+            delay = (record["ts"] - first_ts) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(index, record)))
+    await asyncio.gather(*tasks)
+    return observed
+
+
+def summarize(observed: list, wall: float = None) -> dict:
+    """
+    Latency percentiles overall and per tool, in report format.
+    """
+    results = {}
+    groups = {"all": observed}
+    for item in observed:
+        groups.setdefault(item["tool"], []).append(item)
+    for name, items in groups.items():
+        latency = percentiles([item["latency_ms"] for item in items])
+        results[name] = {
+            "requests": len(items),
+            "p50_ms": round(latency["p50"], 3),
+            "p95_ms": round(latency["p95"], 3),
+            "p99_ms": round(latency["p99"], 3),
+            "success_rate": round(sum(item["success"] for item in items) / len(items), 4)
+        }
+    if wall:
+        results["all"]["throughput_rps"] = round(len(observed) / wall, 1)
+    return results
+
+
+def load_baseline(path: str) -> dict:
+    """
+    A replay report, or a captured request log turned into one.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        report = json.loads(text)
+        if isinstance(report, dict) and "decisions" in report:
+            return report
+    except json.JSONDecodeError:
+        pass
+    
+    records = read_log([path])
+    decisions = [{"query": record["query"], "tool": record["tool"], "params": record.get("params"),
+                  "success": record.get("success", False), "latency_ms": record.get("latency_ms", 0.0)}
+                 for record in records]
+    return make_report("replay", {"source": path}, summarize(decisions)) | {"decisions": decisions}
+
+
+def routing_changes(baseline: list, current: list) -> list:
+    """
+    Queries (matched in order of appearance) whose tool or params changed.
+    """
+    remaining = {}
+    for item in baseline:
+        remaining.setdefault(item["query"], []).append(item)
+    changes = []
+    for item in current:
+        candidates = remaining.get(item["query"])
+        if not candidates:
+            continue
+        before = candidates.pop(0)
+        if (before["tool"], before.get("params")) != (item["tool"], item.get("params")):
+            changes.append((item["query"], before["tool"], before.get("params"), item["tool"], item.get("params")))
+    return changes
+
+
+def print_diff(baseline: dict, current: dict, threshold: float, examples: int = 10) -> bool:
+    changes = routing_changes(baseline["decisions"], current["decisions"])
+    print(f"routing: {len(changes)} of {len(current['decisions'])} queries changed tool or params")
+    for query, old_tool, old_params, new_tool, new_params in changes[:examples]:
+        print(f"    {query[:60]!r}: {old_tool} {old_params} -> {new_tool} {new_params}")
+    
+    print("latency per tool (baseline -> current, p50 / p99 ms)")
+    for name, numbers in current["results"].items():
+        before = baseline["results"].get(name)
+        if before:
+            print(f"    {name:<12} p50 {before['p50_ms']:8.2f} -> {numbers['p50_ms']:8.2f}   "
+                  f"p99 {before['p99_ms']:8.2f} -> {numbers['p99_ms']:8.2f}")
+    return print_comparison(baseline, current, threshold) and not changes
+
+
+async def run(args, records: list, base_url: str, transport=None) -> tuple:
+    import httpx
+    
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        observed = await replay(client, records, args.speed, args.max_inflight)
+        wall = time.perf_counter() - start
+    if transport is not None:
+        from tools.http_client import close_client
+        await close_client()
+    return observed, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="request log files (rotated files included)")
+    parser.add_argument("--speed", type=float, default=1.0, help="pace multiplier; 0 sends as fast as possible")
+    parser.add_argument("--limit", type=int, help="replay only the first N records")
+    parser.add_argument("--max-inflight", type=int, default=256)
+    parser.add_argument("--url", help="replay against a running server instead of the in-process app")
+    parser.add_argument("--delay", type=float, default=0.05, help="stub upstream latency in seconds")
+    parser.add_argument("--json", help="write the replay report to this file")
+    parser.add_argument("--compare", help="earlier replay report, or a captured log, to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed latency regression as a fraction")
+    args = parser.parse_args()
+    
+    records = read_log(args.logs, args.limit)
+    if not records:
+        sys.exit("no records to replay")
+    span = records[-1]["ts"] - records[0]["ts"]
+    print(f"replaying {len(records)} queries spanning {span:.1f}s at "
+          f"{'full speed' if args.speed <= 0 else f'{args.speed:g}x'}")
+    
+    os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+    if args.url:
+        observed, wall = asyncio.run(run(args, records, args.url))
+    else:
+        with StubServer(delay=args.delay) as stub:
+            point_tools_at(stub)
+            import httpx
+            import main as api
+            api.request_log = None  # never append replayed queries to the log being replayed
+            observed, wall = asyncio.run(run(args, records, "http://replay", transport=httpx.ASGITransport(app=api.app)))
+    
+    results = summarize(observed, wall)
+    print(f"{len(observed)} queries in {wall:.1f}s ({results['all']['throughput_rps']} req/s)")
+    for name, numbers in results.items():
+        print(f"    {name:<12} n={numbers['requests']:<6} p50={numbers['p50_ms']:8.2f} ms  p95={numbers['p95_ms']:8.2f} ms  "
+              f"p99={numbers['p99_ms']:8.2f} ms  success={numbers['success_rate']:.1%}")
+    
+    settings = {"logs": args.logs, "speed": args.speed, "limit": args.limit, "url": args.url, "delay": args.delay}
+    report = make_report("replay", settings, results) | {"decisions": observed}
+    if args.json:
+        write_report(args.json, report)
+    if args.compare and not print_diff(load_baseline(args.compare), report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark reports: percentiles, RSS, JSON output and run-to-run comparison.
+
+bench/micro.py and bench/loadgen.py write reports with --json and check
+them against an earlier run with --compare. Two saved reports can also
+be compared directly; the exit status is 1 when anything regressed.
+
+Usage: python bench/report.py BASELINE.json CURRENT.json [--threshold 0.10]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+# Metric name suffixes and whether a larger value is better
+HIGHER_IS_BETTER = ("_per_s", "_rps")
+LOWER_IS_BETTER = ("_ms", "_us", "_mb")
+
+
+def percentiles(samples: list, scale: float = 1.0) -> dict:
+    """
+    p50/p95/p99/mean of samples (seconds), multiplied by `scale`.
+    """
+    ordered = sorted(samples)
+    
+    def pick(pct):
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] * scale
+    
+    return {
+        "p50": pick(50),
+        "p95": pick(95),
+        "p99": pick(99),
+        "mean": sum(ordered) / len(ordered) * scale
+    }
+
+
+def rss_mb(pid: int = None) -> float:
+    """
+    Resident set size of a process (this one by default), in MiB.
+    """
+    with open(f"/proc/{pid or 'self'}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def make_report(benchmark: str, settings: dict, results: dict) -> dict:
+    return {
+        "benchmark": benchmark,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "settings": settings,
+        "results": results
+    }
+
+
+def write_report(path: str, report: dict):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10) -> list:
+    """
+    Every metric present in both reports that moved the wrong way by
+    more than `threshold` (a fraction), as (case, metric, old, new, change).
+    """
+    regressions = []
+    for case, metrics in current["results"].items():
+        old_metrics = baseline["results"].get(case, {})
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old <= 0:
+                continue
+            change = (new - old) / old
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = -change
+            elif not metric.endswith(LOWER_IS_BETTER):
+                continue
+            if change > threshold:
+                regressions.append((case, metric, old, new, change))
+    return regressions
+
+
+def print_comparison(baseline: dict, current: dict, threshold: float = 0.10) -> bool:
+    """
+    Print regressions against a baseline report; True if there were none.
+    """
+    regressions = compare(baseline, current, threshold)
+    print(f"compared with baseline from {baseline.get('timestamp', '?')} (threshold {threshold:.0%})")
+    if baseline.get("settings") != current.get("settings"):
+        print(f"    note: settings differ, baseline {baseline.get('settings')} vs {current.get('settings')}")
+    for case, metric, old, new, change in regressions:
+        print(f"    REGRESSION {case} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%} worse)")
+    if not regressions:
+        print("    no regressions")
+    return not regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+    
+    ok = print_comparison(load_report(args.baseline), load_report(args.current), args.threshold)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
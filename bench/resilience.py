@@ -0,0 +1,132 @@
+"""
+Weather outage drill against a fault-injecting stub upstream.
+
+Drives weather queries through process_query while the stub goes
+healthy -> failing (HTTP 503 or hanging) -> healthy, and reports per
+phase: success rate, stale answers, latency and upstream calls. Runs
+once with the resilience layer and once with it disabled.
+
+Usage: python bench/resilience.py [--fault error|hang] [--phase-seconds 3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.stubs import StubServer, point_tools_at
+
+CITIES = ["Paris", "London", "Tokyo", "Lima", "Oslo"]
+
+
+class FaultyStub(StubServer):
+    """
+    Stub upstream whose weather endpoints (single city and group) can be
+    switched between healthy, failing with 503 and hanging for
+    `hang_seconds`.
+    """
+    def __init__(self, hang_seconds: float = 5.0):
+        super().__init__()
+        self.mode = "healthy"
+        self.hang_seconds = hang_seconds
+    
+    def handle(self, path: str, params: dict):
+        weather = path.endswith(("/weather", "/group"))
+        if weather and self.mode == "error":
+            return 503, {"cod": 503, "message": "service unavailable"}
+        if weather and self.mode == "hang":
+            time.sleep(self.hang_seconds)
+        return super().handle(path, params)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_phase(stub, mode: str, seconds: float, concurrency: int) -> dict:
+    from agent.admission import RateLimited
+    from agent.logic import process_query
+    
+    stub.mode = mode
+    hits_before = stub.hits
+    latencies, outcomes = [], {"ok": 0, "stale": 0, "failed": 0, "shed": 0}
+    deadline = time.monotonic() + seconds
+    
+    async def worker(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                result = (await process_query(f"What is the weather in {CITIES[i % len(CITIES)]}"))["result"]
+                outcome = "stale" if result.get("stale") else "ok" if result.get("success") else "failed"
+            except RateLimited:
+                outcome = "shed"  # over the weather admission limit, nothing stale to serve
+            latencies.append(time.perf_counter() - start)
+            outcomes[outcome] += 1
+            i += concurrency
+            await asyncio.sleep(0.01)
+    
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    total = len(latencies)
+    return {
+        "phase": mode,
+        "requests": total,
+        "ok_pct": round(outcomes["ok"] / total * 100, 1),
+        "stale_pct": round(outcomes["stale"] / total * 100, 1),
+        "failed_pct": round(outcomes["failed"] / total * 100, 1),
+        "shed_pct": round(outcomes["shed"] / total * 100, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "upstream_calls": stub.hits - hits_before,
+    }
+
+
+async def drill(stub, args, guarded: bool):
+    from agent import logic
+    from agent.cache import build_result_cache
+    from agent.resilience import build_tool_guards
+    from config.settings import settings
+    from tools.http_client import close_client
+    
+    # Fresh cache (on even where performance.cache_enabled is off: the drill
+    # measures stale serving) and breakers; short TTL and reset so it fits in seconds
+    logic.result_cache = build_result_cache({**settings.get("performance", {}), "cache_enabled": True})
+    logic.result_cache.ttl_seconds["weather"] = args.ttl
+    logic.tool_guards.clear()
+    if guarded:
+        logic.tool_guards.update(build_tool_guards({
+            "timeout_seconds": args.timeout,
+            "max_retries": 3,
+            "resilience": {"reset_seconds": args.reset, "tools": {"weather": None}}
+        }))
+    
+    print("with resilience" if guarded else "without resilience")
+    for mode in ("healthy", args.fault, "healthy"):
+        result = await run_phase(stub, mode, args.phase_seconds, args.concurrency)
+        print("   " + "  ".join(f"{key}={value}" for key, value in result.items()))
+    await close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fault", choices=["error", "hang"], default="error")
+    parser.add_argument("--phase-seconds", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-call deadline when guarded")
+    parser.add_argument("--reset", type=float, default=1.0, help="breaker reset seconds")
+    parser.add_argument("--ttl", type=float, default=0.5, help="weather cache TTL seconds")
+    args = parser.parse_args()
+    
+    os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}")
+    
+    with FaultyStub(hang_seconds=5.0) as stub:
+        point_tools_at(stub)
+        asyncio.run(drill(stub, args, guarded=False))
+        asyncio.run(drill(stub, args, guarded=True))
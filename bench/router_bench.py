@@ -0,0 +1,154 @@
+"""
+Router microbenchmark: compiled single-pass router vs the legacy keyword scans.
+
+Generates a large query corpus, times decide_tool + extract_params for
+both implementations and reports how often their tool choices agree.
+
+Usage: python bench/router_bench.py [--queries 200000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.router import IntentRouter, router, remove_spans
+from config.settings import settings
+
+TEMPLATES = [
+    "Calculate {n} + {m}",
+    "what is {n} * {m}",
+    "compute {n} / {m}",
+    "What is the weather in {city}?",
+    "temperature in {city}",
+    "forecast for {city} tomorrow",
+    "Tell me about {topic}",
+    "who is {person}",
+    "wikipedia {topic}",
+    "information about {topic}",
+    "What is the current date?",
+    "what day is it today",
+    "difference between 2024-01-01 and 2024-12-31",
+    "Hello, how are you?",
+    "please give me a long answer about {topic} and its history in {city}",
+]
+CITIES = ["Paris", "London", "New York", "Tokyo", "Casablanca", "Rabat"]
+TOPICS = ["machine learning", "python programming", "the roman empire", "quantum physics"]
+PEOPLE = ["Alan Turing", "Ada Lovelace", "Marie Curie"]
+
+
+def legacy_decide_tool(query: str) -> str:
+    query_lower = query.lower()
+    if any(keyword in query_lower for keyword in ['calculate', 'compute', 'math', '+', '-', '*', '/', 'sum', 'multiply', 'divide']):
+        return 'calculator'
+    elif any(keyword in query_lower for keyword in ['weather', 'temperature', 'forecast', 'rain', 'sunny', 'climate']):
+        return 'weather'
+    elif any(keyword in query_lower for keyword in ['wiki', 'wikipedia', 'who is', 'what is', 'tell me about', 'information about']):
+        return 'wikipedia'
+    elif any(keyword in query_lower for keyword in ['date', 'time', 'today', 'current time', 'what day', 'difference between']):
+        return 'datetime'
+    return 'unknown'
+
+
+def legacy_extract_params(query: str, tool: str) -> dict:
+    query_clean = query.strip()
+    if tool == 'calculator':
+        for word in ['calculate', 'compute', 'what is', 'solve', 'math']:
+            query_clean = query_clean.lower().replace(word, '').strip()
+        return {'expression': query_clean}
+    elif tool == 'weather':
+        for word in ['weather in', 'weather', 'temperature in', 'forecast for']:
+            query_clean = query_clean.lower().replace(word, '').strip()
+        return {'city': query_clean}
+    elif tool == 'wikipedia':
+        for word in ['wiki', 'wikipedia', 'who is', 'what is', 'tell me about', 'information about']:
+            query_clean = query_clean.lower().replace(word, '').strip()
+        return {'query': query_clean}
+    return {}
+
+
+def compiled(query: str):
+    tool, spans = router.route(query)
+    if tool in ('calculator', 'weather', 'wikipedia'):
+        remove_spans(query.lower(), spans)
+    return tool
+
+
+def legacy(query: str):
+    tool = legacy_decide_tool(query)
+    legacy_extract_params(query, tool)
+    return tool
+
+
+def inflate_routes(routes: list, factor: int) -> list:
+    """
+    Grow each keyword table with synthetic keywords that never match,
+    simulating more tools and phrasings.
+    """
+    return [
+        {**route, 'keywords': route['keywords'] + [f"{route['tool']}kw{i}" for i in range(len(route['keywords']) * (factor - 1))]}
+        for route in routes
+    ]
+
+
+def legacy_scan_for(routes: list):
+    """
+    The legacy decide_tool algorithm over an arbitrary keyword table.
+    """
+    def decide(query: str) -> str:
+        query_lower = query.lower()
+        for route in routes:
+            if any(keyword in query_lower for keyword in route['keywords']):
+                return route['tool']
+        return 'unknown'
+    return decide
+
+
+def build_corpus(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            n=rng.randint(1, 999), m=rng.randint(1, 999),
+            city=rng.choice(CITIES), topic=rng.choice(TOPICS), person=rng.choice(PEOPLE)
+        )
+        for _ in range(size)
+    ]
+
+
+def time_it(fn, corpus) -> float:
+    start = time.perf_counter()
+    for query in corpus:
+        fn(query)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200000)
+    args = parser.parse_args()
+    
+    corpus = build_corpus(args.queries)
+    
+    for name, fn in [("legacy", legacy), ("compiled", compiled)]:
+        elapsed = time_it(fn, corpus)
+        print(f"{name:<9} {elapsed / len(corpus) * 1e6:7.2f} us/query  ({len(corpus) / elapsed:,.0f} queries/s)")
+    
+    agree = sum(legacy_decide_tool(q) == router.route(q)[0] for q in corpus)
+    print(f"tool agreement: {agree / len(corpus) * 100:.2f}%")
+    
+    # Routing only, as keyword tables grow
+    sample = corpus[:max(1, len(corpus) // 10)]
+    routes = settings['agent']['router']['routes']
+    print("\nrouting cost by keyword-table size (us/query):")
+    for factor in (1, 10, 50):
+        grown = inflate_routes(routes, factor)
+        legacy_time = time_it(legacy_scan_for(grown), sample) / len(sample) * 1e6
+        compiled_time = time_it(IntentRouter(grown).route, sample) / len(sample) * 1e6
+        keywords = sum(len(route['keywords']) for route in grown)
+        print(f"  {keywords:>5} keywords  legacy={legacy_time:7.2f}  compiled={compiled_time:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Response serialization cost per response size: model path vs orjson.
+
+"model" is the path /ask used before: build the pydantic response
+model, validate and dump it again as FastAPI does for response_model,
+then render with the standard json encoder. "orjson" renders the plain
+dict with agent.serialization; "msgpack" is shown when msgpack is
+installed. /history is measured cold (decode + encode every call) and
+from the encoded-history cache.
+
+Usage: python bench/serialization.py [--ops 20000] [--json out.json] [--compare base.json]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from agent.memory import ConversationMemory
+from agent.serialization import json_dumps, msgpack, msgpack_dumps
+from bench.report import make_report, write_report, load_report, print_comparison
+
+
+class QueryResponse(BaseModel):
+    # Same fields as main.QueryResponse (not imported: that starts the whole app)
+    query: str
+    tool_used: str
+    params: dict = None
+    result: dict
+    timestamp: str
+    processing_time: float
+
+
+QUERY_ADAPTER = TypeAdapter(QueryResponse)
+
+
+def response(result: dict) -> dict:
+    return {
+        "query": "Tell me about Alan Turing",
+        "tool_used": "wikipedia",
+        "params": {"query": "alan turing"},
+        "result": result,
+        "timestamp": datetime.now().isoformat(),
+        "processing_time": 0.012
+    }
+
+
+def sizes() -> dict:
+    summary = "Alan Mathison Turing was an English mathematician, computer scientist and logician. " * 4
+    return {
+        "small": response({"success": True, "result": 42, "expression": "25 + 17"}),
+        "medium": response({"success": True, "title": "Alan Turing", "summary": summary,
+                            "url": "https://en.wikipedia.org/wiki/Alan_Turing"}),
+        "large": response({"success": True, "title": "Alan Turing", "summary": summary * 30,
+                           "sections": [{"title": f"Section {i}", "text": summary} for i in range(20)]}),
+    }
+
+
+def model_path(content: dict) -> bytes:
+    model = QueryResponse(**content)
+    validated = QUERY_ADAPTER.validate_python(model.model_dump())
+    return JSONResponse(QUERY_ADAPTER.dump_python(validated, mode="json")).body
+
+
+def per_op_us(fn, ops: int, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(ops):
+            fn()
+        elapsed = (time.perf_counter() - start) / ops * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    
+    results = {}
+    print(f"{'response':<16} {'bytes':>8} {'model':>10} {'orjson':>10} {'msgpack':>10}   (us per response)")
+    for name, content in sizes().items():
+        ops = max(100, args.ops // (1 if name != "large" else 20))
+        numbers = {
+            "bytes": len(json_dumps(content)),
+            "model_us": per_op_us(lambda: model_path(content), ops),
+            "orjson_us": per_op_us(lambda: json_dumps(content), ops)
+        }
+        if msgpack is not None:
+            numbers["msgpack_us"] = per_op_us(lambda: msgpack_dumps(content), ops)
+        results[f"ask_{name}"] = {key: round(value, 3) for key, value in numbers.items()}
+        print(f"{'ask ' + name:<16} {numbers['bytes']:>8} {numbers['model_us']:>10.2f} {numbers['orjson_us']:>10.2f} "
+              f"{numbers.get('msgpack_us', float('nan')):>10.2f}")
+    
+    # /history: 3 stored interactions per user, compressed as in production
+    for name, content in sizes().items():
+        memory = ConversationMemory(max_history=3, compress_min_bytes=512)
+        for _ in range(3):
+            memory.add_interaction("user", content["query"], content)
+        ops = max(100, args.ops // (1 if name != "large" else 20))
+        cold = per_op_us(lambda: JSONResponse(jsonable_encoder(memory.get_history("user"))).body, ops)
+        cached = per_op_us(lambda: memory.get_history_encoded("user", "json"), ops)
+        results[f"history_{name}"] = {"bytes": len(memory.get_history_encoded("user")[1]),
+                                      "cold_us": round(cold, 3), "cached_us": round(cached, 3)}
+        print(f"{'history ' + name:<16} {results[f'history_{name}']['bytes']:>8} {cold:>10.2f} {cached:>10.2f}"
+              f"   (cold decode + encode vs cached bytes)")
+    
+    report = make_report("serialization", {"ops": args.ops}, results)
+    if args.json:
+        write_report(args.json, report)
+    if args.compare and not print_comparison(load_report(args.compare), report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
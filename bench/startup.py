@@ -0,0 +1,81 @@
+"""
+Startup benchmark: `import main` time and time-to-first-request.
+
+Each measurement runs in a fresh interpreter, against a reachable
+(local file store) and an unreachable MLflow tracking URI.
+
+Usage: python bench/startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time(env: dict) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=300)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def time_to_first_request(env: dict, timeout: float = 120.0):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                request = urllib.request.Request(f"{base}/ask", data=json.dumps({"query": "Calculate 1 + 1"}).encode(),
+                                                 headers={"Content-Type": "application/json"})
+                urllib.request.urlopen(request, timeout=5).read()
+                elapsed = time.perf_counter() - start
+                health = json.loads(urllib.request.urlopen(f"{base}/health", timeout=5).read())
+                return elapsed, health.get("mlflow", "n/a")
+            except OSError:
+                time.sleep(0.02)
+        return None, "timeout"
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    
+    scenarios = {
+        "mlflow reachable": f"file://{tempfile.mkdtemp(prefix='bench-mlruns-')}",
+        "mlflow unreachable": "http://127.0.0.1:9",
+    }
+    for name, uri in scenarios.items():
+        env = {**os.environ, "MLFLOW_TRACKING_URI": uri}
+        imports = [import_time(env) for _ in range(args.runs)]
+        first = [time_to_first_request(env) for _ in range(args.runs)]
+        ready = [elapsed for elapsed, _ in first if elapsed is not None]
+        print(f"{name:<20} import main p50={statistics.median(imports) * 1000:8.1f} ms  "
+              f"first request p50={statistics.median(ready) * 1000 if ready else float('nan'):8.1f} ms  "
+              f"mlflow state at first request={first[-1][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Local stand-ins for the upstream APIs used by the tools.
+Benchmarks point OPENWEATHER_URL / WIKIPEDIA_API_URL at these servers
+so results never depend on the real network.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# Recorded MediaWiki responses, keyed by lowercased search term
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+# City ids handed out by the weather stub, so later calls can use id=...
+CITY_IDS = {}
+
+
+def weather_payload(city: str) -> dict:
+    city_id = CITY_IDS.setdefault(city.lower(), 1000 + len(CITY_IDS))
+    return {
+        "id": city_id,
+        "coord": {"lat": 48.85, "lon": 2.35},
+        "name": city.title(),
+        "sys": {"country": "XX"},
+        "main": {"temp": 18.5, "humidity": 60},
+        "weather": [{"description": "clear sky"}],
+        "wind": {"speed": 3.2}
+    }
+
+
+def wiki_payload(params: dict) -> dict:
+    # Search listing: return two hits for the requested term
+    if params.get("list") == "search":
+        term = params.get("srsearch", "")
+        return {"query": {"search": [{"title": term.title()}, {"title": f"{term.title()} (topic)"}]}}
+    
+    # Generator search: replay a recorded response when one exists
+    term = params.get("gsrsearch")
+    if term is not None:
+        fixture = FIXTURES_DIR / f"wikipedia_{term.lower().replace(' ', '_')}.json"
+        if fixture.exists():
+            return json.loads(fixture.read_text())
+    
+    # Page lookup (titles=...) or generated generator-search result
+    title = (params.get("titles") or term or "").split("|")[0].title()
+    return {"query": {"pages": {"1": {
+        "pageid": 1,
+        "index": 1,
+        "title": title,
+        "extract": f"{title} is a stub article served by the local benchmark server.",
+        "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+    }}}}
+
+
+class StubServer:
+    """
+    Threaded HTTP server answering like OpenWeatherMap and the MediaWiki API.
+    `delay` adds artificial upstream latency (seconds) to every response.
+    """
+    def __init__(self, delay: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.delay = delay
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def handle(self, path: str, params: dict):
+        """
+        Return (status, payload) for a request. Override to inject faults.
+        """
+        if path.endswith("/weather"):
+            return 200, weather_payload(params.get("q") or self.city_name(params.get("id")))
+        if path.endswith("/group"):
+            cities = [self.city_name(city_id) for city_id in params.get("id", "").split(",")]
+            return 200, {"cnt": len(cities), "list": [weather_payload(city) for city in cities]}
+        if path.endswith("/api.php"):
+            return 200, wiki_payload(params)
+        return 404, {"error": "not found"}
+    
+    @staticmethod
+    def city_name(city_id) -> str:
+        names = {str(value): name for name, value in CITY_IDS.items()}
+        return names.get(str(city_id), "London")
+    
+    def _make_handler(self):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def setup(self):
+                super().setup()
+                # Headers and body go out as separate writes; without this,
+                # Nagle + delayed ACK add ~40 ms to every keep-alive response
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+            def _respond(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.hits += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if body:
+                    status, payload = stub.handle_body(parsed.path, params, body)
+                else:
+                    status, payload = stub.handle(parsed.path, params)
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # client gave up (e.g. deadline hit)
+            
+            do_GET = _respond
+            do_POST = _respond
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+    
+    def handle_body(self, path: str, params: dict, body: bytes):
+        """
+        Handle requests that carry a body (e.g. tracking-server POSTs).
+        """
+        return 200, {}
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def point_tools_at(stub: StubServer):
+    """
+    Route the weather and Wikipedia tools to a stub server.
+    Must run before the tool modules are imported.
+    """
+    import os
+    os.environ["OPENWEATHER_URL"] = f"{stub.url}/data/2.5/weather"
+    os.environ["WIKIPEDIA_API_URL"] = f"{stub.url}/w/api.php"
+    os.environ.setdefault("OPENWEATHER_API_KEY", "bench-key")
@@ -0,0 +1,70 @@
+"""
+Stage-tracing overhead per request, sampled off vs sampled on.
+
+Wraps a trivial ASGI app that enters the same stages as /ask in
+TracingMiddleware and times it against the bare app, so the difference
+is the tracing cost alone: stage() context managers, the sampling
+check, and (when sampled) the Server-Timing header and histogram.
+
+Usage: python bench/tracing_overhead.py [--requests 100000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from monitoring.tracing import TracingMiddleware, stage, handler_done
+
+STAGES = ["route", "extract_params", "tool", "metrics", "mlflow", "memory", "metrics"]
+SCOPE = {"type": "http", "method": "POST", "path": "/ask", "headers": []}
+
+
+async def app(scope, receive, send):
+    for name in STAGES:
+        with stage(name):
+            pass
+    handler_done()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def per_request_us(target, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await target(SCOPE, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(args):
+    variants = {
+        "bare app (stages outside a trace)": app,
+        "middleware, sampled off": TracingMiddleware(app, sample_ratio=0.0),
+        "middleware, sampled on, no header": TracingMiddleware(app, sample_ratio=1.0, server_timing=False),
+        "middleware, sampled on": TracingMiddleware(app, sample_ratio=1.0),
+    }
+    for target in variants.values():
+        await per_request_us(target, 1000)  # warm-up
+    
+    timings = {name: min([await per_request_us(target, args.requests) for _ in range(3)])
+               for name, target in variants.items()}
+    baseline = timings["bare app (stages outside a trace)"]
+    print(f"{len(STAGES)} stages per request")
+    for name, micros in timings.items():
+        print(f"    {name:<36} {micros:7.2f} us/request  (+{micros - baseline:5.2f} us)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    asyncio.run(main(parser.parse_args()))
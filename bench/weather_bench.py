@@ -0,0 +1,84 @@
+"""
+Weather client benchmark: pooled session, result cache and batched cities.
+
+Against a local stub with fixed upstream latency, compares the legacy
+connection-per-call requests.get with the pooled session, then sends
+one weather query per city through process_batch (as /ask/batch does):
+cold (names unknown, per-city calls), refreshed after the result cache
+expires (ids known, group requests) and cached.
+
+Usage: python bench/weather_bench.py [--delay 0.02] [--calls 200] [--cities 100] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.stubs import StubServer, point_tools_at
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.02, help="upstream latency per request (s)")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8, help="weather calls in flight per batch (as /ask/batch)")
+    args = parser.parse_args()
+    
+    with StubServer(delay=args.delay) as stub:
+        point_tools_at(stub)
+        import requests
+        from tools import weather
+        from tools.http_client import close_client
+        
+        # Single lookups: the sync client has no result cache, so every call reaches the stub
+        params = {"q": "paris", "appid": "bench-key", "units": "metric"}
+        _, legacy = timed(lambda: [requests.get(weather.OPENWEATHER_URL, params=params, timeout=5) for _ in range(args.calls)])
+        _, pooled = timed(lambda: [weather.get_weather("Paris?") for _ in range(args.calls)])
+        print(f"single city, {args.calls} calls (upstream delay {args.delay * 1000:.0f} ms)")
+        print(f"    requests.get per call {legacy / args.calls * 1000:7.2f} ms/call")
+        print(f"    pooled session        {pooled / args.calls * 1000:7.2f} ms/call")
+        
+        # Batch: every city once, again after the cached results expire, then cached
+        # (with a result cache even where performance.cache_enabled is off)
+        from agent import logic
+        from agent.cache import build_result_cache
+        from config.settings import settings
+        logic.result_cache = build_result_cache({**settings.get("performance", {}), "cache_enabled": True})
+        cities = [f"City {i}" for i in range(args.cities)]
+        queries = [f"weather in {city}" for city in cities]
+        print(f"batch, {args.cities} cities, concurrency {args.concurrency}")
+        for phase in ("cold", "expired", "cached"):
+            if phase == "expired":
+                logic.result_cache.clear()  # city ids stay known
+            hits = stub.hits
+            responses, elapsed = timed(lambda: asyncio.run(batch(logic, close_client, queries, args.concurrency)))
+            assert len(responses) == len(cities)
+            ok = sum(response["result"]["success"] for response in responses)
+            print(f"    {phase:<8} {elapsed * 1000:8.1f} ms  upstream requests={stub.hits - hits}  "
+                  f"ok={ok} shed={len(cities) - ok}")
+        
+        # Sequential baseline: one connection-per-call request per city
+        _, sequential = timed(lambda: [requests.get(weather.OPENWEATHER_URL, params={**params, "q": city}, timeout=5)
+                                       for city in cities])
+        print(f"    sequential requests.get {sequential * 1000:8.1f} ms  upstream requests={len(cities)}")
+
+
+async def batch(logic, close_client, queries, concurrency):
+    try:
+        return await logic.process_batch(queries, concurrency)
+    finally:
+        await close_client()  # the shared client is bound to this event loop
+
+
+if __name__ == "__main__":
+    main()
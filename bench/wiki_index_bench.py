@@ -0,0 +1,96 @@
+"""
+Offline Wikipedia index benchmark: build throughput and lookup latency.
+
+Builds an index from a synthetic corpus (or --source, an abstracts dump
+or JSONL file), then times exact-title, full-text and miss lookups. The
+live API behind the same tool takes tens to hundreds of milliseconds
+per query; see bench/wiki_latency.py.
+
+Usage: python bench/wiki_index_bench.py [--records 100000] [--queries 2000] [--source FILE]
+"""
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools.wiki_index import WikiIndex, build_index, read_records
+
+VOCABULARY_SIZE = 20000
+
+SYLLABLES = "ka lo mi ra ne to su vi da re po li na ze mo".split()
+
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def zipf_sampler(words: list, rng: random.Random):
+    # Word frequencies in real text fall off roughly as 1/rank
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return lambda k: rng.choices(words, cum_weights=cumulative, k=k)
+
+
+def synthetic_records(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    sample = zipf_sampler(vocabulary(VOCABULARY_SIZE, rng), rng)
+    for i in range(count):
+        title = " ".join(sample(2)).title() + f" {i}"
+        summary = " ".join(sample(40)) + "."
+        yield title, summary, f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+
+
+def latency_ms(index: WikiIndex, queries: list) -> tuple:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--source", help="build from this dump/JSONL instead of a synthetic corpus")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "wiki.db"
+        titles = []
+        
+        def records():
+            source = read_records(args.source) if args.source else synthetic_records(args.records)
+            for record in source:
+                titles.append(record[0])
+                yield record
+        
+        start = time.perf_counter()
+        count = build_index(records(), db_path)
+        elapsed = time.perf_counter() - start
+        print(f"build: {count:,} articles in {elapsed:.2f}s  ({count / elapsed:,.0f} records/s, "
+              f"{db_path.stat().st_size / 1e6:.1f} MB)")
+        
+        index = WikiIndex(db_path)
+        rng = random.Random(11)
+        exact = [rng.choice(titles).lower() for _ in range(args.queries)]
+        # Two words from a real title, minus the number that makes it unique
+        fulltext = [rng.choice(titles).rsplit(" ", 1)[0] for _ in range(args.queries)]
+        misses = [f"zzqx{i} unknown topic" for i in range(args.queries)]
+        for name, queries in (("exact title", exact), ("full text", fulltext), ("miss", misses)):
+            p50, p99 = latency_ms(index, queries)
+            print(f"    {name:<12} p50={p50:7.3f} ms  p99={p99:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
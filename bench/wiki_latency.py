@@ -0,0 +1,69 @@
+"""
+Wikipedia tool latency: legacy three round trips vs one generator=search fetch.
+
+The legacy flow is replayed as its three sequential API calls
+(search, page info, summary) against the same local stub, so both
+variants see identical per-request upstream latency.
+
+Usage: python bench/wiki_latency.py [--delay 0.05] [--queries 50]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.stubs import StubServer, point_tools_at
+
+TOPICS = ["machine learning", "python", "mercury", "alan turing", "kubernetes"]
+
+
+def legacy_lookup(session, api_url: str, query: str) -> dict:
+    search = session.get(api_url, params={"action": "query", "format": "json", "list": "search", "srsearch": query, "srlimit": 1}).json()
+    title = search["query"]["search"][0]["title"]
+    page = session.get(api_url, params={"action": "query", "format": "json", "prop": "info", "inprop": "url", "titles": title}).json()
+    summary = session.get(api_url, params={"action": "query", "format": "json", "prop": "extracts", "exsentences": 3, "titles": title}).json()
+    return {"page": page, "summary": summary}
+
+
+def measure(fn, queries: int) -> list:
+    timings = []
+    for i in range(queries):
+        start = time.perf_counter()
+        fn(TOPICS[i % len(TOPICS)])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.05, help="stub upstream latency in seconds")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    
+    with StubServer(delay=args.delay) as stub:
+        point_tools_at(stub)
+        from tools import wiki
+        
+        results = {}
+        for name, fn in [
+            ("legacy (3 calls)", lambda q: legacy_lookup(wiki._session, wiki.WIKIPEDIA_API_URL, q)),
+            ("single fetch", wiki.search_wikipedia),
+        ]:
+            hits_before = stub.hits
+            timings = measure(fn, args.queries)
+            results[name] = statistics.median(timings)
+            calls = (stub.hits - hits_before) / args.queries
+            print(f"{name:<18} p50={results[name] * 1000:8.2f} ms  upstream calls/query={calls:.1f}")
+        
+        speedup = results["legacy (3 calls)"] / results["single fetch"]
+        print(f"speedup: {speedup:.1f}x")
+        
+        sample = wiki.search_wikipedia("mercury")
+        print(f"disambiguation check: 'mercury' -> {sample.get('title')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
-import mlflow
 import os
-from pathlib import Path
 
 class MLflowConfig:
     """
-    MLflow configuration and setup
+    MLflow configuration and setup.
+    Nothing is imported or contacted until setup() runs, so importing
+    this module stays cheap and never blocks on the tracking server.
     """
     def __init__(self, experiment_name: str = "ai-agent-experiments"):
         self.experiment_name = experiment_name
@@ -12,53 +12,62 @@ class MLflowConfig:
         # Use environment variable for tracking URI (Docker-friendly)
         self.tracking_uri = os.getenv("MLFLOW_TRACKING_URI", "http://127.0.0.1:5000")
         
-        # Set tracking URI
-        mlflow.set_tracking_uri(self.tracking_uri)
+        self.client = None
+        self.experiment_id = None
+    
+    def setup(self):
+        """
+        Import mlflow, connect to the tracking server and create or look
+        up the experiment. Blocking; run it off the event loop.
+        """
+        if self.client is not None:
+            return self.client
+        
+        from mlflow.tracking import MlflowClient
+        
+        client = MlflowClient(tracking_uri=self.tracking_uri)
         
-        # Set or create experiment
-        try:
-            self.experiment_id = mlflow.create_experiment(experiment_name)
-        except:
-            # Experiment already exists
-            experiment = mlflow.get_experiment_by_name(experiment_name)
-            if experiment:
-                self.experiment_id = experiment.experiment_id
+        # Look up or create experiment
+        experiment = client.get_experiment_by_name(self.experiment_name)
+        if experiment:
+            self.experiment_id = experiment.experiment_id
+        else:
+            self.experiment_id = client.create_experiment(self.experiment_name)
         
-        mlflow.set_experiment(experiment_name)
+        self.client = client
+        return client
     
-    def log_agent_config(self, config: dict):
+    def log_agent_config(self, run_id: str, config: dict):
         """
         Log agent configuration parameters
         """
-        with mlflow.start_run(run_name="agent_config"):
-            # Log parameters
-            for key, value in config.items():
-                mlflow.log_param(key, value)
+        for key, value in config.items():
+            self.client.log_param(run_id, key, value)
     
-    def log_run_metrics(self, metrics: dict, step: int = None):
+    def log_run_metrics(self, run_id: str, metrics: dict, step: int = None):
         """
         Log metrics for a run
         """
         for key, value in metrics.items():
-            mlflow.log_metric(key, value, step=step)
+            self.client.log_metric(run_id, key, value, step=step)
     
-    def log_artifact(self, file_path: str):
+    def log_artifact(self, run_id: str, file_path: str):
         """
         Log an artifact (file)
         """
-        mlflow.log_artifact(file_path)
+        self.client.log_artifact(run_id, file_path)
     
     def start_run(self, run_name: str = None):
         """
         Start a new MLflow run
         """
-        return mlflow.start_run(run_name=run_name)
+        return self.setup().create_run(self.experiment_id, run_name=run_name)
     
-    def end_run(self):
+    def end_run(self, run_id: str):
         """
-        End the current MLflow run
+        End an MLflow run
         """
-        mlflow.end_run()
+        self.client.set_terminated(run_id)
 
-# Global MLflow config instance
-mlflow_config = MLflowConfig()
\ No newline at end of file
+# Global MLflow config instance (lazy; see setup())
+mlflow_config = MLflowConfig()
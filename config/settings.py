@@ -0,0 +1,15 @@
+import yaml
+from pathlib import Path
+
+# Agent configuration file (config/setting.yaml)
+SETTINGS_PATH = Path(__file__).parent / "setting.yaml"
+
+def load_settings(path: Path = SETTINGS_PATH) -> dict:
+    """
+    Load the agent configuration from YAML.
+    """
+    with open(path, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+# Global settings instance
+settings = load_settings()
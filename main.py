@@ -1,6 +1,10 @@
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
 from datetime import datetime
+import asyncio
+import os
 import time
 from monitoring.experiment import experiment_tracker
 import yaml
@@ -9,27 +13,46 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from agent.logic import process_query
+from agent.logic import process_query, process_batch, stream_batch
 from agent.memory import memory
+from agent.admission import user_limiter, RateLimited
+from agent.serialization import FastJSONResponse, negotiated_response, response_format, encode_with_raw, json_dumps, MEDIA_TYPES
+from config.settings import settings
 
 # Import monitoring
 from monitoring.metrics import (
     track_tool_usage, 
+    track_tool_usage_bulk,
     track_error, 
-    update_active_users,
-    request_count,
-    request_latency,
-    generate_latest,
+    watch_active_users,
+    refresh_active_users,
+    count_request,
+    track_request_latency,
+    track_request_outcome,
+    aggregator,
+    read_request_stats,
+    render_metrics,
+    mark_worker_dead,
+    prepare_multiprocess_dir,
     CONTENT_TYPE_LATEST
 )
+from monitoring.tracing import TracingMiddleware, stage, handler_done, span_exporter
+from monitoring.request_log import request_log
 
 # Create FastAPI app
 app = FastAPI(
     title="Tool-Using AI Agent",
     description="An intelligent agent that uses multiple tools to answer questions",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Per-stage timing for /ask endpoints: histogram, Server-Timing header, spans
+app.add_middleware(TracingMiddleware, exporter=span_exporter)
+
+# Active users are counted when metrics are collected, not per request
+watch_active_users(memory.user_count)
+
 # Request/Response models
 class QueryRequest(BaseModel):
     query: str
@@ -38,16 +61,44 @@ class QueryRequest(BaseModel):
 class QueryResponse(BaseModel):
     query: str
     tool_used: str
+    params: Optional[dict] = None
     result: dict
     timestamp: str
     processing_time: float
 
-# Global stats
-stats = {
-    "total_requests": 0,
-    "successful_requests": 0,
-    "failed_requests": 0
-}
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+    total_processing_time: float
+
+def rate_limit_key(request: QueryRequest, http_request: Request) -> str:
+    """
+    Whose bucket a query is charged to: its user_id, or the client's
+    address when user_id was left out, so anonymous clients do not
+    share the default user's bucket.
+    """
+    if 'user_id' in request.model_fields_set:
+        return request.user_id
+    return f"client:{http_request.client.host if http_request.client else 'unknown'}"
+
+def admit_requests(requests: list, http_request: Request):
+    """
+    Apply the per-user rate limit to every query of a request, all or
+    nothing: 429 with Retry-After when any user is over their rate.
+    """
+    if user_limiter is None:
+        return
+    counts = {}
+    for request in requests:
+        key = rate_limit_key(request, http_request)
+        counts[key] = counts.get(key, 0) + 1
+    try:
+        user_limiter.admit(counts)
+    except RateLimited as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers())
+
+# Batch limits
+BATCH_MAX_ITEMS = settings.get('performance', {}).get('batch_max_items', 100)
+BATCH_CONCURRENCY = settings.get('performance', {}).get('batch_concurrency', 8)
 
 @app.get("/")
 def root():
@@ -59,6 +110,9 @@ def root():
         "docs": "/docs",
         "endpoints": {
             "ask": "/ask",
+            "ask_batch": "/ask/batch",
+            "ask_stream": "/ask/stream",
+            "ask_batch_stream": "/ask/batch/stream",
             "history": "/history/{user_id}",
             "stats": "/stats",
             "health": "/health",
@@ -67,84 +121,252 @@ def root():
     }
 
 @app.post("/ask", response_model=QueryResponse)
-def ask_agent(request: QueryRequest):
+async def ask_agent(request: QueryRequest, http_request: Request):
     """
     Ask the agent a question.
     The agent will automatically choose the right tool.
+    Responds with JSON, or MessagePack for Accept: application/msgpack
+    when enabled.
+    Over the user's rate: 429; tool saturated: 503 (both with Retry-After).
     """
     start_time = time.time()
+    admit_requests([request], http_request)
     
     try:
         # Track request
-        request_count.labels(endpoint="/ask", method="POST").inc()
-        
-        # Update stats
-        stats["total_requests"] += 1
+        count_request("/ask")
         
         # Process the query
-        result = process_query(request.query)
+        result = await process_query(request.query)
         
         # Track tool usage
         tool_name = result['tool_used']
         success = result['result'].get('success', False)
-        track_tool_usage(tool_name, success)
-        
-        # Track latency
         processing_time = time.time() - start_time
-        request_latency.labels(endpoint="/ask", tool=tool_name).observe(processing_time)
+        with stage("metrics"):
+            track_tool_usage(tool_name, success)
+            
+            # Track latency
+            track_request_latency("/ask", tool_name, processing_time)
         
         # Log to MLflow
-        experiment_tracker.log_request(tool_name, success, processing_time)
+        with stage("mlflow"):
+            experiment_tracker.log_request(tool_name, success, processing_time)
         
         # Store in memory
-        memory.add_interaction(
-            user_id=request.user_id,
-            query=request.query,
-            response=result
-        )
+        with stage("memory"):
+            memory.add_interaction(
+                user_id=request.user_id,
+                query=request.query,
+                response=result
+            )
+            
+            # Update active users count (multi-worker mode only)
+            refresh_active_users()
         
-        # Update active users count
-        update_active_users(len(memory.conversations))
+        # Append to the request log (written by a background thread)
+        if request_log is not None:
+            with stage("request_log"):
+                request_log.log("/ask", request.user_id, request.query, tool_name, result['params'], processing_time, success)
         
-        # Check if successful
-        if success:
-            stats["successful_requests"] += 1
-        else:
-            stats["failed_requests"] += 1
-            track_error(tool_name, "tool_execution_failed")
+        # Check if successful (stats are aggregated across workers)
+        with stage("metrics"):
+            if success:
+                track_request_outcome(successful=1)
+            else:
+                track_request_outcome(failed=1)
+                track_error(tool_name, "tool_execution_failed")
         
-        return QueryResponse(
-            query=result['query'],
-            tool_used=result['tool_used'],
-            result=result['result'],
-            timestamp=datetime.now().isoformat(),
-            processing_time=round(processing_time, 3)
-        )
+        handler_done()
+        # Built from trusted tool output, so QueryResponse validation is skipped
+        return negotiated_response({
+            "query": result['query'],
+            "tool_used": result['tool_used'],
+            "params": result['params'],
+            "result": result['result'],
+            "timestamp": datetime.now().isoformat(),
+            "processing_time": round(processing_time, 3)
+        }, http_request.headers.get("accept"))
     
+    except RateLimited as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers())
     except Exception as e:
-        stats["failed_requests"] += 1
+        track_request_outcome(failed=1)
         track_error("unknown", "internal_error")
         raise HTTPException(status_code=500, detail=str(e))
 
+def record_batch(pairs: list, endpoint: str) -> int:
+    """
+    Record metrics, MLflow entries, memory and stats for processed items
+    with one bulk update each. pairs: list of (QueryRequest, result item).
+    Returns the number of failed items.
+    """
+    # Aggregate per-tool counts so each metric is updated once
+    usage = {}
+    failures = {}
+    for _, item in pairs:
+        tool_name = item['tool_used']
+        success = item['result'].get('success', False)
+        total, successful = usage.get(tool_name, (0, 0))
+        usage[tool_name] = (total + 1, successful + int(success))
+        if not success:
+            failures[tool_name] = failures.get(tool_name, 0) + 1
+        track_request_latency(endpoint, tool_name, item['processing_time'])
+    
+    with stage("metrics"):
+        track_tool_usage_bulk(usage)
+        for tool_name, count in failures.items():
+            track_error(tool_name, "tool_execution_failed", count)
+    
+    # Log to MLflow in one batch
+    with stage("mlflow"):
+        experiment_tracker.log_requests([
+            (item['tool_used'], item['result'].get('success', False), item['processing_time'])
+            for _, item in pairs
+        ])
+    
+    # Store in memory
+    with stage("memory"):
+        memory.add_interactions([
+            (request.user_id, request.query, item)
+            for request, item in pairs
+        ])
+        
+        # Update active users count (multi-worker mode only)
+        refresh_active_users()
+    
+    # Append to the request log (written by a background thread)
+    if request_log is not None:
+        with stage("request_log"):
+            for request, item in pairs:
+                request_log.log(endpoint, request.user_id, request.query, item['tool_used'], item['params'],
+                                item['processing_time'], item['result'].get('success', False))
+    
+    # Update stats
+    failed = sum(failures.values())
+    with stage("metrics"):
+        track_request_outcome(successful=len(pairs) - failed, failed=failed)
+    return failed
+
+@app.post("/ask/batch", response_model=BatchQueryResponse)
+async def ask_agent_batch(requests: List[QueryRequest], http_request: Request):
+    """
+    Ask the agent many questions in one call.
+    Duplicate tool calls run once and network tools run concurrently;
+    results come back in request order.
+    """
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: max {BATCH_MAX_ITEMS} queries")
+    admit_requests(requests, http_request)
+    
+    start_time = time.time()
+    
+    try:
+        # Track request
+        count_request("/ask/batch")
+        
+        # Process all queries
+        results = await process_batch([r.query for r in requests], concurrency=BATCH_CONCURRENCY)
+        
+        record_batch(list(zip(requests, results)), "/ask/batch")
+        
+        handler_done()
+        timestamp = datetime.now().isoformat()
+        return negotiated_response({
+            "results": [
+                {
+                    "query": item['query'],
+                    "tool_used": item['tool_used'],
+                    "params": item['params'],
+                    "result": item['result'],
+                    "timestamp": timestamp,
+                    "processing_time": round(item['processing_time'], 3)
+                }
+                for item in results
+            ],
+            "total_processing_time": round(time.time() - start_time, 3)
+        }, http_request.headers.get("accept"))
+    
+    except Exception as e:
+        track_request_outcome(failed=len(requests))
+        track_error("unknown", "internal_error")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def stream_response(requests: List[QueryRequest], endpoint: str, accept: str) -> StreamingResponse:
+    """
+    Stream routed/result events as NDJSON, or as server-sent events
+    when the client accepts text/event-stream. A final 'done' event
+    carries the totals.
+    """
+    sse = "text/event-stream" in (accept or "")
+    
+    def encode(event: dict) -> bytes:
+        if sse:
+            return b"event: " + event['event'].encode() + b"\ndata: " + json_dumps(event) + b"\n\n"
+        return json_dumps(event) + b"\n"
+    
+    async def events():
+        start_time = time.time()
+        failed = 0
+        async for event in stream_batch([r.query for r in requests], concurrency=BATCH_CONCURRENCY):
+            if event['event'] == 'result':
+                item = event['data']
+                failed += record_batch([(requests[event['index']], item)], endpoint)
+                event['data'] = {**item, 'processing_time': round(item['processing_time'], 3)}
+                event['timestamp'] = datetime.now().isoformat()
+            yield encode(event)
+        
+        yield encode({
+            'event': 'done',
+            'data': {
+                'count': len(requests),
+                'failed': failed,
+                'total_processing_time': round(time.time() - start_time, 3)
+            }
+        })
+    
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+@app.post("/ask/stream")
+async def ask_agent_stream(request: QueryRequest, http_request: Request):
+    """
+    Streaming variant of /ask (NDJSON, or SSE via Accept: text/event-stream).
+    """
+    admit_requests([request], http_request)
+    count_request("/ask/stream")
+    return stream_response([request], "/ask/stream", http_request.headers.get("accept"))
+
+@app.post("/ask/batch/stream")
+async def ask_agent_batch_stream(requests: List[QueryRequest], http_request: Request):
+    """
+    Streaming variant of /ask/batch; results arrive in completion order.
+    """
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: max {BATCH_MAX_ITEMS} queries")
+    admit_requests(requests, http_request)
+    
+    count_request("/ask/batch/stream")
+    return stream_response(requests, "/ask/batch/stream", http_request.headers.get("accept"))
+
 @app.get("/history/{user_id}")
-def get_history(user_id: str):
+def get_history(user_id: str, http_request: Request):
     """
     Get conversation history for a user.
+    The encoded history is reused while the user's interactions are unchanged.
     """
-    request_count.labels(endpoint="/history", method="GET").inc()
-    history = memory.get_history(user_id)
-    return {
-        "user_id": user_id,
-        "history_count": len(history),
-        "history": history
-    }
+    count_request("/history", "GET")
+    kind = response_format(http_request.headers.get("accept"))
+    count, history = memory.get_history_encoded(user_id, kind)
+    body = encode_with_raw(kind, {"user_id": user_id, "history_count": count}, "history", history)
+    return Response(content=body, media_type=MEDIA_TYPES[kind])
 
 @app.delete("/history/{user_id}")
 def clear_history(user_id: str):
     """
     Clear conversation history for a user.
     """
-    request_count.labels(endpoint="/history", method="DELETE").inc()
+    count_request("/history", "DELETE")
     memory.clear_history(user_id)
     return {
         "message": f"History cleared for user: {user_id}"
@@ -155,18 +377,19 @@ def get_stats():
     """
     Get API usage statistics.
     """
-    request_count.labels(endpoint="/stats", method="GET").inc()
-    return stats
+    count_request("/stats", "GET")
+    return read_request_stats()
 
 @app.get("/health")
 def health_check():
     """
     Health check endpoint.
     """
-    request_count.labels(endpoint="/health", method="GET").inc()
+    count_request("/health", "GET")
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "mlflow": experiment_tracker.state
     }
 
 @app.get("/metrics")
@@ -174,25 +397,57 @@ def metrics():
     """
     Prometheus metrics endpoint
     """
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
+# Background MLflow setup task
+mlflow_startup = None
+
 @app.on_event("startup")
 async def startup_event():
     """
-    Start MLflow experiment on startup
+    Start MLflow experiment in the background so the API serves
+    requests immediately, even if the tracking server is slow or down.
     """
-    experiment_tracker.start_experiment(run_name=f"api_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-    print("✅ MLflow experiment started")
+    global mlflow_startup
+    mlflow_startup = asyncio.create_task(
+        experiment_tracker.start_in_background(run_name=f"api_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    )
+    print("✅ MLflow experiment starting in background")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """
     End MLflow experiment on shutdown
     """
-    experiment_tracker.end_experiment()
+    if mlflow_startup is not None and not mlflow_startup.done():
+        mlflow_startup.cancel()
+    await experiment_tracker.end_in_background()
+    http_client = sys.modules.get('tools.http_client')  # imported by the first network tool call
+    if http_client is not None:
+        await http_client.close_client()
+    if request_log is not None:
+        request_log.stop()
+    if aggregator is not None:
+        aggregator.stop()
+    if span_exporter is not None:
+        span_exporter.shutdown()
+    memory.close()
+    mark_worker_dead(os.getpid())
     print("✅ MLflow experiment ended")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    
+    # Worker count and port come from settings (API_WORKERS / API_PORT override them)
+    api_config = settings.get('api', {})
+    workers = int(os.getenv("API_WORKERS", api_config.get('workers', 1)))
+    host = api_config.get('host', '0.0.0.0')
+    port = int(os.getenv("API_PORT", api_config.get('port', 8000)))
+    
+    if workers > 1:
+        # Workers share Prometheus metrics through a directory of mmap files
+        prepare_multiprocess_dir()
+        uvicorn.run("main:app", host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app, host=host, port=port)
\ No newline at end of file
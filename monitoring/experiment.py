@@ -3,17 +3,137 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.mlflow_config import mlflow_config
-import mlflow
+from config.settings import settings, SETTINGS_PATH
+from monitoring.metrics import track_mlflow_dropped
+import asyncio
+import queue
+import threading
+import time
 from datetime import datetime
-import yaml
-from pathlib import Path
+
+# MLflow rejects log_batch calls with more metrics than this
+MLFLOW_MAX_METRICS_PER_BATCH = 1000
+
+async def run_in_daemon_thread(fn, *args):
+    """
+    Await a blocking call running on a daemon thread, so a hung
+    tracking server can never hold up interpreter shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def resolve(setter, value):
+        if not future.done():
+            setter(value)
+    
+    def target():
+        try:
+            outcome = (future.set_result, fn(*args))
+        except Exception as e:
+            outcome = (future.set_exception, e)
+        try:
+            loop.call_soon_threadsafe(resolve, *outcome)
+        except RuntimeError:
+            pass  # event loop already closed
+    
+    threading.Thread(target=target, name="mlflow-call", daemon=True).start()
+    return await future
+
+class BackgroundMetricLogger:
+    """
+    Ship MLflow metrics from a bounded queue on a worker thread.
+    Flushes with MlflowClient.log_batch once `batch_size` metrics are
+    waiting or `flush_interval_seconds` have passed. When the queue is
+    full, new entries are dropped and counted instead of blocking.
+    Metrics are queued as (key, value, timestamp, step) tuples.
+    """
+    def __init__(self, run_id: str, client=None, queue_size: int = 10000,
+                 batch_size: int = 300, flush_interval_seconds: float = 2.0):
+        self.run_id = run_id
+        self.client = client or mlflow_config.setup()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = min(batch_size, MLFLOW_MAX_METRICS_PER_BATCH)
+        self.flush_interval = flush_interval_seconds
+        self.dropped = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mlflow-metric-logger", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def enqueue(self, metrics: list) -> bool:
+        """
+        Queue metrics for the next flush; never blocks.
+        """
+        try:
+            self.queue.put_nowait(metrics)
+            return True
+        except queue.Full:
+            self.dropped += len(metrics)
+            track_mlflow_dropped("queue_full", len(metrics))
+            return False
+    
+    def stop(self, timeout: float = 10.0):
+        """
+        Drain everything still queued, flush it and stop the worker.
+        """
+        self._stopping.set()
+        try:
+            self.queue.put_nowait(None)  # wake the worker
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+    
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        
+        while not (self._stopping.is_set() and self.queue.empty()):
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is not None:
+                    pending.extend(item)
+            except queue.Empty:
+                pass
+            
+            if len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(pending)
+                pending = []
+                deadline = time.monotonic() + self.flush_interval
+        
+        self._flush(pending)
+    
+    def _flush(self, metrics: list):
+        if not metrics:
+            return
+        
+        from mlflow.entities import Metric
+        
+        for offset in range(0, len(metrics), self.batch_size):
+            chunk = [Metric(*metric) for metric in metrics[offset:offset + self.batch_size]]
+            try:
+                self.client.log_batch(self.run_id, metrics=chunk)
+            except Exception as e:
+                self.dropped += len(chunk)
+                track_mlflow_dropped("flush_failed", len(chunk))
+                print(f"⚠️ MLflow batch flush failed: {e}")
 
 class ExperimentTracker:
     """
-    Track agent experiments with MLflow
+    Track agent experiments with MLflow.
+    MLflow is connected in the background after startup; until then
+    request metrics are buffered (bounded) and handed over once ready.
+    state: pending -> initializing -> ready | unavailable (or disabled)
     """
     def __init__(self):
         self.current_run = None
+        self.metric_logger = None
+        self.state = "pending"
+        self.logging_config = dict(settings.get('monitoring', {}).get('mlflow_logging') or {})
+        self.buffer_size = self.logging_config.get('queue_size', 10000)
+        self.buffer = []  # metrics logged before MLflow was ready
+        self._lock = threading.Lock()
         self.run_metrics = {
             "total_requests": 0,
             "successful_requests": 0,
@@ -21,35 +141,77 @@ class ExperimentTracker:
             "tool_usage": {}
         }
     
+    async def start_in_background(self, run_name: str = None):
+        """
+        Connect to MLflow and start the run without blocking the event
+        loop, retrying while the tracking server is unreachable.
+        """
+        monitoring = settings.get('monitoring', {})
+        if not monitoring.get('mlflow_enabled', True):
+            self.state = "disabled"
+            self._drop_buffer("disabled")
+            return
+        
+        init_config = monitoring.get('mlflow_init') or {}
+        max_attempts = init_config.get('max_attempts', 5)
+        retry_seconds = init_config.get('retry_seconds', 30)
+        
+        self.state = "initializing"
+        for attempt in range(1, max_attempts + 1):
+            try:
+                await run_in_daemon_thread(self.start_experiment, run_name)
+                return
+            except Exception as e:
+                print(f"⚠️ MLflow unavailable (attempt {attempt}/{max_attempts}): {e}")
+                if attempt < max_attempts:
+                    await asyncio.sleep(retry_seconds)
+        
+        self.state = "unavailable"
+        self._drop_buffer("unavailable")
+    
     def start_experiment(self, run_name: str = None):
         """
-        Start a new experiment run
+        Start a new experiment run (blocking)
         """
         if not run_name:
             run_name = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        self.current_run = mlflow_config.start_run(run_name=run_name)
+        run = mlflow_config.start_run(run_name=run_name)
+        run_id = run.info.run_id
         
         # Log agent configuration
-        config_path = Path(__file__).parent.parent / "config" / "settings.yaml"
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-        
-        # Log parameters
-        mlflow.log_param("agent_name", config['agent']['name'])
-        mlflow.log_param("agent_version", config['agent']['version'])
-        mlflow.log_param("tools", ",".join(config['agent']['tools']))
-        mlflow.log_param("reasoning_strategy", config['agent']['reasoning_strategy'])
-        mlflow.log_param("max_history", config['agent']['max_history'])
+        config = settings['agent']
+        mlflow_config.log_agent_config(run_id, {
+            "agent_name": config['name'],
+            "agent_version": config['version'],
+            "tools": ",".join(config['tools']),
+            "reasoning_strategy": config['reasoning_strategy'],
+            "max_history": config['max_history']
+        })
         
         # Log artifact (config file)
-        mlflow.log_artifact(str(config_path))
+        mlflow_config.log_artifact(run_id, str(SETTINGS_PATH))
         
-        return self.current_run
+        # Ship per-request metrics off the request path
+        logger_config = {k: v for k, v in self.logging_config.items() if k != 'queue_size'}
+        metric_logger = BackgroundMetricLogger(run_id, queue_size=self.buffer_size, **logger_config).start()
+        
+        # Hand over everything buffered while MLflow was starting
+        with self._lock:
+            for metrics in self.buffer:
+                metric_logger.enqueue(metrics)
+            self.buffer = []
+            self.metric_logger = metric_logger
+            self.current_run = run
+            self.state = "ready"
+        
+        return run
     
-    def log_request(self, tool_name: str, success: bool, latency: float):
+    def _record(self, tool_name: str, success: bool, latency: float, timestamp: int) -> list:
         """
-        Log a single request
+        Update run counters and return the MLflow metrics for one request.
+        Caller holds self._lock, so counts and steps stay exact when
+        requests are logged from the event loop and the threadpool at once.
         """
         self.run_metrics["total_requests"] += 1
         
@@ -63,40 +225,97 @@ class ExperimentTracker:
             self.run_metrics["tool_usage"][tool_name] = 0
         self.run_metrics["tool_usage"][tool_name] += 1
         
-        # Log metrics to MLflow
-        if self.current_run:
-            step = self.run_metrics["total_requests"]
-            mlflow.log_metric("request_latency", latency, step=step)
-            mlflow.log_metric("total_requests", self.run_metrics["total_requests"], step=step)
-            mlflow.log_metric("success_rate", 
-                            self.run_metrics["successful_requests"] / self.run_metrics["total_requests"] * 100,
-                            step=step)
+        step = self.run_metrics["total_requests"]
+        return [
+            ("request_latency", latency, timestamp, step),
+            ("total_requests", self.run_metrics["total_requests"], timestamp, step),
+            ("success_rate",
+             self.run_metrics["successful_requests"] / self.run_metrics["total_requests"] * 100,
+             timestamp, step)
+        ]
+    
+    def log_request(self, tool_name: str, success: bool, latency: float):
+        """
+        Log a single request (only enqueues; shipped in the background)
+        """
+        self.log_requests([(tool_name, success, latency)])
+    
+    def log_requests(self, entries: list):
+        """
+        Log many requests at once (only enqueues; shipped in the background).
+        entries: list of (tool_name, success, latency)
+        """
+        timestamp = int(time.time() * 1000)
+        with self._lock:
+            metrics = []
+            for tool_name, success, latency in entries:
+                metrics.extend(self._record(tool_name, success, latency, timestamp))
+            
+            if not metrics:
+                return
+            
+            if self.metric_logger is not None:
+                self.metric_logger.enqueue(metrics)
+            elif self.state in ("pending", "initializing"):
+                if len(self.buffer) < self.buffer_size:
+                    self.buffer.append(metrics)
+                else:
+                    track_mlflow_dropped("not_ready", len(metrics))
     
     def log_summary(self):
         """
         Log summary metrics at the end of run
         """
         if self.current_run:
+            # Consistent snapshot of the counters
+            with self._lock:
+                run_metrics = dict(self.run_metrics, tool_usage=dict(self.run_metrics["tool_usage"]))
+            
             # Calculate averages
-            total = self.run_metrics["total_requests"]
+            total = run_metrics["total_requests"]
             if total > 0:
-                success_rate = (self.run_metrics["successful_requests"] / total) * 100
+                success_rate = (run_metrics["successful_requests"] / total) * 100
                 
-                mlflow.log_metric("final_total_requests", total)
-                mlflow.log_metric("final_success_rate", success_rate)
-                mlflow.log_metric("final_failed_requests", self.run_metrics["failed_requests"])
+                summary = {
+                    "final_total_requests": total,
+                    "final_success_rate": success_rate,
+                    "final_failed_requests": run_metrics["failed_requests"]
+                }
                 
                 # Log tool usage
-                for tool, count in self.run_metrics["tool_usage"].items():
-                    mlflow.log_metric(f"tool_usage_{tool}", count)
+                for tool, count in run_metrics["tool_usage"].items():
+                    summary[f"tool_usage_{tool}"] = count
+                
+                mlflow_config.log_run_metrics(self.current_run.info.run_id, summary)
+    
+    async def end_in_background(self, timeout: float = 15.0):
+        """
+        End the run without blocking the event loop, giving up after `timeout`.
+        """
+        try:
+            await asyncio.wait_for(run_in_daemon_thread(self.end_experiment), timeout)
+        except Exception as e:
+            print(f"⚠️ MLflow run not closed cleanly: {e}")
     
     def end_experiment(self):
         """
         End the current experiment run
         """
-        self.log_summary()
-        mlflow_config.end_run()
+        if self.metric_logger is not None:
+            self.metric_logger.stop()
+            self.metric_logger = None
+        
+        if self.current_run:
+            self.log_summary()
+            mlflow_config.end_run(self.current_run.info.run_id)
         self.current_run = None
+    
+    def _drop_buffer(self, reason: str):
+        with self._lock:
+            dropped = sum(len(metrics) for metrics in self.buffer)
+            self.buffer = []
+        if dropped:
+            track_mlflow_dropped(reason, dropped)
 
 # Global experiment tracker
-experiment_tracker = ExperimentTracker()
\ No newline at end of file
+experiment_tracker = ExperimentTracker()
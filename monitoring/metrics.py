@@ -1,7 +1,35 @@
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CollectorRegistry, multiprocess
+from collections import deque
 from functools import wraps
+from pathlib import Path
+import os
+import threading
 import time
 
+from config.settings import settings
+
+# Shared metrics directory in multi-worker mode. Must be set before this
+# module is first imported (the launcher sets it for every worker).
+MULTIPROCESS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+# Workers share one user store with the sqlite backend, so report the
+# largest value; with per-process memory, sum the live workers.
+ACTIVE_USERS_MODE = 'max' if (settings.get('memory') or {}).get('backend') == 'sqlite' else 'livesum'
+
+_metrics_settings = (settings.get('monitoring') or {}).get('metrics') or {}
+
+# Label values bound once at import, so hot-path updates skip labels()
+KNOWN_TOOLS = tuple((settings.get('agent') or {}).get('tools') or ())
+KNOWN_ENDPOINTS = (
+    ('/ask', 'POST'), ('/ask/batch', 'POST'), ('/ask/stream', 'POST'), ('/ask/batch/stream', 'POST'),
+    ('/history', 'GET'), ('/history', 'DELETE'), ('/stats', 'GET'), ('/health', 'GET')
+)
+LATENCY_ENDPOINTS = ('/ask', '/ask/batch', '/ask/stream', '/ask/batch/stream')
+
+# In multi-worker mode the active-users gauge is refreshed at most this often
+ACTIVE_USERS_REFRESH_SECONDS = _metrics_settings.get('active_users_refresh_seconds', 1.0)
+
 # Define metrics
 request_count = Counter(
     'agent_request_total',
@@ -29,7 +57,8 @@ error_count = Counter(
 
 active_users = Gauge(
     'agent_active_users',
-    'Number of active users'
+    'Number of active users',
+    multiprocess_mode=ACTIVE_USERS_MODE
 )
 
 successful_requests = Counter(
@@ -38,6 +67,253 @@ successful_requests = Counter(
     ['tool_name']
 )
 
+requests_processed = Counter(
+    'agent_requests_processed_total',
+    'Agent queries processed, by outcome (backs /stats)',
+    ['outcome']
+)
+
+cache_hits = Counter(
+    'agent_cache_hits_total',
+    'Tool results served from the result cache',
+    ['tool_name']
+)
+
+cache_misses = Counter(
+    'agent_cache_misses_total',
+    'Tool calls that missed the result cache',
+    ['tool_name']
+)
+
+cache_coalesced = Counter(
+    'agent_cache_coalesced_total',
+    'Cache misses that waited on an in-flight call for the same key',
+    ['tool_name']
+)
+
+cache_evictions = Counter(
+    'agent_cache_evictions_total',
+    'Entries removed from the result cache',
+    ['tool_name', 'reason']
+)
+
+memory_evictions = Counter(
+    'agent_memory_evictions_total',
+    'Users evicted from conversation memory',
+    ['reason']
+)
+
+mlflow_dropped = Counter(
+    'agent_mlflow_dropped_metrics_total',
+    'MLflow metrics dropped by the background logger',
+    ['reason']
+)
+
+request_log_dropped = Counter(
+    'agent_request_log_dropped_total',
+    'Request log records dropped (queue full or write failed)'
+)
+
+# 0 = closed, 1 = half-open, 2 = open
+CIRCUIT_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+circuit_state = Gauge(
+    'agent_circuit_breaker_state',
+    'Tool circuit breaker state (0 closed, 1 half-open, 2 open)',
+    ['tool_name'],
+    multiprocess_mode='max'
+)
+
+tool_retries = Counter(
+    'agent_tool_retries_total',
+    'Tool calls retried after a transient upstream failure',
+    ['tool_name']
+)
+
+tool_fast_failures = Counter(
+    'agent_tool_fast_failures_total',
+    'Tool calls failed without (or without finishing) an upstream call',
+    ['tool_name', 'reason']
+)
+
+stale_results = Counter(
+    'agent_stale_results_total',
+    'Expired cached results served while the upstream was failing',
+    ['tool_name']
+)
+
+admission_rejected = Counter(
+    'agent_admission_rejected_total',
+    'Requests or tool calls shed by admission control',
+    ['limit', 'reason']
+)
+
+tool_in_flight = Gauge(
+    'agent_tool_in_flight',
+    'Upstream tool calls currently admitted',
+    ['tool_name'],
+    multiprocess_mode='livesum'
+)
+
+tool_rate_tokens = Gauge(
+    'agent_tool_rate_tokens',
+    'Tokens left in the tool rate-limit bucket',
+    ['tool_name'],
+    multiprocess_mode='livesum'
+)
+
+# Request stages run from ~10 us (routing) to seconds (upstream calls)
+STAGE_BUCKETS = (.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+
+stage_latency = Histogram(
+    'agent_stage_latency_seconds',
+    'Time spent in each stage of a traced request',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+
+class BoundChildren:
+    """
+    Label children of one metric, bound once and then found with a plain
+    dict lookup (labels() validates the values and takes the metric's
+    lock on every call). Unknown label values are bound on first use.
+    """
+    __slots__ = ('metric', 'children')
+    
+    def __init__(self, metric, prebind=()):
+        self.metric = metric
+        self.children = {}
+        for values in prebind:
+            self.get(*values)
+    
+    def get(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self.metric.labels(*values)
+        return child
+
+class MetricAggregator:
+    """
+    Optional aggregation mode: hot-path updates are appended to local
+    queues and applied by a background thread every
+    `flush_interval_seconds` - counter increments summed per child,
+    histogram observations replayed. /metrics and /stats flush first,
+    so scrapes always see every update.
+    """
+    def __init__(self, flush_interval_seconds: float = 1.0):
+        self.flush_interval = flush_interval_seconds
+        self.increments = deque()  # (child, amount)
+        self.observations = deque()  # (child, value)
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-aggregator", daemon=True)
+        self._thread.start()
+    
+    def flush(self):
+        with self._flush_lock:
+            totals = {}
+            increments = self.increments
+            while increments:
+                child, amount = increments.popleft()
+                totals[child] = totals.get(child, 0) + amount
+            for child, amount in totals.items():
+                child.inc(amount)
+            
+            observations = self.observations
+            while observations:
+                child, value = observations.popleft()
+                child.observe(value)
+    
+    def stop(self):
+        self._stopping.set()
+        self._thread.join(self.flush_interval + 1)
+        self.flush()
+    
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+
+def build_aggregator(config: dict):
+    """
+    Create the aggregator from `monitoring.metrics`, or None (update directly).
+    """
+    config = config or {}
+    if not config.get('aggregate', False):
+        return None
+    return MetricAggregator(config.get('flush_interval_seconds', 1.0))
+
+# Global aggregator (None unless monitoring.metrics.aggregate is set)
+aggregator = build_aggregator(_metrics_settings)
+
+def _inc(child, amount: float = 1):
+    if aggregator is None:
+        child.inc(amount)
+    else:
+        aggregator.increments.append((child, amount))
+
+def _observe(child, value: float):
+    if aggregator is None:
+        child.observe(value)
+    else:
+        aggregator.observations.append((child, value))
+
+def flush_metrics():
+    """
+    Apply aggregated updates now (no-op without aggregation).
+    """
+    if aggregator is not None:
+        aggregator.flush()
+
+_request_count_children = BoundChildren(request_count, KNOWN_ENDPOINTS)
+_request_latency_children = BoundChildren(
+    request_latency, [(endpoint, tool) for endpoint in LATENCY_ENDPOINTS for tool in KNOWN_TOOLS]
+)
+_tool_usage_children = BoundChildren(tool_usage, [(tool,) for tool in KNOWN_TOOLS])
+_successful_children = BoundChildren(successful_requests, [(tool,) for tool in KNOWN_TOOLS])
+_error_children = BoundChildren(error_count, [(tool, 'tool_execution_failed') for tool in KNOWN_TOOLS])
+_outcome_children = BoundChildren(requests_processed, [('success',), ('failed',)])
+_stage_children = BoundChildren(stage_latency)
+_in_flight_children = BoundChildren(tool_in_flight)
+_tokens_children = BoundChildren(tool_rate_tokens)
+
+def prepare_multiprocess_dir() -> str:
+    """
+    Create (and empty) the shared metrics directory and export it to
+    worker processes. Call in the launcher before workers start.
+    """
+    directory = Path(os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+                     or settings.get('monitoring', {}).get('prometheus_multiproc_dir', '/tmp/agent-prometheus'))
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob('*.db'):
+        stale.unlink()
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = str(directory)
+    return str(directory)
+
+def mark_worker_dead(pid: int):
+    """
+    Drop a stopped worker's live gauges in multi-worker mode
+    """
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(pid)
+
+def collector_registry():
+    """
+    Registry to read from: aggregated across all workers in multi-worker mode
+    """
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return None
+
+def render_metrics() -> bytes:
+    """
+    Prometheus exposition for /metrics
+    """
+    flush_metrics()
+    registry = collector_registry()
+    return generate_latest(registry) if registry is not None else generate_latest()
+
 def track_request(endpoint: str, method: str = "POST"):
     """
     Decorator to track request metrics
@@ -46,7 +322,7 @@ def track_request(endpoint: str, method: str = "POST"):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # Increment request counter
-            request_count.labels(endpoint=endpoint, method=method).inc()
+            count_request(endpoint, method)
             
             # Track latency
             start_time = time.time()
@@ -56,28 +332,195 @@ def track_request(endpoint: str, method: str = "POST"):
             finally:
                 duration = time.time() - start_time
                 # We'll add tool name after we know which tool was used
-                request_latency.labels(endpoint=endpoint, tool="unknown").observe(duration)
+                track_request_latency(endpoint, "unknown", duration)
         
         return wrapper
     return decorator
 
+def count_request(endpoint: str, method: str = "POST"):
+    """
+    Count one request to an endpoint
+    """
+    _inc(_request_count_children.get(endpoint, method))
+
+def track_request_latency(endpoint: str, tool_name: str, seconds: float):
+    """
+    Record one request's latency by endpoint and tool
+    """
+    _observe(_request_latency_children.get(endpoint, tool_name), seconds)
+
 def track_tool_usage(tool_name: str, success: bool):
     """
     Track which tools are being used and their success rate
     """
-    tool_usage.labels(tool_name=tool_name).inc()
+    _inc(_tool_usage_children.get(tool_name))
     
     if success:
-        successful_requests.labels(tool_name=tool_name).inc()
+        _inc(_successful_children.get(tool_name))
+
+def track_tool_usage_bulk(usage: dict):
+    """
+    Track tool usage for many requests in one update per tool.
+    usage: tool_name -> (total, successful)
+    """
+    for tool_name, (total, successful) in usage.items():
+        _inc(_tool_usage_children.get(tool_name), total)
+        if successful:
+            _inc(_successful_children.get(tool_name), successful)
 
-def track_error(tool_name: str, error_type: str):
+def track_error(tool_name: str, error_type: str, count: int = 1):
     """
     Track errors by tool and type
     """
-    error_count.labels(tool_name=tool_name, error_type=error_type).inc()
+    _inc(_error_children.get(tool_name, error_type), count)
 
 def update_active_users(count: int):
     """
     Update the number of active users
     """
-    active_users.set(count)
\ No newline at end of file
+    active_users.set(count)
+
+# Source of the active-users count in multi-worker mode (see watch_active_users)
+_active_users_source = None
+_active_users_next_refresh = 0.0
+
+def watch_active_users(count_fn):
+    """
+    Report `count_fn()` as the active-users gauge. In a single process
+    it is called only when metrics are collected; multiprocess gauges
+    are read from files, so there refresh_active_users() sets it at
+    most every ACTIVE_USERS_REFRESH_SECONDS instead.
+    """
+    global _active_users_source
+    if MULTIPROCESS_DIR:
+        _active_users_source = count_fn
+    else:
+        active_users.set_function(count_fn)
+
+def refresh_active_users():
+    """
+    Called per request; only does work in multi-worker mode, and rarely.
+    """
+    global _active_users_next_refresh
+    if _active_users_source is None:
+        return
+    now = time.monotonic()
+    if now >= _active_users_next_refresh:
+        _active_users_next_refresh = now + ACTIVE_USERS_REFRESH_SECONDS
+        active_users.set(_active_users_source())
+
+def track_cache_lookup(tool_name: str, hit: bool, coalesced: bool = False):
+    """
+    Track a result-cache lookup
+    """
+    if hit:
+        cache_hits.labels(tool_name=tool_name).inc()
+    elif coalesced:
+        cache_coalesced.labels(tool_name=tool_name).inc()
+    else:
+        cache_misses.labels(tool_name=tool_name).inc()
+
+def track_cache_eviction(tool_name: str, reason: str):
+    """
+    Track a result-cache eviction (reason: expired, lru, size)
+    """
+    cache_evictions.labels(tool_name=tool_name, reason=reason).inc()
+
+def track_mlflow_dropped(reason: str, count: int = 1):
+    """
+    Track MLflow metrics dropped by the background logger (queue_full, flush_failed)
+    """
+    mlflow_dropped.labels(reason=reason).inc(count)
+
+def track_request_log_dropped(count: int = 1):
+    """
+    Track request log records that were never written
+    """
+    request_log_dropped.inc(count)
+
+def track_memory_eviction(reason: str, count: int = 1):
+    """
+    Track users evicted from conversation memory (reason: lru, idle),
+    or turns dropped by a full SQLite write queue (reason: dropped)
+    """
+    memory_evictions.labels(reason=reason).inc(count)
+
+def track_request_outcome(successful: int = 0, failed: int = 0):
+    """
+    Count processed queries for /stats
+    """
+    if successful:
+        _inc(_outcome_children.get('success'), successful)
+    if failed:
+        _inc(_outcome_children.get('failed'), failed)
+
+def read_request_stats() -> dict:
+    """
+    Query totals for /stats, summed across workers in multi-worker mode
+    """
+    flush_metrics()
+    registry = collector_registry()
+    families = registry.collect() if registry is not None else requests_processed.collect()
+    
+    totals = {'success': 0, 'failed': 0}
+    for family in families:
+        if family.name != 'agent_requests_processed':
+            continue
+        for sample in family.samples:
+            if sample.name == 'agent_requests_processed_total':
+                totals[sample.labels['outcome']] += sample.value
+    
+    return {
+        "total_requests": int(totals['success'] + totals['failed']),
+        "successful_requests": int(totals['success']),
+        "failed_requests": int(totals['failed'])
+    }
+
+def track_circuit_state(tool_name: str, state: str):
+    """
+    Export a circuit breaker state change (closed, half_open, open)
+    """
+    circuit_state.labels(tool_name=tool_name).set(CIRCUIT_STATES[state])
+
+def track_tool_retry(tool_name: str):
+    """
+    Track a retried tool call
+    """
+    tool_retries.labels(tool_name=tool_name).inc()
+
+def track_fast_failure(tool_name: str, reason: str):
+    """
+    Track a tool call cut short (reason: circuit_open, deadline, budget)
+    """
+    tool_fast_failures.labels(tool_name=tool_name, reason=reason).inc()
+
+def track_stale_result(tool_name: str):
+    """
+    Track an expired cached result served in place of a failure
+    """
+    stale_results.labels(tool_name=tool_name).inc()
+
+def track_admission_rejected(limit: str, reason: str):
+    """
+    Track a shed request (limit: "user" or a tool name; reason: rate, in_flight)
+    """
+    admission_rejected.labels(limit=limit, reason=reason).inc()
+
+def track_tool_in_flight(tool_name: str, delta: int):
+    """
+    Track admitted upstream calls starting (+1) and finishing (-1)
+    """
+    _in_flight_children.get(tool_name).inc(delta)
+
+def track_tool_tokens(tool_name: str, tokens: float):
+    """
+    Export the tokens left in a tool's rate-limit bucket
+    """
+    _tokens_children.get(tool_name).set(tokens)
+
+def track_stage_latencies(durations: dict):
+    """
+    Record one traced request's time per stage (stage -> seconds)
+    """
+    for stage, seconds in durations.items():
+        _observe(_stage_children.get(stage), seconds)
@@ -0,0 +1,155 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from config.settings import settings
+from monitoring.metrics import track_request_log_dropped
+
+class RequestLog:
+    """
+    Append one JSON line per answered query to a size-rotated log.
+    Requests only put a tuple on a bounded queue; a worker thread does
+    the JSON encoding and file writes, flushing every
+    `flush_interval_seconds` or `batch_size` records. When the queue is
+    full, records are dropped and counted instead of blocking.
+    Rotation keeps `backup_count` old files: path.1 (newest) ... path.N.
+    """
+    def __init__(self, path: str, max_bytes: int = 100 * 1024 * 1024, backup_count: int = 5,
+                 queue_size: int = 10000, batch_size: int = 500, flush_interval_seconds: float = 1.0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_seconds
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._file = None
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+    
+    def log(self, endpoint: str, user_id: str, query: str, tool: str, params: dict, latency: float, success: bool):
+        """
+        Queue a record; never blocks. The writer thread starts on first use.
+        """
+        if self._thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait((time.time(), endpoint, user_id, query, tool, params, latency, success))
+        except queue.Full:
+            self.dropped += 1
+            track_request_log_dropped()
+    
+    def stop(self, timeout: float = 5.0):
+        """
+        Write everything still queued and stop the worker.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        try:
+            self.queue.put_nowait(None)  # wake the worker
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+    
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)  # flush what is queued even without a shutdown event
+    
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        
+        while not (self._stopping.is_set() and self.queue.empty()):
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is not None:
+                    pending.append(item)
+            except queue.Empty:
+                pass
+            
+            if len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(pending)
+                pending = []
+                deadline = time.monotonic() + self.flush_interval
+        
+        self._write(pending)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _write(self, records: list):
+        if not records:
+            return
+        
+        lines = "".join(
+            json.dumps({
+                "ts": round(ts, 6),
+                "endpoint": endpoint,
+                "user_id": user_id,
+                "query": query,
+                "tool": tool,
+                "params": params,
+                "latency_ms": round(latency * 1000, 3),
+                "success": success
+            }, default=str) + "\n"
+            for ts, endpoint, user_id, query, tool, params, latency, success in records
+        )
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(lines)
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            self.dropped += len(records)
+            track_request_log_dropped(len(records))
+            print(f"⚠️ Request log write failed: {e}")
+    
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+def build_request_log(config: dict):
+    """
+    Create the request log from `monitoring.request_log`, or None when
+    disabled. A relative path is resolved against the project root. With
+    several workers each one writes its own file (requests.<pid>.jsonl),
+    so rotation never races.
+    """
+    config = config or {}
+    if not config.get('enabled', False):
+        return None
+    
+    path = Path(__file__).parent.parent / config.get('path', 'data/requests.jsonl')
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        path = path.with_name(f"{path.stem}.{os.getpid()}{path.suffix}")
+    return RequestLog(
+        path,
+        max_bytes=config.get('max_bytes', 100 * 1024 * 1024),
+        backup_count=config.get('backup_count', 5),
+        queue_size=config.get('queue_size', 10000),
+        batch_size=config.get('batch_size', 500),
+        flush_interval_seconds=config.get('flush_interval_seconds', 1.0)
+    )
+
+# Global request log (None when disabled in settings)
+request_log = build_request_log((settings.get('monitoring') or {}).get('request_log'))
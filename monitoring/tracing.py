@@ -0,0 +1,220 @@
+import contextvars
+import random
+import time
+from pathlib import Path
+
+from config.settings import settings
+from monitoring.metrics import track_stage_latencies
+
+_tracing_settings = (settings.get('monitoring') or {}).get('tracing') or {}
+
+# Fraction of requests timed stage by stage (histogram + Server-Timing)
+SAMPLE_RATIO = _tracing_settings.get('sample_ratio', 0.01)
+SERVER_TIMING = _tracing_settings.get('server_timing', True)
+
+# Endpoints that get traced (path prefixes)
+TRACED_PATHS = ('/ask',)
+
+# Trace of the request being handled, if it was sampled
+_current = contextvars.ContextVar('request_trace', default=None)
+
+class RequestTrace:
+    """
+    Stage timings for one request: (stage, start, end) in perf_counter
+    seconds, plus the wall-clock start for exporting spans.
+    """
+    __slots__ = ('name', 'start', 'start_ns', 'end', 'handler_end', 'stages')
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.end = None
+        self.handler_end = None
+        self.stages = []
+    
+    def finish(self):
+        """
+        Mark the response as started; time after the handler returned
+        (response model validation and JSON encoding) becomes "serialize".
+        """
+        if self.end is None:
+            self.end = time.perf_counter()
+            if self.handler_end is not None:
+                self.stages.append(("serialize", self.handler_end, self.end))
+    
+    def durations(self) -> dict:
+        """
+        Total seconds per stage, in first-seen order (retries and batch
+        items add up under one name).
+        """
+        totals = {}
+        for name, start, end in self.stages:
+            totals[name] = totals.get(name, 0.0) + (end - start)
+        return totals
+    
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value, durations in milliseconds.
+        """
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.durations().items()]
+        parts.append(f"total;dur={((self.end or time.perf_counter()) - self.start) * 1000:.3f}")
+        return ", ".join(parts)
+    
+    def to_ns(self, moment: float) -> int:
+        return self.start_ns + int((moment - self.start) * 1e9)
+
+class _Stage:
+    __slots__ = ('trace', 'name', 'start')
+    
+    def __init__(self, trace: RequestTrace, name: str):
+        self.trace = trace
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.trace.stages.append((self.name, self.start, time.perf_counter()))
+
+class _NoStage:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        pass
+
+_NO_STAGE = _NoStage()
+
+def stage(name: str):
+    """
+    Time a block as one stage of the current request:
+        with stage("route"): ...
+    Outside a sampled request this is a shared no-op context manager.
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NO_STAGE
+    return _Stage(trace, name)
+
+def handler_done():
+    """
+    Called by an endpoint just before it returns its response model.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.handler_end = time.perf_counter()
+
+class SpanExporter:
+    """
+    Export sampled request traces as OpenTelemetry spans: one span per
+    request with a child per stage, built from the recorded timings
+    after the response, so nothing OpenTelemetry runs on the hot path.
+    exporter: "otlp" (OTLP/HTTP to `endpoint`) or "file" (JSON lines).
+    Needs opentelemetry-sdk (and opentelemetry-exporter-otlp-proto-http
+    for "otlp").
+    """
+    def __init__(self, exporter: str, endpoint: str = None, file_path: str = None, sample_ratio: float = 1.0,
+                 service_name: str = "tool-agent"):
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        from opentelemetry.trace import set_span_in_context
+        
+        self._file = None
+        if exporter == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            span_exporter = OTLPSpanExporter(endpoint=endpoint) if endpoint else OTLPSpanExporter()
+        elif exporter == "file":
+            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(file_path, "a")
+            span_exporter = ConsoleSpanExporter(out=self._file, formatter=lambda span: span.to_json(indent=None) + "\n")
+        else:
+            raise ValueError(f"Unknown span exporter: {exporter}")
+        
+        self.provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        self.provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        self.tracer = self.provider.get_tracer("agent.tracing")
+        self.sample_ratio = sample_ratio
+        self._set_span_in_context = set_span_in_context
+    
+    def export(self, trace: RequestTrace):
+        if random.random() >= self.sample_ratio:
+            return
+        root = self.tracer.start_span(trace.name, start_time=trace.start_ns)
+        context = self._set_span_in_context(root)
+        for name, start, end in trace.stages:
+            self.tracer.start_span(name, context=context, start_time=trace.to_ns(start)).end(end_time=trace.to_ns(end))
+        root.end(end_time=trace.to_ns(trace.end))
+    
+    def shutdown(self):
+        """
+        Flush pending spans, then close the span file (if any).
+        """
+        self.provider.shutdown()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def build_span_exporter(config: dict):
+    """
+    Create the span exporter from `monitoring.tracing.otel`, or None
+    when disabled, OpenTelemetry is not installed or the span file
+    cannot be opened.
+    """
+    exporter = (config or {}).get('exporter') or 'none'
+    if exporter == 'none':
+        return None
+    try:
+        return SpanExporter(exporter, endpoint=config.get('endpoint'), file_path=config.get('file_path', 'data/spans.jsonl'),
+                            sample_ratio=config.get('sample_ratio', 1.0))
+    except ImportError as e:
+        print(f"⚠️ OpenTelemetry export disabled ({e}); install opentelemetry-sdk to enable it")
+        return None
+    except OSError as e:
+        print(f"⚠️ OpenTelemetry export disabled: cannot open span file ({e})")
+        return None
+
+class TracingMiddleware:
+    """
+    ASGI middleware: samples requests to TRACED_PATHS, makes their
+    trace current for stage(), adds a Server-Timing header and records
+    the stage histogram (and spans, if an exporter is configured).
+    """
+    def __init__(self, app, sample_ratio: float = SAMPLE_RATIO, server_timing: bool = SERVER_TIMING,
+                 paths: tuple = TRACED_PATHS, exporter: SpanExporter = None):
+        self.app = app
+        self.sample_ratio = sample_ratio
+        self.server_timing = server_timing
+        self.paths = paths
+        self.exporter = exporter
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.paths) or random.random() >= self.sample_ratio:
+            return await self.app(scope, receive, send)
+        
+        trace = RequestTrace(f"{scope['method']} {scope['path']}")
+        token = _current.set(trace)
+        
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                trace.finish()
+                if self.server_timing:
+                    message = {**message, 'headers': [*message.get('headers', []),
+                                                      (b'server-timing', trace.server_timing().encode())]}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            trace.finish()
+            track_stage_latencies(trace.durations())
+            if self.exporter is not None:
+                self.exporter.export(trace)
+
+# Global span exporter (None unless monitoring.tracing.otel.exporter is set)
+span_exporter = build_span_exporter(_tracing_settings.get('otel'))
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import admission
+from agent.admission import RateLimited, UserRateLimiter
+
+def test_batches_are_charged_per_query():
+    limiter = UserRateLimiter(rate_per_second=5, burst=20)
+    limiter.admit({'alice': 15})
+    with pytest.raises(RateLimited) as rejected:
+        limiter.admit({'alice': 15})
+    assert rejected.value.status_code == 429 and rejected.value.reason == 'rate'
+    limiter.admit({'bob': 20})
+
+def test_batch_larger_than_burst_waits_for_a_full_bucket_and_leaves_debt(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: clock[0])
+    limiter = UserRateLimiter(rate_per_second=5, burst=20)
+    limiter.admit({'alice': 1})
+    with pytest.raises(RateLimited):
+        limiter.admit({'alice': 100})  # needs a full bucket
+    clock[0] += 0.2
+    limiter.admit({'alice': 100})
+    
+    clock[0] += 10  # 50 of the 100 tokens paid back
+    with pytest.raises(RateLimited) as rejected:
+        limiter.admit({'alice': 1})
+    assert rejected.value.retry_after == pytest.approx(6.2)
+
+def test_repeated_batches_stay_within_the_rate(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: clock[0])
+    limiter = UserRateLimiter(rate_per_second=5, burst=20)
+    admitted = 0
+    for _ in range(200):  # a 50-query batch every 0.1 s for 20 s
+        try:
+            limiter.admit({'alice': 50})
+            admitted += 50
+        except RateLimited:
+            pass
+        clock[0] += 0.1
+    assert admitted <= 50 + 5 * 20
+
+@pytest.fixture
+def app(monkeypatch):
+    import main
+    monkeypatch.setattr(main, 'request_log', None)
+    monkeypatch.setattr(main, 'user_limiter', UserRateLimiter(rate_per_second=5, burst=20))
+    return main.app
+
+async def post_all(app, path: str, bodies: list) -> list:
+    import httpx
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return [(await client.post(path, json=body)).status_code for body in bodies]
+
+def test_anonymous_requests_are_limited_per_client_not_shared(app):
+    import main
+    statuses = asyncio.run(post_all(app, "/ask", [{"query": "Calculate 1 + 1"}] * 21))
+    assert statuses == [200] * 20 + [429]
+    assert "client:10.0.0.1" in main.user_limiter.buckets
+    assert "default_user" not in main.user_limiter.buckets
+
+def test_batch_up_to_batch_max_items_is_admitted(app):
+    import main
+    batch = [{"query": f"Calculate {i} + 1", "user_id": "alice"} for i in range(main.BATCH_MAX_ITEMS)]
+    assert asyncio.run(post_all(app, "/ask/batch", [batch, batch[:1]])) == [200, 429]
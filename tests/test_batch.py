@@ -0,0 +1,24 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.cache import make_key
+from agent.logic import process_batch
+
+def test_batch_keeps_queries_differing_in_punctuation_apart():
+    responses = asyncio.run(process_batch(["calculate .5+1", "calculate 5+1", "calculate 2*3.", "calculate 2*3"]))
+    results = [response['result']['result'] for response in responses]
+    assert results == [1.5, 6, 6.0, 6]
+    assert type(results[2]) is float and type(results[3]) is int
+    assert responses[2]['params'] == {'expression': '2*3.'}
+
+def test_batch_still_runs_identical_queries_once():
+    responses = asyncio.run(process_batch(["calculate 5+1", "calculate 5+1"]))
+    assert responses[0]['result'] is responses[1]['result']
+
+def test_cache_key_normalizes_city_only():
+    assert make_key('weather', {'city': 'Paris?'}) == make_key('weather', {'city': ' paris '})
+    assert make_key('wikipedia', {'query': '.net'}) != make_key('wikipedia', {'query': 'net'})
+    assert make_key('calculator', {'expression': '.5+1'}) != make_key('calculator', {'expression': '5+1'})
@@ -0,0 +1,63 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.cache import ResultCache
+
+def test_followers_survive_a_cancelled_leader():
+    cache = ResultCache({'wikipedia': 60})
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'success': True, 'title': 'Alan Turing'}
+    
+    async def scenario():
+        leader = asyncio.create_task(cache.get_or_compute('wikipedia', {'query': 'alan turing'}, compute))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.get_or_compute('wikipedia', {'query': 'alan turing'}, compute))
+                     for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        return results
+    
+    results = asyncio.run(scenario())
+    assert results == [{'success': True, 'title': 'Alan Turing'}] * 3
+    assert len(calls) == 2  # the cancelled leader's call, then one takeover
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    cache = ResultCache({'wikipedia': 60})
+    
+    async def compute():
+        await asyncio.sleep(0.05)
+        return {'success': True}
+    
+    async def scenario():
+        leader = asyncio.create_task(cache.get_or_compute('wikipedia', {'query': 'x'}, compute))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(cache.get_or_compute('wikipedia', {'query': 'x'}, compute))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        result = await leader
+        assert follower.cancelled()
+        return result
+    
+    assert asyncio.run(scenario()) == {'success': True}
+
+def test_failures_reach_followers():
+    cache = ResultCache({'wikipedia': 60})
+    
+    async def compute():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("upstream down")
+    
+    async def scenario():
+        tasks = [asyncio.create_task(cache.get_or_compute('wikipedia', {'query': 'x'}, compute)) for _ in range(3)]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
@@ -0,0 +1,41 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.registry import registry
+from tools.calculator import MAX_LIST_ITEMS, calculate, calculate_batch, compile_expression, run
+
+def number_list(name: str, numbers) -> str:
+    return f"{name}({', '.join(str(number) for number in numbers)})"
+
+def test_long_lists_run_off_the_event_loop():
+    expression = number_list('sum', range(5000))
+    assert asyncio.iscoroutine(pending := run({'expression': expression}))
+    assert asyncio.run(pending)['result'] == sum(range(5000))
+    assert run({'expression': '2 + 2'})['result'] == 4
+
+def test_long_list_limits_and_overflow():
+    assert calculate(number_list('max', range(MAX_LIST_ITEMS + 1)))['error'] == f"Too many numbers (limit {MAX_LIST_ITEMS})"
+    assert calculate(number_list('sum', [1, 10 ** 20] + [0] * 400))['result'] == 1e20 + 1
+    assert calculate(number_list('min', [-10 ** 20] + [0] * 400))['result'] == -1e20
+
+def test_registry_awaits_offloaded_results():
+    result = asyncio.run(registry.get('calculator').execute({'expression': number_list('mean', [2] * 1000)}))
+    assert result['result'] == 2.0
+
+def test_expressions_compile_from_their_second_sighting():
+    compile_expression.cache_clear()
+    assert calculate('7 * (6 + 1) - 0.5')['result'] == 48.5
+    assert compile_expression.cache_info().currsize == 0
+    assert calculate('7 * (6 + 1) - 0.5')['result'] == 48.5
+    assert compile_expression.cache_info().currsize == 1
+    assert calculate('7 * (6 + 1) - 0.5')['result'] == 48.5
+    assert compile_expression.cache_info().hits == 1
+
+def test_first_sighting_keeps_the_safety_limits():
+    assert calculate('9 ** 9 ** 9 + 0')['error'].startswith('Exponent too large')
+    assert calculate('x + 1 ')['error'] == 'Unknown name: x'
+    assert calculate('  sqrt(16) + sum([1, 2, pi - pi])')['result'] == 7.0
+    assert calculate_batch('x * 2 + 1', {'x': [1, 2]})['result'] == [3.0, 5.0]
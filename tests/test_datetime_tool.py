@@ -0,0 +1,28 @@
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools import datetime_tool
+from tools.datetime_tool import parse_date
+
+class FakeDate(date):
+    current = date(2024, 3, 5)
+    
+    @classmethod
+    def today(cls):
+        return cls.current
+
+def test_relative_formats_follow_the_current_day(monkeypatch):
+    monkeypatch.setattr(datetime_tool, 'date', FakeDate)
+    assert parse_date("5pm") == datetime(2024, 3, 5, 17, 0)
+    assert parse_date("friday") == datetime(2024, 3, 8)
+    
+    FakeDate.current = date(2024, 3, 9)
+    assert parse_date("5pm") == datetime(2024, 3, 9, 17, 0)
+    assert parse_date("friday") == datetime(2024, 3, 15)
+
+def test_absolute_formats():
+    assert parse_date("2024-03-05") == datetime(2024, 3, 5)
+    assert parse_date(" March 5, 2024 ") == datetime(2024, 3, 5)
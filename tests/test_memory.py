@@ -0,0 +1,92 @@
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.memory import ConversationMemory, SQLiteMemory
+
+RESPONSE = {"tool_used": "calculator", "params": {"expression": "1 + 1"}, "result": {"success": True, "result": 2}}
+
+def test_sqlite_writes_are_visible_after_flush(tmp_path):
+    memory = SQLiteMemory(tmp_path / "memory.db", max_history=2)
+    for i in range(3):
+        memory.add_interaction("alice", f"Calculate {i} + 1", RESPONSE)
+    memory.flush()
+    
+    assert [turn["query"] for turn in memory.get_history("alice")] == ["Calculate 1 + 1", "Calculate 2 + 1"]
+    memory.close()
+
+def test_sqlite_clear_waits_for_queued_writes(tmp_path):
+    memory = SQLiteMemory(tmp_path / "memory.db")
+    memory.add_interaction("alice", "Calculate 1 + 1", RESPONSE)
+    memory.clear_history("alice")
+    memory.flush()
+    
+    assert memory.get_history("alice") == []
+    memory.close()
+
+def test_sqlite_add_does_not_wait_for_a_locked_database(tmp_path):
+    memory = SQLiteMemory(tmp_path / "memory.db")
+    memory.add_interaction("alice", "Calculate 1 + 1", RESPONSE)
+    memory.flush()
+    
+    # Another connection holds the write lock, as a busy worker would
+    other = sqlite3.connect(tmp_path / "memory.db", check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    memory.add_interaction("bob", "Calculate 2 + 2", RESPONSE)
+    assert time.perf_counter() - start < 0.1
+    
+    threading.Timer(0.2, other.rollback).start()
+    memory.flush()
+    assert len(memory.get_history("bob")) == 1
+    memory.close()
+
+def test_sqlite_full_write_queue_drops_turns(tmp_path, monkeypatch):
+    dropped = []
+    monkeypatch.setattr("agent.memory.track_memory_eviction", lambda reason, count=1: dropped.append((reason, count)))
+    memory = SQLiteMemory(tmp_path / "memory.db", write_queue_size=1)
+    memory._writer = threading.current_thread()  # no writer draining the queue
+    memory._writes.put_nowait(("add", time.time(), []))
+    
+    memory.add_interactions([("alice", "Calculate 1 + 1", RESPONSE)] * 2)
+    
+    assert dropped == [("dropped", 2)]
+
+@pytest.mark.parametrize("max_users, shards", [(4, 16), (100, 16), (1, 1), (17, 4)])
+def test_user_cap_holds_across_shards(max_users, shards):
+    memory = ConversationMemory(max_users=max_users, shards=shards)
+    memory.add_interactions([(f"user_{i}", "Calculate 1 + 1", RESPONSE) for i in range(10 * max_users + 50)])
+    
+    assert memory.user_count() == max_users
+
+def test_filling_exactly_max_users_evicts_nobody():
+    memory = ConversationMemory(max_users=2000, shards=16)
+    for i in range(2000):
+        memory.add_interaction(f"user_{i}", "Calculate 1 + 1", RESPONSE)
+    
+    assert memory.user_count() == 2000
+    assert all(memory.get_history(f"user_{i}") for i in range(2000))
+
+def test_sharded_memory_evicts_the_least_recently_active_user():
+    memory = ConversationMemory(max_users=50, shards=16)
+    for i in range(50):
+        memory.add_interaction(f"user_{i}", "Calculate 1 + 1", RESPONSE)
+    memory.add_interaction("user_0", "Calculate 2 + 2", RESPONSE)  # user_1 is now the oldest
+    memory.add_interaction("newcomer", "Calculate 1 + 1", RESPONSE)
+    
+    assert memory.get_history("user_1") == []
+    assert len(memory.get_history("user_0")) == 2 and memory.get_history("newcomer")
+
+def test_single_shard_evicts_least_recently_active():
+    memory = ConversationMemory(max_users=2, shards=1)
+    for user_id in ("alice", "bob", "alice", "carol"):
+        memory.add_interaction(user_id, "Calculate 1 + 1", RESPONSE)
+    
+    assert memory.get_history("bob") == []
+    assert len(memory.get_history("alice")) == 2
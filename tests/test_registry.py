@@ -0,0 +1,76 @@
+import asyncio
+import importlib.metadata
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.registry import ENTRY_POINT_GROUP, ToolRegistry, ToolSpec, build_registry
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+PLUGIN_MODULE = '''
+from agent.registry import ToolSpec
+
+def run(params):
+    return {"success": True, "result": params["amount"] * 2}
+
+def extract_params(query_lower, stripped):
+    return {"amount": float(stripped.split()[-1])}
+
+DOUBLER = ToolSpec("doubler", "{module}:run", "{module}:extract_params",
+                   routes=[{"keywords": ["double"], "strip": ["double"]}], cache_ttl_seconds=60)
+'''
+
+class FakeEntryPoint:
+    def __init__(self, name: str, value: str):
+        self.name = name
+        self.value = value
+    
+    def load(self):
+        module_name, _, attribute = self.value.partition(':')
+        return getattr(importlib.import_module(module_name), attribute)
+
+def write_plugin(tmp_path, monkeypatch, module: str) -> str:
+    (tmp_path / f"{module}.py").write_text(PLUGIN_MODULE.replace("{module}", module))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return module
+
+def test_bundled_tool_modules_are_not_imported_at_startup():
+    code = ("import sys; import agent.logic; "
+            "print(sorted(m for m in ('tools.weather', 'tools.wiki', 'httpx', 'requests') if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "[]"
+
+def test_tool_module_is_imported_on_first_use(tmp_path, monkeypatch):
+    write_plugin(tmp_path, monkeypatch, "lazy_doubler")
+    spec = ToolSpec("doubler", "lazy_doubler:run", "lazy_doubler:extract_params")
+    registry = ToolRegistry([spec])
+    assert "lazy_doubler" not in sys.modules
+    
+    assert registry.get("doubler").extract("double 21", "21") == {"amount": 21.0}
+    assert "lazy_doubler" in sys.modules
+    assert asyncio.run(registry.get("doubler").execute({"amount": 21.0}))["result"] == 42.0
+
+def test_entry_point_plugins_are_registered(tmp_path, monkeypatch, capsys):
+    write_plugin(tmp_path, monkeypatch, "ep_doubler")
+    entry_points = [FakeEntryPoint("doubler", "ep_doubler:DOUBLER"), FakeEntryPoint("broken", "missing_plugin:SPEC")]
+    monkeypatch.setattr(importlib.metadata, "entry_points",
+                        lambda group: entry_points if group == ENTRY_POINT_GROUP else [])
+    
+    registry = build_registry({'tools': ['calculator']})
+    assert set(registry.tools) == {"calculator", "doubler"}
+    assert "Could not load tool plugin broken" in capsys.readouterr().out
+    assert registry.routes([{'tool': 'calculator', 'keywords': ['calculate']}])[-1]['tool'] == "doubler"
+    assert registry.cache_ttls({}) == {"doubler": 60}
+    assert registry.cache_ttls({"doubler": 5}) == {"doubler": 5}
+    
+    assert set(build_registry({'tools': ['calculator'], 'tool_plugins': False}).tools) == {"calculator"}
+
+def test_configured_tools_by_name_or_path(tmp_path, monkeypatch, capsys):
+    write_plugin(tmp_path, monkeypatch, "path_doubler")
+    registry = build_registry({'tools': ['weather', 'path_doubler:DOUBLER', 'nope'], 'tool_plugins': False})
+    assert set(registry.tools) == {"weather", "doubler"}
+    assert registry.is_io("weather") and not registry.is_io("doubler")
+    assert "Unknown tool in agent.tools: nope" in capsys.readouterr().out
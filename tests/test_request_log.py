@@ -0,0 +1,56 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from monitoring.request_log import RequestLog, build_request_log
+
+def log_queries(request_log: RequestLog, queries):
+    for query in queries:
+        request_log.log("/ask", "u1", query, "calculator", {"expression": query}, 0.001, True)
+
+def read_queries(path: Path) -> list:
+    return [json.loads(line)["query"] for line in path.read_text().splitlines()]
+
+def test_records_are_written_as_json_lines(tmp_path):
+    request_log = RequestLog(tmp_path / "logs" / "requests.jsonl", flush_interval_seconds=0.05)
+    log_queries(request_log, ["1 + 1", "2 + 2"])
+    request_log.stop()
+    
+    record = json.loads((tmp_path / "logs" / "requests.jsonl").read_text().splitlines()[0])
+    assert record["endpoint"] == "/ask" and record["user_id"] == "u1" and record["tool"] == "calculator"
+    assert record["params"] == {"expression": "1 + 1"} and record["latency_ms"] == 1.0 and record["success"] is True
+    assert read_queries(tmp_path / "logs" / "requests.jsonl") == ["1 + 1", "2 + 2"]
+
+def test_rotation_keeps_backup_count_files(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    request_log = RequestLog(path, max_bytes=1, backup_count=2, batch_size=1)
+    log_queries(request_log, ["q1", "q2", "q3", "q4"])
+    request_log.stop()
+    
+    assert read_queries(path.with_name("requests.jsonl.1")) == ["q4"]
+    assert read_queries(path.with_name("requests.jsonl.2")) == ["q3"]
+    assert not path.with_name("requests.jsonl.3").exists()
+    assert not path.exists()
+
+def test_full_queue_drops_records_instead_of_blocking(tmp_path, monkeypatch):
+    path = tmp_path / "requests.jsonl"
+    request_log = RequestLog(path, queue_size=2)
+    monkeypatch.setattr(request_log, "_start", lambda: None)  # hold the writer so the queue fills
+    log_queries(request_log, ["q1", "q2", "q3", "q4", "q5"])
+    assert request_log.dropped == 3
+    
+    monkeypatch.undo()
+    request_log._start()
+    request_log.stop()
+    assert read_queries(path) == ["q1", "q2"]
+
+def test_build_resolves_relative_paths_against_the_project_root(monkeypatch, tmp_path):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert build_request_log({"path": "data/requests.jsonl"}) is None
+    
+    request_log = build_request_log({"enabled": True, "path": "data/requests.jsonl"})
+    assert request_log.path == Path(__file__).parent.parent / "data" / "requests.jsonl"
+    assert build_request_log({"enabled": True, "path": str(tmp_path / "r.jsonl")}).path == tmp_path / "r.jsonl"
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import resilience
+from agent.resilience import CircuitBreaker, RetryBudget, ToolGuard, ToolUnavailable
+
+class FaultyUpstream:
+    """
+    Stand-in tool call: healthy, failing with a retryable 503 (after
+    `latency` seconds), or hanging.
+    """
+    def __init__(self, mode: str = "healthy", hang_seconds: float = 1.0, latency: float = 0.0):
+        self.mode = mode
+        self.hang_seconds = hang_seconds
+        self.latency = latency
+        self.calls = 0
+    
+    async def __call__(self) -> dict:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.mode == "error":
+            return {'success': False, 'error': '503 Service Unavailable', 'retryable': True}
+        if self.mode == "hang":
+            await asyncio.sleep(self.hang_seconds)
+        return {'success': True}
+
+def guard(**options) -> ToolGuard:
+    breaker = CircuitBreaker('weather', failure_threshold=options.pop('failure_threshold', 3), reset_seconds=10)
+    return ToolGuard('weather', breaker=breaker, **{'max_retries': 0, 'backoff_seconds': 0, **options})
+
+def call(tool_guard: ToolGuard, upstream: FaultyUpstream):
+    return asyncio.run(tool_guard.call(upstream))
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_breaker_opens_after_failure_threshold(clock):
+    tool_guard, upstream = guard(), FaultyUpstream("error")
+    for _ in range(3):
+        with pytest.raises(ToolUnavailable) as failed:
+            call(tool_guard, upstream)
+        assert failed.value.reason == "exhausted"
+    
+    with pytest.raises(ToolUnavailable) as failed:
+        call(tool_guard, upstream)
+    assert failed.value.reason == "circuit_open"
+    assert upstream.calls == 3 and tool_guard.breaker.state == "open"
+
+def test_half_open_probe_recovers_the_breaker(clock):
+    tool_guard, upstream = guard(), FaultyUpstream("error")
+    for _ in range(3):
+        with pytest.raises(ToolUnavailable):
+            call(tool_guard, upstream)
+    
+    clock[0] += 10
+    with pytest.raises(ToolUnavailable):
+        call(tool_guard, upstream)  # the probe fails: open again
+    assert tool_guard.breaker.state == "open"
+    
+    clock[0] += 10
+    upstream.mode = "healthy"
+    assert call(tool_guard, upstream) == {'success': True}
+    assert tool_guard.breaker.state == "closed"
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.0, max_tokens=2)
+    tool_guard, upstream = guard(max_retries=10, failure_threshold=100, budget=budget), FaultyUpstream("error")
+    with pytest.raises(ToolUnavailable) as failed:
+        call(tool_guard, upstream)
+    assert failed.value.reason == "budget"
+    assert upstream.calls == 3  # the first attempt and two budgeted retries
+
+def test_deadline_covers_retries():
+    tool_guard, upstream = guard(timeout_seconds=0.25, max_retries=10, failure_threshold=100), FaultyUpstream("error", latency=0.1)
+    start = time.perf_counter()
+    with pytest.raises(ToolUnavailable) as failed:
+        call(tool_guard, upstream)
+    assert failed.value.reason == "deadline"
+    assert time.perf_counter() - start < 0.4
+    assert upstream.calls == 3  # the third attempt is cut off by the deadline
+
+def test_deadline_cuts_off_a_hanging_call():
+    tool_guard, upstream = guard(timeout_seconds=0.2, max_retries=10, failure_threshold=100), FaultyUpstream("hang")
+    start = time.perf_counter()
+    with pytest.raises(ToolUnavailable) as failed:
+        call(tool_guard, upstream)
+    assert failed.value.reason == "deadline"
+    assert time.perf_counter() - start < 0.5
+    assert upstream.calls == 1  # no retry once the deadline has passed
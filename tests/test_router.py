@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.logic import extract_params
+from agent.router import router
+from tools.calculator import AGGREGATE_FUNCTIONS
+
+@pytest.mark.parametrize("query, tool", [
+    # Loose date phrases inside other questions
+    ("Who is the best player of all time in tennis", "wikipedia"),
+    ("What is the weather forecast for 3 days from now in Paris", "weather"),
+    ("Tell me about the greatest album of all time in rock", "wikipedia"),
+    # Date math and time zones
+    ("What time is it in Tokyo?", "datetime"),
+    ("what is the time in utc", "datetime"),
+    ("time in new york", "datetime"),
+    ("10 days from 2024-01-01", "datetime"),
+    ("What date is 2 weeks before today?", "datetime"),
+    ("difference between 2024-01-01 and 2024-12-31", "datetime"),
+    ("What is the current date?", "datetime"),
+    # Other tools
+    ("Calculate 25 + 17", "calculator"),
+    ("weather in Paris", "weather"),
+    ("Hello, how are you?", "unknown"),
+])
+def test_route(query, tool):
+    assert router.route(query)[0] == tool
+
+@pytest.mark.parametrize("query, params", [
+    ("What time is it in Tokyo?", {'timezone': 'tokyo'}),
+    ("10 days from 2024-01-01", {'date': '2024-01-01', 'days': 10}),
+    ("What date is 2 weeks before today?", {'date': 'today', 'days': -14}),
+    ("difference between 2024-01-01 and 2024-12-31", {'date1': '2024-01-01', 'date2': '2024-12-31'}),
+])
+def test_datetime_params(query, params):
+    tool, spans = router.route(query)
+    assert extract_params(query, tool, spans) == params
+
+@pytest.mark.parametrize("name", sorted(AGGREGATE_FUNCTIONS))
+def test_every_aggregate_phrase_routes_to_calculator(name):
+    query = f"What is the {name} of 3, 9 and 2?"
+    tool, spans = router.route(query)
+    assert tool == 'calculator'
+    assert extract_params(query, tool, spans) == {'expression': f"{AGGREGATE_FUNCTIONS[name]}(3, 9, 2)"}
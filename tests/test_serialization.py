@@ -0,0 +1,78 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import serialization
+from agent.memory import ConversationMemory
+from agent.serialization import ENCODERS, encode_with_raw, json_dumps, negotiated_response, response_format
+
+RESPONSE = {"tool_used": "calculator", "params": {"expression": "1 + 1"}, "result": {"success": True, "result": 2}}
+
+def test_json_falls_back_for_what_orjson_rejects():
+    assert json_dumps({"result": 2 ** 70, "ok": True}) == b'{"result":1180591620717411303424,"ok":true}'
+    assert json.loads(json_dumps({"city": "Zürich", 1: [1.5, None]})) == {"city": "Zürich", "1": [1.5, None]}
+
+@pytest.mark.parametrize("enabled, accept, kind", [
+    (False, "application/msgpack", "json"),
+    (True, "application/msgpack", "msgpack"),
+    (True, "application/json", "json"),
+    (True, None, "json"),
+])
+def test_msgpack_is_negotiated_only_when_enabled(monkeypatch, enabled, accept, kind):
+    monkeypatch.setattr(serialization, "MSGPACK_ENABLED", enabled)
+    assert response_format(accept) == kind
+
+def test_negotiated_json_response(monkeypatch):
+    monkeypatch.setattr(serialization, "MSGPACK_ENABLED", False)
+    response = negotiated_response({"result": 2 ** 70}, "application/msgpack", status_code=201)
+    assert response.media_type == "application/json" and response.status_code == 201
+    assert response.body == b'{"result":1180591620717411303424}'
+
+def test_msgpack_round_trip_with_raw_value():
+    msgpack = pytest.importorskip("msgpack")
+    body = encode_with_raw("msgpack", {"user_id": "alice", "big": 2 ** 70}, "history", ENCODERS["msgpack"]([{"q": 1}]))
+    assert msgpack.unpackb(body) == {"user_id": "alice", "big": str(2 ** 70), "history": [{"q": 1}]}
+
+@pytest.mark.parametrize("fields", [{"user_id": "alice", "history_count": 1}, {}])
+def test_json_with_raw_value(fields):
+    body = encode_with_raw("json", fields, "history", b'[{"q":1}]')
+    assert json.loads(body) == {**fields, "history": [{"q": 1}]}
+
+def test_encoded_history_is_reused_until_it_changes():
+    memory = ConversationMemory(max_history=2)
+    memory.add_interaction("alice", "Calculate 1 + 1", RESPONSE)
+    count, first = memory.get_history_encoded("alice")
+    assert count == 1 and memory.get_history_encoded("alice")[1] is first
+    assert json.loads(first) == memory.get_history("alice")
+    
+    memory.add_interaction("alice", "Calculate 2 + 2", RESPONSE)
+    count, second = memory.get_history_encoded("alice")
+    assert count == 2 and second is not first
+    assert [turn["query"] for turn in json.loads(second)] == ["Calculate 1 + 1", "Calculate 2 + 2"]
+    
+    memory.clear_history("alice")
+    assert memory.get_history_encoded("alice") == (0, b"[]")
+
+def test_history_endpoint_serves_the_cached_bytes(monkeypatch):
+    import httpx
+    import main
+    memory = ConversationMemory()
+    memory.add_interaction("alice", "Calculate 1 + 1", RESPONSE)
+    monkeypatch.setattr(main, "memory", memory)
+    encodes = []
+    monkeypatch.setitem(ENCODERS, "json", lambda content: encodes.append(content) or json_dumps(content))
+    
+    async def get_twice():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            return [await client.get("/history/alice") for _ in range(2)]
+    
+    responses = asyncio.run(get_twice())
+    assert responses[0].content == responses[1].content
+    assert responses[0].headers["content-type"] == "application/json"
+    assert responses[0].json() == {"user_id": "alice", "history_count": 1, "history": memory.get_history("alice")}
+    assert sum(isinstance(content, list) for content in encodes) == 1  # history encoded once
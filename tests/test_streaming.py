@@ -0,0 +1,68 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.admission import UserRateLimiter
+
+QUERIES = [{"query": "Calculate 1 + 1", "user_id": "alice"},
+           {"query": "Calculate 2 * 3", "user_id": "alice"},
+           {"query": "Calculate 1 + 1", "user_id": "bob"}]
+
+@pytest.fixture
+def app(monkeypatch):
+    import main
+    monkeypatch.setattr(main, 'request_log', None)
+    monkeypatch.setattr(main, 'user_limiter', UserRateLimiter(rate_per_second=5, burst=20))
+    return main.app
+
+def post(app, path: str, body, accept: str = None):
+    import httpx
+    
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(path, json=body, headers={"accept": accept} if accept else {})
+    return asyncio.run(send())
+
+def test_batch_stream_as_ndjson(app):
+    response = post(app, "/ask/batch/stream", QUERIES)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    
+    assert [(event["event"], event["index"]) for event in events[:3]] == [("routed", 0), ("routed", 1), ("routed", 2)]
+    assert events[1]["data"] == {"query": "Calculate 2 * 3", "tool_used": "calculator", "params": {"expression": "2 * 3"}}
+    results = {event["index"]: event["data"] for event in events[3:-1]}
+    assert [event["event"] for event in events[3:-1]] == ["result"] * 3
+    assert {index: data["result"]["result"] for index, data in results.items()} == {0: 2, 1: 6, 2: 2}
+    assert events[-1]["event"] == "done"
+    assert events[-1]["data"]["count"] == 3 and events[-1]["data"]["failed"] == 0
+
+def test_batch_stream_as_server_sent_events(app):
+    response = post(app, "/ask/batch/stream", QUERIES, accept="text/event-stream")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.endswith("\n\n")
+    frames = response.text[:-2].split("\n\n")
+    
+    names = []
+    for frame in frames:
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        names.append(event_line[len("event: "):])
+        assert json.loads(data_line[len("data: "):])["event"] == names[-1]
+    assert names == ["routed"] * 3 + ["result"] * 3 + ["done"]
+
+def test_single_query_stream(app):
+    events = [json.loads(line) for line in post(app, "/ask/stream", QUERIES[1]).text.splitlines()]
+    assert [event["event"] for event in events] == ["routed", "result", "done"]
+    assert events[1]["data"]["result"]["result"] == 6 and "timestamp" in events[1]
+
+def test_oversized_batch_stream_is_rejected(app):
+    import main
+    response = post(app, "/ask/batch/stream", [QUERIES[0]] * (main.BATCH_MAX_ITEMS + 1))
+    assert response.status_code == 413
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from monitoring.tracing import build_span_exporter
+
+pytest.importorskip("opentelemetry.sdk")
+
+def test_file_exporter_creates_missing_directories(tmp_path):
+    path = tmp_path / "data" / "spans.jsonl"
+    exporter = build_span_exporter({'exporter': 'file', 'file_path': str(path)})
+    assert exporter is not None and path.exists()
+    span_file = exporter._file
+    exporter.shutdown()
+    assert span_file.closed
+
+def test_unwritable_span_file_disables_export(tmp_path):
+    (tmp_path / "data").write_text("a file, not a directory")
+    assert build_span_exporter({'exporter': 'file', 'file_path': str(tmp_path / "data" / "spans.jsonl")}) is None
@@ -0,0 +1,97 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools import weather
+
+def payload(city_id: int, name: str) -> dict:
+    return {"id": city_id, "coord": {}, "name": name, "sys": {"country": "XX"},
+            "main": {"temp": 18.5, "humidity": 60}, "weather": [{"description": "clear sky"}], "wind": {"speed": 3.2}}
+
+class FakeClient:
+    """
+    Answers weather and group requests; records each request's params.
+    """
+    def __init__(self, group_status: int = 200):
+        self.requests = []
+        self.group_status = group_status
+    
+    async def get(self, url: str, params: dict):
+        self.requests.append((url, params))
+        request = httpx.Request("GET", url)
+        if url == weather.OPENWEATHER_GROUP_URL:
+            ids = [int(city_id) for city_id in params["id"].split(",")]
+            body = {"list": [payload(city_id, f"city {city_id}") for city_id in ids]}
+            return httpx.Response(self.group_status, json=body, request=request)
+        if "id" in params:
+            return httpx.Response(200, json=payload(params["id"], f"city {params['id']}"), request=request)
+        return httpx.Response(200, json=payload(int(params["q"].split()[-1]), params["q"]), request=request)
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(weather, "get_client", lambda: fake)
+    monkeypatch.setattr(weather, "GROUP_REQUESTS", True)
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test-key")
+    weather.city_locations.clear()
+    return fake
+
+async def lookup(cities: list) -> list:
+    return await asyncio.gather(*(weather.get_weather_async(city) for city in cities))
+
+def test_results_are_not_cached_in_the_tool(client):
+    asyncio.run(lookup(["city 1"]))
+    asyncio.run(lookup(["city 1"]))
+    assert len(client.requests) == 2  # caching is the agent's ResultCache's job
+
+def test_concurrent_known_cities_share_a_group_request(client):
+    cities = [f"city {i}" for i in range(1, 6)]
+    asyncio.run(lookup(cities))
+    client.requests.clear()
+    
+    results = asyncio.run(lookup(cities))
+    
+    assert [result["city"] for result in results] == cities
+    assert [url for url, _ in client.requests] == [weather.OPENWEATHER_GROUP_URL]
+
+def test_refused_group_request_falls_back_to_single_requests(client):
+    cities = [f"city {i}" for i in range(1, 4)]
+    asyncio.run(lookup(cities))
+    client.requests.clear()
+    client.group_status = 403
+    
+    results = asyncio.run(lookup(cities))
+    
+    assert all(result["success"] for result in results)
+    assert len(client.requests) == 1 + len(cities)
+    assert weather.GROUP_REQUESTS is False
+
+def test_failed_group_request_fails_its_cities_instead_of_fetching_each(client):
+    cities = [f"city {i}" for i in range(1, 4)]
+    asyncio.run(lookup(cities))
+    client.requests.clear()
+    client.group_status = 503
+    
+    results = asyncio.run(lookup(cities))
+    
+    assert all(not result["success"] and result["retryable"] for result in results)
+    assert [url for url, _ in client.requests] == [weather.OPENWEATHER_GROUP_URL]
+    assert weather.GROUP_REQUESTS is True
+
+@pytest.mark.parametrize("query, city", [
+    ("weather in The Hague", "the hague"),
+    ("how's the weather in the hague today?", "the hague"),
+    ("what's the weather like in the hague", "the hague"),
+    ("What is the weather in Paris?", "paris"),
+    ("current weather in paris", "paris"),
+    ("weather for Las Vegas right now", "las vegas"),
+    ("temperature in St. Louis", "st. louis"),
+])
+def test_city_keeps_articles_that_belong_to_the_name(query, city):
+    from agent.logic import extract_params
+    assert extract_params(query, 'weather') == {'city': city}
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools import wiki
+from tools.wiki_index import WikiIndex, build_index, open_index
+
+RECORDS = [
+    ("Alan Turing", "Alan Turing was an English mathematician and computer scientist.", "https://en.wikipedia.org/wiki/Alan_Turing"),
+    ("Turing machine", "A Turing machine is a mathematical model of computation.", "https://en.wikipedia.org/wiki/Turing_machine"),
+    ("Machine learning", "Machine learning is a field of study in artificial intelligence.", "https://en.wikipedia.org/wiki/Machine_learning"),
+    ("Enigma machine", "Codebreakers including Alan Turing read messages from this cipher device.", "https://en.wikipedia.org/wiki/Enigma_machine"),
+]
+
+@pytest.fixture
+def index(tmp_path) -> WikiIndex:
+    assert build_index(iter(RECORDS), tmp_path / "wiki.db") == len(RECORDS)
+    return open_index(tmp_path / "wiki.db")
+
+def test_exact_title_wins(index):
+    assert index.lookup("turing machine?")["title"] == "Turing machine"
+
+def test_every_word_in_the_title_matches(index):
+    assert index.lookup("machine turing")["title"] == "Turing machine"
+    assert index.lookup("learning")["title"] == "Machine learning"
+
+def test_summary_only_match_is_a_miss(index):
+    assert index.lookup("codebreakers cipher") is None
+    assert index.lookup("turing computer scientist") is None
+
+def test_query_text_is_never_fts_syntax(index):
+    assert index.lookup('turing" OR "machine') is None
+    assert index.lookup("NOT *") is None
+
+def test_missing_index_file_opens_nothing(tmp_path):
+    assert open_index(tmp_path / "absent.db") is None
+
+class LiveWikipedia:
+    """
+    Stand-in for the MediaWiki API: counts calls, always finds "Live page".
+    """
+    def __init__(self):
+        self.calls = 0
+    
+    async def get(self, url: str, params: dict):
+        import httpx
+        self.calls += 1
+        page = {"index": 1, "title": "Live page", "extract": "From the API.", "fullurl": "https://example.org"}
+        return httpx.Response(200, json={"query": {"pages": {"1": page}}}, request=httpx.Request("GET", url))
+
+@pytest.mark.parametrize("query, live_fallback, title, live_calls", [
+    ("alan turing", True, "Alan Turing", 0),
+    ("codebreakers", True, "Live page", 1),
+    ("codebreakers", False, None, 0),
+])
+def test_offline_index_is_asked_before_the_live_api(index, monkeypatch, query, live_fallback, title, live_calls):
+    live = LiveWikipedia()
+    monkeypatch.setattr(wiki, "offline_index", index)
+    monkeypatch.setattr(wiki, "LIVE_FALLBACK", live_fallback)
+    monkeypatch.setattr(wiki, "get_client", lambda: live)
+    
+    result = asyncio.run(wiki.search_wikipedia_async(query))
+    
+    assert result.get("title") == title and result["success"] is (title is not None)
+    assert live.calls == live_calls
@@ -1,5 +1,322 @@
 import ast
+import asyncio
+import math
 import operator
+import re
+import warnings
+from collections import OrderedDict
+from functools import lru_cache
+
+# Safety limits: reject input that would take long to parse or evaluate
+MAX_EXPRESSION_LENGTH = 1000
+MAX_INT_BITS = 14000  # ~4200 digits, under the int-to-str limit needed to return results
+MAX_EXPONENT = 10000
+
+MAX_LIST_ITEMS = 1_000_000  # numbers in one sum(...)/mean(...) list (~60 ms of parsing)
+
+# Compiled expressions kept for reuse. calculate() compiles an expression
+# from its second sighting on, so one-off expressions skip the cache work
+EXPRESSION_CACHE_SIZE = 1024
+SEEN_EXPRESSIONS_SIZE = 4 * EXPRESSION_CACHE_SIZE
+_seen = OrderedDict()  # expressions evaluated once, oldest first
+
+# "sum of 3, 5 and 9" -> "sum(3, 5, 9)"
+AGGREGATE_FUNCTIONS = {
+    'sum': 'sum', 'total': 'sum',
+    'average': 'mean', 'mean': 'mean', 'avg': 'mean',
+    'minimum': 'min', 'min': 'min',
+    'maximum': 'max', 'max': 'max',
+    'standard deviation': 'std', 'std': 'std'
+}
+AGGREGATE_PHRASE = re.compile(r'(?:the )?(' + '|'.join(AGGREGATE_FUNCTIONS) + r') of (.+)')
+
+def _check_int(value):
+    if type(value) is int and value.bit_length() > MAX_INT_BITS:
+        raise ValueError("Number too large")
+    return value
+
+def _mul(left, right):
+    if type(left) is int and type(right) is int and left.bit_length() + right.bit_length() > MAX_INT_BITS:
+        raise ValueError("Result too large")
+    return left * right
+
+def _pow(base, exponent):
+    if type(base) is int and type(exponent) is int and exponent > 0 and abs(base) > 1:
+        if exponent > MAX_EXPONENT or exponent * math.log2(abs(base)) > MAX_INT_BITS:
+            raise ValueError(f"Exponent too large (limit {MAX_EXPONENT}, result under {MAX_INT_BITS} bits)")
+    return base ** exponent
+
+# Safe operators we allow
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+# Named constants, folded at compile time
+CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+}
+
+def _elementwise(scalar, ufunc: str):
+    """
+    One-argument function: math for numbers, the NumPy ufunc for arrays.
+    """
+    def apply(value):
+        if type(value) is int or type(value) is float:
+            return scalar(value)
+        import numpy as np
+        return getattr(np, ufunc)(value)
+    return apply
+
+# Whitelisted one-argument functions
+FUNCTIONS = {
+    'sqrt': _elementwise(math.sqrt, 'sqrt'),
+    'log': _elementwise(math.log, 'log'),
+    'log10': _elementwise(math.log10, 'log10'),
+    'exp': _elementwise(math.exp, 'exp'),
+    'sin': _elementwise(math.sin, 'sin'),
+    'cos': _elementwise(math.cos, 'cos'),
+    'tan': _elementwise(math.tan, 'tan'),
+    'abs': _elementwise(abs, 'abs'),
+}
+
+# Aggregations over their arguments; list arguments are flattened
+AGGREGATES = {'sum', 'mean', 'min', 'max', 'std'}
+
+def _python_reduce(name: str, values: list):
+    if name == 'sum':
+        return sum(values)
+    if name == 'min':
+        return min(values)
+    if name == 'max':
+        return max(values)
+    mean = sum(values) / len(values)
+    if name == 'mean':
+        return mean
+    return math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))  # population std
+
+def _numpy_reduce(name: str, array):
+    """
+    Reduce along the first axis; integer sums that could overflow
+    int64 fall back to exact Python integers.
+    """
+    import numpy as np
+    
+    if name == 'sum' and array.dtype.kind == 'i' and array.size:
+        if int(np.abs(array).max()) * array.shape[0] >= 2 ** 63:
+            array = array.astype(object)
+    result = getattr(np, name)(array, axis=0)
+    return result.item() if isinstance(result, np.generic) else result
+
+def _aggregate(name: str, values: list):
+    """
+    Numbers from a compiled expression (at most a few hundred) reduce
+    in Python with exact ints; copying them into an array would cost
+    more than the loop. Arrays (batch mode) reduce element-wise with
+    NumPy. Long literal lists never get here: see aggregate_number_list.
+    """
+    if not values:
+        raise ValueError(f"{name}() needs at least one number")
+    
+    if all(type(value) is int or type(value) is float for value in values):
+        return _python_reduce(name, values)
+    
+    import numpy as np
+    return _numpy_reduce(name, np.stack(np.broadcast_arrays(*values)))
+
+# sum(1, 2, ...) / mean([...]) over plain numbers: parsed by NumPy without ast
+NUMBER_LIST_CALL = re.compile(r'\s*(sum|mean|min|max|std)\s*\(\s*\[?([0-9eE.,+\-\s]*)\]?\s*\)\s*\Z')
+
+def aggregate_number_list(expression: str):
+    """
+    Evaluate an aggregation over a long literal number list in one
+    vectorized pass. Lists this long are never compiled or cached.
+    """
+    match = NUMBER_LIST_CALL.match(expression)
+    if match is None:
+        raise ValueError(f"Expression too long (limit {MAX_EXPRESSION_LENGTH} characters)")
+    
+    name, body = match.groups()
+    count = body.count(',') + 1
+    if count > MAX_LIST_ITEMS:
+        raise ValueError(f"Too many numbers (limit {MAX_LIST_ITEMS})")
+    
+    import numpy as np
+    integral = not any(marker in body for marker in '.eE')
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)  # unparsable input
+        try:
+            array = np.fromstring(body, dtype=np.int64 if integral else np.float64, sep=',')
+            # Integers beyond int64 parse as its max (scanning the text for
+            # 19-digit runs instead took longer than the whole parse)
+            if integral and array.size and array.max() == np.iinfo(np.int64).max:
+                array = np.fromstring(body, dtype=np.float64, sep=',')
+        except (DeprecationWarning, ValueError):
+            raise ValueError("Invalid number list") from None
+    if array.size != count:
+        raise ValueError("Invalid number list")
+    return _numpy_reduce(name, array)
+
+class CompiledExpression:
+    """
+    A validated expression lowered to a tree of closures.
+    Evaluate it with scalar variables (evaluate) or NumPy arrays of
+    variable values (evaluate_array); `variables` lists the names used.
+    """
+    __slots__ = ('source', 'variables', '_fn')
+    
+    def __init__(self, source: str, variables: frozenset, fn):
+        self.source = source
+        self.variables = variables
+        self._fn = fn
+    
+    def evaluate(self, variables: dict = None):
+        return self._fn(variables or {})
+    
+    def evaluate_array(self, bindings: dict):
+        """
+        Evaluate over equal-length arrays of variable values in one
+        vectorized pass. Returns a float64 NumPy array.
+        """
+        import numpy as np
+        
+        missing = self.variables - bindings.keys()
+        if missing:
+            raise ValueError(f"Missing values for: {', '.join(sorted(missing))}")
+        
+        arrays = {name: np.asarray(bindings[name], dtype=np.float64) for name in self.variables}
+        shape = np.broadcast_shapes(*(array.shape for array in arrays.values())) if arrays else ()
+        with np.errstate(all='ignore'):  # x/0 -> inf, like any NumPy division
+            result = self._fn(arrays)
+        return np.broadcast_to(np.asarray(result, dtype=np.float64), shape)
+
+# Closure factories for _lower: keeping the closures out of its body keeps
+# it free of cell variables, which would be allocated on every recursive call
+def _lookup(name: str):
+    def lookup(env):
+        try:
+            return env[name]
+        except KeyError:
+            raise ValueError(f"Unknown name: {name}") from None
+    return lookup
+
+def _binary(op, left_constant: bool, left, right_constant: bool, right):
+    if left_constant:
+        return lambda env: op(left, right(env))
+    if right_constant:
+        return lambda env: op(left(env), right)
+    return lambda env: op(left(env), right(env))
+
+def _apply(function, arg):
+    return lambda env: function(arg(env))
+
+def _aggregate_of(name: str, items: list):
+    parts = [(lambda env, value=value: value) if constant else value for constant, value in items]
+    return lambda env: _aggregate(name, [part(env) for part in parts])
+
+def _lower(node, variables: set):
+    """
+    Turn an AST node into (is_constant, value_or_closure). Constant
+    subtrees are folded at compile time, with the same safety limits.
+    """
+    node_type = type(node)
+    if node_type is ast.Constant:  # number
+        value = node.value
+        if type(value) is float or (type(value) is int and value.bit_length() <= MAX_INT_BITS):
+            return True, value
+        raise ValueError("Number too large" if type(value) is int else "Unsupported operation")
+    
+    elif node_type is ast.Name:  # constant, or variable bound at evaluation time
+        name = node.id
+        if name in CONSTANTS:
+            return True, CONSTANTS[name]
+        variables.add(name)
+        return False, _lookup(name)
+    
+    elif node_type is ast.BinOp:  # binary operation
+        op = BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ValueError("Unsupported operation")
+        left_constant, left = _lower(node.left, variables)
+        right_constant, right = _lower(node.right, variables)
+        if left_constant and right_constant:
+            return True, _check_int(op(left, right))
+        return False, _binary(op, left_constant, left, right_constant, right)
+    
+    elif node_type is ast.UnaryOp:  # unary operation
+        op = UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ValueError("Unsupported operation")
+        constant, operand = _lower(node.operand, variables)
+        if constant:
+            return True, op(operand)
+        return False, _apply(op, operand)
+    
+    elif node_type is ast.Call:  # whitelisted function
+        if type(node.func) is not ast.Name or node.keywords:
+            raise ValueError("Unsupported operation")
+        name = node.func.id
+        
+        if name in AGGREGATES:
+            items = []
+            for arg in node.args:
+                if type(arg) is ast.List or type(arg) is ast.Tuple:
+                    for element in arg.elts:
+                        items.append(_lower(element, variables))
+                else:
+                    items.append(_lower(arg, variables))
+            if all(constant for constant, _ in items):
+                return True, _aggregate(name, [value for _, value in items])
+            return False, _aggregate_of(name, items)
+        
+        function = FUNCTIONS.get(name)
+        if function is None:
+            raise ValueError(f"Unknown function: {name}")
+        if len(node.args) != 1:
+            raise ValueError(f"{name}() takes exactly one argument")
+        constant, arg = _lower(node.args[0], variables)
+        if constant:
+            return True, function(arg)
+        return False, _apply(function, arg)
+    
+    raise ValueError("Unsupported operation")
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Parse, validate and lower an expression once; repeats hit the cache.
+    Raises ValueError (or ArithmeticError while folding constants).
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression too long (limit {MAX_EXPRESSION_LENGTH} characters)")
+    
+    node = ast.parse(expression.strip(), mode='eval')
+    variables = set()
+    constant, fn = _lower(node.body, variables)
+    if constant:
+        value = fn
+        fn = lambda env: value
+    return CompiledExpression(expression, frozenset(variables), fn)
+
+def _evaluate_once(expression: str):
+    """
+    Evaluate without keeping the compiled form: the same validation,
+    folding and limits as compile_expression.
+    """
+    constant, fn = _lower(ast.parse(expression.strip(), mode='eval').body, set())
+    return fn if constant else fn({})
 
 def calculate(expression: str) -> dict:
     """
@@ -8,29 +325,15 @@ def calculate(expression: str) -> dict:
     Works with Python 3.8+
     """
     try:
-        # Safe operators we allow
-        operators = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.Pow: operator.pow,
-            ast.USub: operator.neg,
-        }
-        
-        def eval_expr(node):
-            # Python 3.8+ uses ast.Constant instead of ast.Num
-            if isinstance(node, ast.Constant):  # number
-                return node.value
-            elif isinstance(node, ast.BinOp):  # binary operation
-                return operators[type(node.op)](eval_expr(node.left), eval_expr(node.right))
-            elif isinstance(node, ast.UnaryOp):  # unary operation
-                return operators[type(node.op)](eval_expr(node.operand))
-            else:
-                raise ValueError("Unsupported operation")
-        
-        node = ast.parse(expression, mode='eval')
-        result = eval_expr(node.body)
+        if len(expression) > MAX_EXPRESSION_LENGTH:
+            result = aggregate_number_list(expression)
+        elif expression in _seen:
+            result = compile_expression(expression).evaluate()
+        else:
+            _seen[expression] = None
+            if len(_seen) > SEEN_EXPRESSIONS_SIZE:
+                _seen.popitem(last=False)
+            result = _evaluate_once(expression)
         
         return {
             "success": True,
@@ -42,4 +345,46 @@ def calculate(expression: str) -> dict:
             "success": False,
             "error": str(e),
             "expression": expression
-        }
\ No newline at end of file
+        }
+
+def calculate_batch(expression: str, bindings: dict) -> dict:
+    """
+    Evaluate one expression over arrays of variable values with NumPy.
+    Example: calculate_batch("x * 2 + y", {"x": [1, 2], "y": [3, 4]}) -> [5.0, 8.0]
+    """
+    try:
+        result = compile_expression(expression).evaluate_array(bindings)
+        
+        return {
+            "success": True,
+            "result": result.tolist(),
+            "expression": expression
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "expression": expression
+        }
+
+def extract_params(query: str, stripped: str) -> dict:
+    """
+    The expression is the query without words like "calculate" or "what is";
+    "average of 1, 2 and 3" becomes "mean(1, 2, 3)".
+    """
+    aggregate = AGGREGATE_PHRASE.fullmatch(stripped)
+    if aggregate:
+        name, numbers = aggregate.groups()
+        stripped = f"{AGGREGATE_FUNCTIONS[name]}({numbers.replace(' and ', ', ').rstrip('?!. ')})"
+    return {'expression': stripped}
+
+def run(params: dict):
+    """
+    Tool entry point (agent.registry).
+    Long number lists are parsed in a worker thread so the event loop
+    keeps serving other requests; the registry awaits the result.
+    """
+    expression = params.get('expression', '')
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        return asyncio.to_thread(calculate, expression)
+    return calculate(expression)
@@ -1,16 +1,108 @@
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo, available_timezones
 from dateutil import parser
 
-def get_current_datetime() -> dict:
-  
-    now = datetime.now()
+# Parsed date strings kept for reuse
+DATE_CACHE_SIZE = 4096
+
+# Relative day words, resolved against the current date (never cached)
+RELATIVE_DAYS = {'today': 0, 'now': 0, 'tomorrow': 1, 'yesterday': -1}
+
+# Date queries: "difference between X and Y", "N days from X", "time in <zone>"
+DATE_DIFFERENCE = re.compile(r'difference between (.+?) and (.+?)[?.!]*$')
+DATE_OFFSET = re.compile(r'(\d+) (day|week)s? (from|after|before) (.+?)[?.!]*$')
+TIME_IN_ZONE = re.compile(r'time (?:is it )?in (.+?)[?.!]*$')
+
+# Common abbreviations that are not IANA zone names
+TIMEZONE_ALIASES = {
+    'est': 'America/New_York', 'edt': 'America/New_York', 'eastern': 'America/New_York',
+    'cst': 'America/Chicago', 'cdt': 'America/Chicago', 'central': 'America/Chicago',
+    'mst': 'America/Denver', 'mdt': 'America/Denver', 'mountain': 'America/Denver',
+    'pst': 'America/Los_Angeles', 'pdt': 'America/Los_Angeles', 'pacific': 'America/Los_Angeles',
+    'bst': 'Europe/London', 'cet': 'Europe/Paris', 'cest': 'Europe/Paris',
+    'ist': 'Asia/Kolkata', 'jst': 'Asia/Tokyo', 'aest': 'Australia/Sydney',
+    'gmt': 'UTC', 'utc': 'UTC', 'z': 'UTC',
+}
+
+def parse_date(text: str) -> datetime:
+    """
+    Parse a date string: ISO-8601 via datetime.fromisoformat first,
+    dateutil only for other formats (memoized for the current day).
+    """
+    text = text.strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return _parse_fuzzy(text, date.today())
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_fuzzy(text: str, today: date) -> datetime:
+    """
+    dateutil fills missing fields ("5pm", "monday", "march 3") from
+    today, so results are keyed on the day they were computed for.
+    """
+    return parser.parse(text, default=datetime.combine(today, datetime.min.time()))
+
+def resolve_date(text: str) -> datetime:
+    """
+    Parse a date string, also accepting today / now / tomorrow / yesterday.
+    """
+    offset = RELATIVE_DAYS.get(text.strip().lower())
+    if offset is not None:
+        return datetime.now() + timedelta(days=offset)
+    return parse_date(text)
+
+@lru_cache(maxsize=1)
+def _timezone_index() -> dict:
+    """
+    Lowercased lookup of IANA zones by full name ("europe/paris") and
+    city ("paris", "new york"), plus common abbreviations.
+    """
+    index = {}
+    for key in available_timezones():
+        index.setdefault(key.rsplit('/', 1)[-1].replace('_', ' ').lower(), key)
+    for key in available_timezones():
+        index[key.lower()] = key
+    index.update(TIMEZONE_ALIASES)
+    return index
+
+def find_timezone(name: str) -> ZoneInfo:
+    """
+    Resolve a zone name, city or abbreviation ("Europe/Paris", "tokyo", "pst").
+    """
+    key = _timezone_index().get(' '.join(name.lower().split()))
+    if key is None:
+        raise ValueError(f"Unknown timezone: {name}")
+    return ZoneInfo(key)
+
+def get_current_datetime(timezone: str = None) -> dict:
+    """
+    Current date and time, in the server's local timezone or in `timezone`.
+    """
+    try:
+        if timezone:
+            zone = find_timezone(timezone)
+            now = datetime.now(zone)
+            zone_name = zone.key
+        else:
+            now = datetime.now().astimezone()
+            zone_name = now.tzname()
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    
     return {
         "success": True,
         "datetime": now.isoformat(),
         "date": now.strftime("%Y-%m-%d"),
         "time": now.strftime("%H:%M:%S"),
         "day_of_week": now.strftime("%A"),
-        "timezone": "UTC"
+        "timezone": zone_name,
+        "utc_offset": now.strftime("%z")
     }
 
 def calculate_date_difference(date1_str: str, date2_str: str) -> dict:
@@ -19,8 +111,12 @@ def calculate_date_difference(date1_str: str, date2_str: str) -> dict:
     Example: "2024-01-01" and "2024-12-31"
     """
     try:
-        date1 = parser.parse(date1_str)
-        date2 = parser.parse(date2_str)
+        date1 = resolve_date(date1_str)
+        date2 = resolve_date(date2_str)
+        
+        # Compare naive and aware dates by their wall-clock values
+        if (date1.tzinfo is None) != (date2.tzinfo is None):
+            date1, date2 = date1.replace(tzinfo=None), date2.replace(tzinfo=None)
         
         difference = abs((date2 - date1).days)
         
@@ -36,3 +132,54 @@ def calculate_date_difference(date1_str: str, date2_str: str) -> dict:
             "error": str(e)
         }
 
+def add_days(date_str: str, days: int) -> dict:
+    """
+    Date `days` after (or, if negative, before) a date.
+    Example: "2024-01-01" and 10 -> "2024-01-11"
+    """
+    try:
+        start = resolve_date(date_str)
+        result = start + timedelta(days=days)
+        
+        return {
+            "success": True,
+            "date": start.strftime("%Y-%m-%d"),
+            "days": days,
+            "result_date": result.strftime("%Y-%m-%d"),
+            "day_of_week": result.strftime("%A")
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+def extract_params(query: str, stripped: str) -> dict:
+    """
+    Two dates, a date and a day offset, a timezone, or nothing (current date and time).
+    """
+    match = DATE_DIFFERENCE.search(query)
+    if match:
+        return {'date1': match.group(1), 'date2': match.group(2)}
+    
+    match = DATE_OFFSET.search(query)
+    if match:
+        count, unit, direction, date = match.groups()
+        days = int(count) * (7 if unit == 'week' else 1)
+        return {'date': date, 'days': -days if direction == 'before' else days}
+    
+    match = TIME_IN_ZONE.search(query)
+    if match:
+        return {'timezone': match.group(1)}
+    
+    return {}
+
+def run(params: dict) -> dict:
+    """
+    Tool entry point (agent.registry).
+    """
+    if 'date1' in params:
+        return calculate_date_difference(params['date1'], params.get('date2', 'today'))
+    if 'days' in params:
+        return add_days(params.get('date', 'today'), params['days'])
+    return get_current_datetime(params.get('timezone'))
@@ -0,0 +1,57 @@
+import httpx
+
+from config.settings import settings
+
+# Default upstream timeout; run_tool enforces tighter per-tool deadlines
+TIMEOUT_SECONDS = settings.get('performance', {}).get('timeout_seconds', 10)
+
+# Upstream statuses worth retrying (rate limited or server-side failures)
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Shared connection pool for every network-bound tool
+_client = None
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared async HTTP client, creating it on first use.
+    Keep-alive connections are reused across requests and tools.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(TIMEOUT_SECONDS),
+            headers={"User-Agent": "MLOPS-AI-Agent/1.0"}
+        )
+    return _client
+
+def is_transient(error: httpx.HTTPError) -> bool:
+    """
+    True for failures a retry may fix: timeouts, connection errors
+    and 429/5xx responses. Other 4xx responses are permanent.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+def upstream_error(error: httpx.HTTPError) -> dict:
+    """
+    Tool error result for a failed upstream call. Transient failures are
+    flagged `retryable` so run_tool can retry them and trip its breaker.
+    """
+    result = {
+        "success": False,
+        "error": str(error) or type(error).__name__
+    }
+    if is_transient(error):
+        result["retryable"] = True
+    return result
+
+async def close_client():
+    """
+    Close the shared client and release pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,10 +1,193 @@
 import requests
+import httpx
+import asyncio
 import os
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 
+from config.settings import settings
+from monitoring.tracing import stage
+from tools.http_client import get_client, is_transient, upstream_error, TIMEOUT_SECONDS
+
 # Load environment variables
 load_dotenv()
 
+# Overridable so tests and benchmarks can point at a local stub server
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+OPENWEATHER_GROUP_URL = os.getenv("OPENWEATHER_GROUP_URL", OPENWEATHER_URL.rsplit("/", 1)[0] + "/group")
+
+_weather_settings = settings.get('weather') or {}
+MAX_CITIES = _weather_settings.get('max_cities', 10000)
+GROUP_SIZE = _weather_settings.get('group_size', 20)  # provider limit per group call
+GROUP_REQUESTS = _weather_settings.get('group_requests', True)  # switched off if the provider refuses them
+
+# Words around the city in a weather question ("what's the ... like in paris today?").
+# "the" is dropped only right after a question word, so "the hague" keeps it.
+QUESTION_WORDS = {'what', "what's", 'whats', 'how', "how's", 'hows', 'is', 'show', 'tell', 'me', 'get', 'give'}
+LEADING_WORDS = {'current', 'currently', 'like'}
+PREPOSITIONS = {'in', 'for', 'at'}
+TRAILING_WORDS = {'today', 'tonight', 'now', 'right', 'currently', 'like', 'please'}
+
+# Keep-alive session for the sync path
+_session = requests.Session()
+
+def normalize_city(city: str) -> str:
+    """
+    Canonical city name: "What is the Paris?", "paris" and " Paris "
+    all become "paris", so they share cache entries and city ids.
+    """
+    words = city.lower().strip(" ?!.,").split()
+    asked = False
+    while words and words[0] in QUESTION_WORDS:
+        words.pop(0)
+        asked = True
+    if asked and words and words[0] == 'the':
+        words.pop(0)
+    while words and words[0] in LEADING_WORDS:
+        words.pop(0)
+    if words and words[0] in PREPOSITIONS:
+        words.pop(0)
+    while words and words[-1] in TRAILING_WORDS:
+        words.pop()
+    return " ".join(words).strip(" ?!.,")
+
+class CityLocations:
+    """
+    Provider ids (and coordinates) of cities seen so far. Once a city's
+    id is known it is fetched by id, which skips the provider's name
+    lookup and lets concurrent lookups share a group request. Results
+    themselves are cached by the agent's ResultCache, not here.
+    LRU-bounded to MAX_CITIES and safe to use from several threads.
+    """
+    def __init__(self, max_cities: int = MAX_CITIES):
+        self.max_cities = max_cities
+        self.locations = OrderedDict()  # city -> (id, lat, lon)
+        self._lock = threading.Lock()
+    
+    def get(self, city: str):
+        with self._lock:
+            return self.locations.get(city)
+    
+    def store(self, city: str, data: dict) -> dict:
+        """
+        Parse a provider response and remember the city's id.
+        """
+        result = _parse_weather(data)
+        if "id" in data:
+            coord = data.get("coord", {})
+            with self._lock:
+                self.locations[city] = (data["id"], coord.get("lat"), coord.get("lon"))
+                self.locations.move_to_end(city)
+                while len(self.locations) > self.max_cities:
+                    self.locations.popitem(last=False)
+        return result
+    
+    def clear(self):
+        with self._lock:
+            self.locations.clear()
+
+class GroupFetcher:
+    """
+    Joins lookups of cities with known ids that start in the same event
+    loop iteration (the weather queries of an /ask/batch, say) into
+    group requests of up to GROUP_SIZE ids. A city missing from the
+    group response, or a group request refused by the provider, fails
+    its lookups so each falls back to a request of its own; a timeout
+    or 5xx fails them with that error instead.
+    """
+    def __init__(self):
+        self.pending = {}  # api_key -> [(city_id, city, future)]
+        self.tasks = set()  # group requests in flight
+    
+    def fetch(self, city_id: int, city: str, api_key: str) -> asyncio.Future:
+        """
+        Future of the provider's data for `city`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiting = self.pending.setdefault(api_key, [])
+        if not waiting:
+            loop.call_soon(self._send, api_key)
+        waiting.append((city_id, city, future))
+        return future
+    
+    def _send(self, api_key: str):
+        waiting = self.pending.pop(api_key, [])
+        if len(waiting) == 1:
+            if not waiting[0][2].done():
+                waiting[0][2].set_exception(LookupError("single lookup"))  # a group of one saves nothing
+            return
+        for i in range(0, len(waiting), GROUP_SIZE):
+            task = asyncio.create_task(self._fetch_group(waiting[i:i + GROUP_SIZE], api_key))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+    
+    async def _fetch_group(self, group: list, api_key: str):
+        try:
+            with stage("upstream"):
+                response = await get_client().get(
+                    OPENWEATHER_GROUP_URL, params=_build_group_params([city_id for city_id, _, _ in group], api_key)
+                )
+            response.raise_for_status()
+            by_id = {item.get("id"): item for item in response.json().get("list", [])}
+        except (httpx.HTTPError, ValueError) as e:
+            if isinstance(e, httpx.HTTPStatusError):
+                _disable_groups(e.response.status_code)
+            by_id = {}
+            error = e
+        else:
+            error = None
+        
+        for city_id, city, future in group:
+            if future.done():
+                continue
+            if city_id in by_id:
+                future.set_result(by_id[city_id])
+            else:
+                future.set_exception(error or LookupError(f"No data for city id {city_id} in group response"))
+
+def _build_params(city: str, api_key: str) -> dict:
+    location = city_locations.get(city)
+    return {
+        **({"id": location[0]} if location else {"q": city}),
+        "appid": api_key,
+        "units": "metric"  # Celsius
+    }
+
+def _build_group_params(ids: list, api_key: str) -> dict:
+    return {
+        "id": ",".join(str(city_id) for city_id in ids),
+        "appid": api_key,
+        "units": "metric"
+    }
+
+def _parse_weather(data: dict) -> dict:
+    return {
+        "success": True,
+        "city": data["name"],
+        "country": data["sys"]["country"],
+        "temperature": data["main"]["temp"],
+        "description": data["weather"][0]["description"],
+        "humidity": data["main"]["humidity"],
+        "wind_speed": data["wind"]["speed"]
+    }
+
+def _missing_key_error() -> dict:
+    return {
+        "success": False,
+        "error": "API key not provided. Set OPENWEATHER_API_KEY in .env file"
+    }
+
+def _disable_groups(status_code: int):
+    """
+    A 4xx other than 429 means this key or plan has no group endpoint:
+    stop trying it and fetch cities one by one from now on.
+    """
+    global GROUP_REQUESTS
+    if 400 <= status_code < 500 and status_code != 429:
+        GROUP_REQUESTS = False
+
 def get_weather(city: str, api_key: str = None) -> dict:
     """
     Get current weather for a city using OpenWeatherMap API.
@@ -13,36 +196,64 @@ def get_weather(city: str, api_key: str = None) -> dict:
         api_key = os.getenv("OPENWEATHER_API_KEY")
     
     if not api_key:
-        return {
-            "success": False,
-            "error": "API key not provided. Set OPENWEATHER_API_KEY in .env file"
-        }
+        return _missing_key_error()
     
+    city = normalize_city(city)
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather"
-        params = {
-            "q": city,
-            "appid": api_key,
-            "units": "metric"  # Celsius
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        with stage("upstream"):
+            response = _session.get(OPENWEATHER_URL, params=_build_params(city, api_key), timeout=TIMEOUT_SECONDS)
         response.raise_for_status()
         
-        data = response.json()
-        
-        return {
-            "success": True,
-            "city": data["name"],
-            "country": data["sys"]["country"],
-            "temperature": data["main"]["temp"],
-            "description": data["weather"][0]["description"],
-            "humidity": data["main"]["humidity"],
-            "wind_speed": data["wind"]["speed"]
-        }
+        return city_locations.store(city, response.json())
     except requests.exceptions.RequestException as e:
         return {
             "success": False,
             "error": str(e)
         }
 
+async def get_weather_async(city: str, api_key: str = None) -> dict:
+    """
+    Async variant of get_weather using the shared pooled HTTP client.
+    Cities with a known id looked up together share group requests.
+    """
+    if not api_key:
+        api_key = os.getenv("OPENWEATHER_API_KEY")
+    
+    if not api_key:
+        return _missing_key_error()
+    
+    city = normalize_city(city)
+    location = city_locations.get(city)
+    if location is not None and GROUP_REQUESTS:
+        try:
+            return city_locations.store(city, await group_fetcher.fetch(location[0], city, api_key))
+        except httpx.HTTPError as e:
+            if is_transient(e):
+                return upstream_error(e)  # an outage: one failed call must not become one per city
+        except (LookupError, ValueError):
+            pass  # fetched on its own below
+    
+    try:
+        with stage("upstream"):
+            response = await get_client().get(OPENWEATHER_URL, params=_build_params(city, api_key))
+        response.raise_for_status()
+        
+        return city_locations.store(city, response.json())
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+
+def extract_params(query: str, stripped: str) -> dict:
+    """
+    "what is the weather in paris?" -> {'city': 'paris'}
+    """
+    return {'city': normalize_city(stripped)}
+
+async def run(params: dict) -> dict:
+    """
+    Tool entry point (agent.registry).
+    """
+    return await get_weather_async(params.get('city', 'London'))
+
+# Global city id map and group request batcher
+city_locations = CityLocations()
+group_fetcher = GroupFetcher()
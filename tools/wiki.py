@@ -1,50 +1,138 @@
-import wikipedia
+import asyncio
+import os
+import httpx
+import requests
+from pathlib import Path
 
-def search_wikipedia(query: str, sentences: int = 3) -> dict:
+from config.settings import settings
+from monitoring.tracing import stage
+from tools.http_client import get_client, upstream_error, TIMEOUT_SECONDS
+from tools.wiki_index import open_index
+
+# MediaWiki action API, overridable for local stub servers
+WIKIPEDIA_API_URL = os.getenv("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+
+# Search hits fetched per query; the extras cover disambiguation pages
+SEARCH_CANDIDATES = 3
+
+# Offline index (python -m tools.wiki_index build ...), answered before the live API
+_wiki_settings = settings.get('wikipedia') or {}
+WIKIPEDIA_INDEX_PATH = os.getenv("WIKIPEDIA_INDEX_PATH", _wiki_settings.get('offline_index'))
+if WIKIPEDIA_INDEX_PATH:
+    # Relative paths are resolved against the project root
+    WIKIPEDIA_INDEX_PATH = str(Path(__file__).parent.parent / WIKIPEDIA_INDEX_PATH)
+LIVE_FALLBACK = _wiki_settings.get('live_fallback', True)
+offline_index = open_index(WIKIPEDIA_INDEX_PATH)
+
+# Keep-alive session for the sync path
+_session = requests.Session()
+_session.headers["User-Agent"] = "MLOPS-AI-Agent/1.0"
+
+def _build_params(query: str, sentences: int) -> dict:
     """
-    Search Wikipedia and return a summary.
+    One request that searches and returns title, summary and URL
+    for the top candidates (generator=search + prop=extracts|info).
     """
-    try:
-        # Search for the topic
-        search_results = wikipedia.search(query, results=1)
-        
-        if not search_results:
-            return {
-                "success": False,
-                "error": "No results found"
-            }
-        
-        # Get the page
-        page = wikipedia.page(search_results[0], auto_suggest=False)
-        
-        # Get summary
-        summary = wikipedia.summary(search_results[0], sentences=sentences)
-        
+    return {
+        "action": "query",
+        "format": "json",
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrlimit": SEARCH_CANDIDATES,
+        "prop": "extracts|info|pageprops",
+        "exsentences": sentences,
+        "exintro": 1,
+        "explaintext": 1,
+        "exlimit": "max",
+        "inprop": "url",
+        "ppprop": "disambiguation",
+        "redirects": 1
+    }
+
+def _parse_response(data: dict) -> dict:
+    """
+    Pick the best-ranked page that is not a disambiguation page.
+    """
+    pages = sorted(data.get("query", {}).get("pages", {}).values(), key=lambda page: page.get("index", 0))
+    
+    if not pages:
+        return {
+            "success": False,
+            "error": "No results found"
+        }
+    
+    for page in pages:
+        if "disambiguation" in page.get("pageprops", {}):
+            continue
         return {
             "success": True,
-            "title": page.title,
-            "summary": summary,
-            "url": page.url
+            "title": page["title"],
+            "summary": page.get("extract", ""),
+            "url": page.get("fullurl", "")
         }
-    except wikipedia.exceptions.DisambiguationError as e:
-        # Multiple results - pick the first one
-        try:
-            page = wikipedia.page(e.options[0])
-            summary = wikipedia.summary(e.options[0], sentences=sentences)
-            return {
-                "success": True,
-                "title": page.title,
-                "summary": summary,
-                "url": page.url
-            }
-        except:
-            return {
-                "success": False,
-                "error": "Disambiguation error"
-            }
-    except Exception as e:
+    
+    return {
+        "success": False,
+        "error": "Disambiguation error"
+    }
+
+def _offline_miss() -> dict:
+    return {
+        "success": False,
+        "error": "No results found"
+    }
+
+def search_wikipedia(query: str, sentences: int = 3) -> dict:
+    """
+    Search Wikipedia and return a summary.
+    """
+    if offline_index is not None:
+        with stage("offline_index"):
+            result = offline_index.lookup(query)
+        if result is not None:
+            return result
+        if not LIVE_FALLBACK:
+            return _offline_miss()
+    
+    try:
+        with stage("upstream"):
+            response = _session.get(WIKIPEDIA_API_URL, params=_build_params(query, sentences), timeout=TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return _parse_response(response.json())
+    except requests.exceptions.RequestException as e:
         return {
             "success": False,
             "error": str(e)
         }
 
+async def search_wikipedia_async(query: str, sentences: int = 3) -> dict:
+    """
+    Async variant of search_wikipedia using the shared pooled HTTP client.
+    """
+    if offline_index is not None:
+        with stage("offline_index"):
+            result = await asyncio.to_thread(offline_index.lookup, query)
+        if result is not None:
+            return result
+        if not LIVE_FALLBACK:
+            return _offline_miss()
+    
+    try:
+        with stage("upstream"):
+            response = await get_client().get(WIKIPEDIA_API_URL, params=_build_params(query, sentences))
+        response.raise_for_status()
+        return _parse_response(response.json())
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+
+def extract_params(query: str, stripped: str) -> dict:
+    """
+    The topic is the query without "tell me about", "who is", ...
+    """
+    return {'query': stripped}
+
+async def run(params: dict) -> dict:
+    """
+    Tool entry point (agent.registry).
+    """
+    return await search_wikipedia_async(params.get('query', ''))
@@ -0,0 +1,216 @@
+"""
+Offline Wikipedia index: title/summary records in a SQLite FTS5 database.
+
+Build one from a Wikipedia abstracts dump (enwiki-*-abstract.xml[.gz])
+or any JSONL file with title / summary (or abstract) / url fields:
+    
+    python -m tools.wiki_index build enwiki-latest-abstract.xml.gz --db data/wiki.db
+    python -m tools.wiki_index query "machine learning" --db data/wiki.db
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+
+# Records inserted per transaction batch while building
+BUILD_BATCH_SIZE = 5000
+
+# bm25 column weights: a term in the title counts 10x one in the summary
+TITLE_WEIGHT = 10.0
+SUMMARY_WEIGHT = 1.0
+
+def _open_text(path: str):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+def _page_url(title: str) -> str:
+    return f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+
+def read_jsonl(path: str):
+    """
+    Yield (title, summary, url) from JSONL records.
+    """
+    with _open_text(path) as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            title = record.get('title')
+            summary = record.get('summary') or record.get('abstract') or record.get('extract')
+            if title and summary:
+                yield title, summary, record.get('url') or _page_url(title)
+
+def read_abstracts_dump(path: str):
+    """
+    Yield (title, summary, url) from a Wikipedia abstracts XML dump,
+    streaming so memory stays flat for multi-GB files.
+    """
+    with _open_text(path) as source:
+        for _, element in ElementTree.iterparse(source):
+            if element.tag != 'doc':
+                continue
+            title = (element.findtext('title') or '').removeprefix('Wikipedia: ')
+            summary = (element.findtext('abstract') or '').strip()
+            if title and summary:
+                yield title, summary, element.findtext('url') or _page_url(title)
+            element.clear()
+
+def read_records(path: str):
+    """
+    Pick the reader by file name: *.xml[.gz] dumps, anything else JSONL.
+    """
+    name = str(path).removesuffix('.gz')
+    return read_abstracts_dump(path) if name.endswith('.xml') else read_jsonl(path)
+
+def build_index(records, db_path: str, batch_size: int = BUILD_BATCH_SIZE) -> int:
+    """
+    Write records into a fresh index at db_path and return how many were
+    stored. Builds into a temporary file and swaps it in at the end, so
+    a running server never sees a half-built index.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(db_path.name + '.building')
+    tmp_path.unlink(missing_ok=True)
+    
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # Durability is pointless for a file we rename only once complete
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript("""
+            CREATE TABLE pages (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                title_key TEXT NOT NULL UNIQUE,
+                summary TEXT NOT NULL,
+                url TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE pages_fts USING fts5(
+                title, summary, content='pages', content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            );
+        """)
+        
+        # Step 1: Bulk-load the content table (first record per title wins)
+        batch = []
+        for title, summary, url in records:
+            batch.append((title, title.lower(), summary, url))
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT OR IGNORE INTO pages (title, title_key, summary, url) VALUES (?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.executemany("INSERT OR IGNORE INTO pages (title, title_key, summary, url) VALUES (?, ?, ?, ?)", batch)
+        
+        # Step 2: Build the full-text index in one pass and compact it
+        conn.execute("INSERT INTO pages_fts (pages_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO pages_fts (pages_fts) VALUES ('optimize')")
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+    finally:
+        conn.close()
+    
+    os.replace(tmp_path, db_path)
+    return count
+
+def _match_expression(query: str, column: str = None) -> str:
+    """
+    FTS5 query requiring every word, each quoted so user input can
+    never be read as FTS5 syntax; optionally limited to one column.
+    """
+    words = ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+    return f"{column} : ({words})" if column else words
+
+class WikiIndex:
+    """
+    Read-only lookups against an index built by build_index.
+    An exact (case-insensitive) title match wins; otherwise the best
+    bm25 match with every query word in the title. Pages that only
+    mention the words in their summary are not answers to the query, so
+    they count as a miss (and go to the live API). Safe to share across
+    threads: each thread opens its own read-only connection.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+    
+    def lookup(self, query: str):
+        """
+        Return a search_wikipedia-style result, or None on a miss.
+        """
+        query = ' '.join(query.strip(' ?!.,').split())
+        if not query:
+            return None
+        
+        # Step 1: Exact title
+        conn = self._connection()
+        row = conn.execute("SELECT title, summary, url FROM pages WHERE title_key = ?", (query.lower(),)).fetchone()
+        
+        # Step 2: Every word in the title, best ranked first
+        if row is None:
+            row = conn.execute(
+                "SELECT p.title, p.summary, p.url FROM pages_fts f JOIN pages p ON p.id = f.rowid "
+                f"WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts, {TITLE_WEIGHT}, {SUMMARY_WEIGHT}) LIMIT 1",
+                (_match_expression(query, 'title'),)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        title, summary, url = row
+        return {
+            "success": True,
+            "title": title,
+            "summary": summary,
+            "url": url
+        }
+    
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+def open_index(db_path: str):
+    """
+    Open the index if the file exists, else None.
+    """
+    if db_path and Path(db_path).exists():
+        return WikiIndex(db_path)
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the offline Wikipedia index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="ingest an abstracts dump or JSONL file")
+    build.add_argument("source", help="enwiki-*-abstract.xml[.gz] or JSONL with title/summary/url")
+    build.add_argument("--db", default="data/wiki.db")
+    build.add_argument("--batch-size", type=int, default=BUILD_BATCH_SIZE)
+    query = commands.add_parser("query", help="look a topic up in an index")
+    query.add_argument("text")
+    query.add_argument("--db", default="data/wiki.db")
+    args = parser.parse_args(argv)
+    
+    if args.command == "build":
+        start = time.perf_counter()
+        count = build_index(read_records(args.source), args.db, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"✅ Indexed {count} articles into {args.db} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f}/s)")
+    else:
+        index = open_index(args.db)
+        if index is None:
+            sys.exit(f"No index at {args.db}")
+        print(json.dumps(index.lookup(args.text), indent=2))
+
+if __name__ == "__main__":
+    main()